@@ -3,43 +3,41 @@ import math
 import os
 import sys
 from contextlib import contextmanager
+from functools import partial
 
 import matplotlib
-from matplotlib.colors import LinearSegmentedColormap
 
 matplotlib.use("Qt5Agg")
 
-from qtpy.QtCore import QSettings
+from qtpy.QtCore import QSettings, QStandardPaths, QThreadPool, QTimer
 from qtpy.QtGui import QIcon, QFont, QCursor
-from qtpy.QtWidgets import QMainWindow, QFileDialog, QDialog, QMessageBox, QApplication, QErrorMessage
-
+from qtpy.QtWidgets import QMainWindow, QFileDialog, QDialog, QMessageBox, QApplication, QErrorMessage, QProgressBar, \
+    QToolButton
+
+from core.cache import FileCache
+from core.impulse import ImpulseLoader, ImpulseResponses
+from core.load import create_loader, guess_plane
+from core.events import VISIBLE_PRIORITY, DEFAULT_PRIORITY
+from core.measurement import MeasurementModel, create_event_bus
+from model.colours import get_colour_map
 from model.contour import ContourModel
 from model.display import DisplayModel, DisplayControlDialog
-from model.load import NFSLoader
+from model.lazy import LazyChartModel
 from model.log import RollingLogger
 from model.multi import MultiChartModel
-from model.preferences import Preferences
+from model.preferences import Preferences, LOAD_CACHE_SIZE_MB
+from model.worker import LoadWorker
 from ui.pypolarmap import Ui_MainWindow
 from ui.savechart import Ui_saveChartDialog
 
-from model import magnitude as mag, measurement as m
+from model import magnitude as mag
+from model.measurement import MeasurementListModel
 from qtpy import QtCore, QtWidgets
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as Canvas
-import colorcet as cc
 
 logger = logging.getLogger('pypolarmap')
 
-# from http://colorcet.pyviz.org/index.html
-inverse = {}
-for k, v in cc.cm_n.items():
-    if not k[-2:] == "_r":
-        inverse[v] = inverse.get(v, [])
-        inverse[v].insert(0, k)
-all_cms = sorted({',  '.join(reversed(v)): k for (k, v) in inverse.items()}.items())
-cms_by_name = dict(all_cms)
-cms_by_name['custom'] = LinearSegmentedColormap.from_list('custom', ['black', 'magenta', 'blue', 'cyan', 'lime', 'yellow', 'red', 'white'])
-
 
 # Matplotlib canvas class to create figure
 class MplCanvas(Canvas):
@@ -58,17 +56,16 @@ class MplWidget(QtWidgets.QWidget):
         self.vbl = QtWidgets.QVBoxLayout()
         self.vbl.addWidget(self.canvas)
         self.setLayout(self.vbl)
-        self.__cmap = self.get_colour_map('rainbow')
 
     def get_colour_map(self, name):
-        return cms_by_name.get(name, cms_by_name.get('bgyw'))
+        return get_colour_map(name)
 
     def get_colour(self, idx, count):
         '''
         :param idx: the colour index.
         :return: the colour at that index.
         '''
-        return self.__cmap(idx / count)
+        return self.get_colour_map('rainbow')(idx / count)
 
 
 class SaveChartDialog(QDialog, Ui_saveChartDialog):
@@ -134,25 +131,65 @@ class PyPolarmap(QMainWindow, Ui_MainWindow):
             logger.exception('Unable to load version')
         # menus
         self.actionLoad.triggered.connect(self.selectDirectory)
+        self.actionLoad_Impulses.triggered.connect(self.selectImpulses)
+        self.actionCancel_Load.triggered.connect(self.cancel_load)
         self.actionSave_Current_Image.triggered.connect(self.saveCurrentChart)
         self.actionShow_Logs.triggered.connect(self.logViewer.show_logs)
         self.actionAbout.triggered.connect(self.showAbout)
+        self.__file_cache = FileCache(os.path.join(QStandardPaths.writableLocation(QStandardPaths.GenericCacheLocation),
+                                                   'pypolarmap'),
+                                      self.preferences.get(LOAD_CACHE_SIZE_MB) * 1024 * 1024)
+        self.__load_worker = None
+        self.__load_progress = QProgressBar(self.statusbar)
+        self.__load_progress.setMaximumWidth(200)
+        self.__load_progress.setRange(0, 100)
+        self.__load_progress.setVisible(False)
+        self.statusbar.addPermanentWidget(self.__load_progress)
+        self.__cancel_load_button = QToolButton(self.statusbar)
+        self.__cancel_load_button.setDefaultAction(self.actionCancel_Load)
+        self.__cancel_load_button.setVisible(False)
+        self.statusbar.addPermanentWidget(self.__cancel_load_button)
         self.__display_model = DisplayModel(self.preferences)
-        self.__measurement_model = m.MeasurementModel(self.__display_model)
+        # events are merged over one tick of the event loop and delivered to the visible chart first
+        event_bus = create_event_bus(scheduler=lambda flush: QTimer.singleShot(0, flush),
+                                     priority=self.__get_listener_priority, on_flush=self.__on_events_delivered)
+        self.__measurement_model = MeasurementModel(self.__display_model, event_bus=event_bus)
+        self.logViewer.set_latency_source(event_bus.format_latencies)
         self.__display_model.measurement_model = self.__measurement_model
-        # measured graphs
-        self.__measured_multi_model = MultiChartModel(self.measuredMultiGraph, self.__measurement_model,
-                                                      self.__display_model, self.preferences)
-        self.__measured_polar_model = ContourModel(self.measuredPolarGraph, self.__measurement_model,
-                                                   self.__display_model, self.preferences)
-        self.__measured_magnitude_model = mag.MagnitudeModel(self.measuredMagnitudeGraph, self.__measurement_model,
-                                                             self.__display_model,
-                                                             selector=self.measuredMagnitudeCurves)
+        # measured graphs, each is created when its tab is first shown
+        self.__measured_multi_model = LazyChartModel(
+            self.measuredMultiGraph, 'multi',
+            lambda: MultiChartModel(self.measuredMultiGraph, self.__measurement_model, self.__display_model,
+                                    self.preferences))
+        self.__measured_polar_model = LazyChartModel(
+            self.measuredPolarGraph, 'contour',
+            lambda: ContourModel(self.measuredPolarGraph, self.__measurement_model, self.__display_model,
+                                 self.preferences))
+        self.__measured_magnitude_model = LazyChartModel(
+            self.measuredMagnitudeGraph, 'magnitude',
+            lambda: mag.MagnitudeModel(self.measuredMagnitudeGraph, self.__measurement_model, self.__display_model,
+                                       selector=self.measuredMagnitudeCurves))
         self.__display_model.results_charts = [self.__measured_multi_model, self.__measured_polar_model,
                                                self.__measured_magnitude_model]
-        self.__measurement_list_model = m.MeasurementListModel(self.__measurement_model, parent=parent)
+        self.__measurement_list_model = MeasurementListModel(self.__measurement_model, parent=parent)
         self.action_Display.triggered.connect(self.show_display_controls_dialog)
 
+    def __get_listener_priority(self, listener):
+        '''
+        :param listener: a listener to the measurement model.
+        :return: VISIBLE_PRIORITY if the listener draws on the visible chart, DEFAULT_PRIORITY otherwise.
+        '''
+        visible = self.__display_model.visible_chart
+        chart = getattr(listener, '_chart', None)
+        if visible is not None and chart is not None and chart is getattr(visible, '_chart', None):
+            return VISIBLE_PRIORITY
+        return DEFAULT_PRIORITY
+
+    def __on_events_delivered(self, priority):
+        ''' redraws the visible chart once it has caught up with the measurement model. '''
+        if priority == VISIBLE_PRIORITY:
+            self.__display_model.redraw_visible()
+
     def showAbout(self):
         ''' Shows the about dialog '''
         msg_box = QMessageBox()
@@ -195,22 +232,100 @@ class PyPolarmap(QMainWindow, Ui_MainWindow):
     # signal handlers
     def selectDirectory(self):
         '''
-        Triggered by the select directory button. Shows a file dialog which allows a user to select a directory which is
-        used to load the set of measurements which is then passed to the various models.
+        Triggered by the select directory button. Shows a file dialog which allows a user to select the files, one per
+        plane, which are used to load the set of measurements which is then passed to the various models.
         :return:
         '''
-        selected = QFileDialog.getOpenFileName(parent=self, caption='Select NFS File', filter='Filter (*.txt)')
-        if len(selected) > 0:
-            self.__measurement_model.load(NFSLoader(selected[0]).load())
+        selected = QFileDialog.getOpenFileNames(parent=self, caption='Select NFS File(s)', filter='Filter (*.txt)')
+        if len(selected) > 0 and len(selected[0]) > 0:
+            self.load_files(selected[0])
+
+    def selectImpulses(self):
+        '''
+        Shows a file dialog which allows a user to select a set of impulse responses, one per angle, which are gated
+        to create the set of measurements which is then passed to the various models.
+        '''
+        selected = QFileDialog.getOpenFileNames(parent=self, caption='Select Impulse Responses',
+                                                filter='Impulses (*.wav *.txt)')
+        if len(selected) > 0 and len(selected[0]) > 0:
+            files = selected[0]
+            self.__start_load(lambda progress: ImpulseLoader(files, progress_listener=progress,
+                                                             plane=guess_plane(files[0])))
+
+    def load_files(self, files):
+        '''
+        Loads the files in the background, the measurement model is only updated once the load completes. The plane
+        of each file is guessed from its name.
+        :param files: the files.
+        '''
+        self.__start_load(lambda progress: create_loader(files, cache=self.__file_cache, progress_listener=progress))
+
+    def __start_load(self, factory):
+        '''
+        Starts a load in the background, cancelling any load which is already in progress.
+        :param factory: creates the loader given a progress listener.
+        '''
+        if self.__load_worker is not None:
+            self.__load_worker.cancel()
+        worker = LoadWorker(factory)
+        worker.signals.progress.connect(partial(self.__on_load_progress, worker))
+        worker.signals.loaded.connect(partial(self.__on_loaded, worker))
+        worker.signals.failed.connect(partial(self.__on_load_failed, worker))
+        worker.signals.cancelled.connect(partial(self.__on_load_cancelled, worker))
+        self.__load_worker = worker
+        self.__load_progress.setValue(0)
+        self.__load_progress.setVisible(True)
+        self.__cancel_load_button.setVisible(True)
+        self.actionCancel_Load.setEnabled(True)
+        self.statusbar.showMessage(f"Loading {worker.file}")
+        QThreadPool.globalInstance().start(worker)
+
+    def cancel_load(self):
+        '''
+        Cancels the current load, if any.
+        '''
+        if self.__load_worker is not None:
+            self.__load_worker.cancel()
+
+    def __on_load_progress(self, worker, pct):
+        if worker is self.__load_worker:
+            self.__load_progress.setValue(pct)
+
+    def __on_loaded(self, worker, measurements):
+        if worker is self.__load_worker:
+            self.__finish_load()
+            self.statusbar.showMessage(f"Loaded {worker.file}", 5000)
+            if isinstance(measurements, ImpulseResponses):
+                self.__display_model.impulses = measurements
+            else:
+                self.__display_model.impulses = None
+                self.__measurement_model.load(measurements)
             self.graphTabs.setEnabled(True)
             self.graphTabs.setCurrentIndex(0)
             self.graphTabs.setTabEnabled(0, True)
             self.enable_analysed_tabs()
             self.onGraphTabChange()
-        else:
-            self.__measurementModel.clear()
-            self.graphTabs.setCurrentIndex(0)
-            self.graphTabs.setEnabled(False)
+
+    def __on_load_failed(self, worker, e):
+        if worker is self.__load_worker:
+            self.__finish_load()
+            self.statusbar.showMessage(f"Unable to load {worker.file}", 5000)
+            msg_box = QMessageBox()
+            msg_box.setText(f"Unable to load {worker.file}<br><br>{e}")
+            msg_box.setIcon(QMessageBox.Critical)
+            msg_box.setWindowTitle('Load Failed')
+            msg_box.exec()
+
+    def __on_load_cancelled(self, worker):
+        if worker is self.__load_worker:
+            self.__finish_load()
+            self.statusbar.showMessage(f"Cancelled load of {worker.file}", 5000)
+
+    def __finish_load(self):
+        self.__load_worker = None
+        self.__load_progress.setVisible(False)
+        self.__cancel_load_button.setVisible(False)
+        self.actionCancel_Load.setEnabled(False)
 
     def saveCurrentChart(self):
         '''
@@ -0,0 +1,263 @@
+import argparse
+import glob
+import logging
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.ticker import FuncFormatter, MultipleLocator
+
+from core.load import load_files
+from core.measurement import AnalysisOptions, MeasurementModel, nearest_index
+from core.scales import calculate_dBFS_Scales
+from model.colours import get_colour_map
+from model.contour import ContourModel
+from model.magnitude import MagnitudeModel
+from model.preferences import DEFAULT_PREFS, DISPLAY_COLOUR_MAP, DISPLAY_DB_RANGE, DISPLAY_SMOOTHING
+
+logger = logging.getLogger('batch')
+
+CHARTS = ['sonagram', 'magnitude', 'polar']
+FORMATS = ['png', 'svg']
+# the frequencies shown on the polar chart
+POLAR_FREQS = [500, 1000, 2000, 4000, 8000, 16000]
+
+
+class BatchPreferences:
+    '''
+    Preferences for a batch run, i.e. the defaults overlaid with the values supplied on the command line, nothing is
+    persisted.
+    '''
+
+    def __init__(self, values=None):
+        self.__values = {**DEFAULT_PREFS, **(values if values is not None else {})}
+
+    def get(self, key, default_if_unset=True):
+        return self.__values.get(key, None)
+
+    def set(self, key, value):
+        if value is None:
+            self.__values.pop(key, None)
+        else:
+            self.__values[key] = value
+
+
+class BatchOptions(AnalysisOptions):
+    '''
+    The analysis options for a batch run along with the display settings read by the charts, this stands in for the
+    DisplayModel so a batch run does not need Qt.
+    '''
+
+    def __init__(self, preferences):
+        super().__init__(smoothing=preferences.get(DISPLAY_SMOOTHING))
+        self.db_range = preferences.get(DISPLAY_DB_RANGE)
+
+
+class BatchChart:
+    '''
+    A chart which is rendered straight to a file, the equivalent of the MplWidget used by the UI.
+    '''
+
+    def __init__(self, width, height, dpi):
+        self.canvas = FigureCanvasAgg(Figure(figsize=(width / dpi, height / dpi), dpi=dpi, tight_layout=True))
+
+    def get_colour_map(self, name):
+        return get_colour_map(name)
+
+    def get_colour(self, idx, count):
+        return self.get_colour_map('rainbow')(idx / count)
+
+    def save(self, file, fmt):
+        self.canvas.figure.savefig(file, format=fmt)
+
+
+def render_polar(chart, data, db_range, freqs=POLAR_FREQS):
+    '''
+    Draws the polar response at a few frequencies. The polar chart in the UI shows the single frequency under the
+    cursor as an animated artist, which is left out of a saved figure, so a batch render draws a static set instead.
+    :param chart: the chart.
+    :param data: the directivity data.
+    :param db_range: the decibel range.
+    :param freqs: the frequencies to show.
+    '''
+    axes = chart.canvas.figure.add_subplot(1, 1, 1, projection='polar')
+    axes.grid(linestyle='--', axis='y', alpha=0.7)
+    axes.set_thetagrids(np.arange(0, 360, 15))
+    axes.xaxis.set_major_formatter(FuncFormatter(format_angle))
+    rmax, rmin, rsteps, _ = calculate_dBFS_Scales(data.spl, max_range=db_range)
+    axes.set_rgrids(rsteps)
+    axes.yaxis.set_major_locator(MultipleLocator(12))
+    theta = np.radians(data.angles)
+    for idx, freq in enumerate(freqs):
+        if data.freqs[0] <= freq <= data.freqs[-1]:
+            col = nearest_index(data.freqs, freq)
+            axes.plot(theta, data.spl[:, col], linewidth=2, color=chart.get_colour(idx, len(freqs)),
+                      label=f"{round(data.freqs[col])} Hz")
+    axes.set_ylim(bottom=rmin, top=rmax)
+    if axes.lines:
+        axes.legend(loc='lower right', fontsize='small')
+
+
+def format_angle(x, pos=None):
+    deg = math.degrees(x)
+    if deg > 180:
+        deg = deg - 360
+    return f"{deg:0.0f}\N{DEGREE SIGN}"
+
+
+def render_file(file, output_dir, charts=CHARTS, formats=FORMATS, width=1200, height=800, dpi=100, prefs=None):
+    '''
+    Renders the charts for a single NFS export, this runs in a worker process.
+    :param file: the file.
+    :param output_dir: the directory the charts are written to.
+    :param charts: the charts to render.
+    :param formats: the formats to write each chart in.
+    :param width: the width of each chart in pixels.
+    :param height: the height of each chart in pixels.
+    :param dpi: the dpi.
+    :param prefs: any preferences which override the defaults.
+    :return: a dict of the file, the time taken by each step in ms, the files written and the error, if any.
+    '''
+    result = {'file': file, 'timings': {}, 'outputs': [], 'error': None}
+    start = time.perf_counter()
+    try:
+        measurements = load_files([file])
+        result['timings']['load'] = elapsed_ms(start)
+        preferences = BatchPreferences(prefs)
+        display_model = BatchOptions(preferences)
+        measurement_model = MeasurementModel(display_model)
+        # the charts listen for the load so must exist before it
+        renderers = {name: create_renderer(name, measurement_model, display_model, preferences, width, height, dpi)
+                     for name in charts}
+        measurement_model.load(measurements)
+        stem = os.path.splitext(os.path.basename(file))[0]
+        for name, (chart, render) in renderers.items():
+            chart_start = time.perf_counter()
+            render()
+            for fmt in formats:
+                output = os.path.join(output_dir, f"{stem}_{name}.{fmt}")
+                chart.save(output, fmt)
+                result['outputs'].append(output)
+            result['timings'][name] = elapsed_ms(chart_start)
+    except Exception as e:
+        logger.exception(f"Unable to render {file}")
+        result['error'] = f"{e.__class__.__name__}: {e}"
+    result['timings']['total'] = elapsed_ms(start)
+    return result
+
+
+def create_renderer(name, measurement_model, display_model, preferences, width, height, dpi):
+    '''
+    Creates a chart along with the function which draws it.
+    :param name: the name of the chart.
+    :return: the chart, a no arg callable which draws the chart.
+    '''
+    chart = BatchChart(width, height, dpi)
+    if name == 'sonagram':
+        return chart, ContourModel(chart, measurement_model, display_model, preferences).display
+    if name == 'magnitude':
+        return chart, MagnitudeModel(chart, measurement_model, display_model).display
+    if name == 'polar':
+        return chart, lambda: render_polar(chart, measurement_model.get_directivity_data(), display_model.db_range)
+    raise ValueError(f"Unknown chart {name}")
+
+
+def elapsed_ms(start):
+    return round((time.perf_counter() - start) * 1000)
+
+
+def find_files(inputs):
+    '''
+    Expands the inputs into a list of files, each input is a file, a directory (whose .txt files are used) or a glob.
+    :param inputs: the inputs.
+    :return: the files in the order they were found, without duplicates.
+    '''
+    files = []
+    for i in inputs:
+        if os.path.isdir(i):
+            found = sorted(glob.glob(os.path.join(i, '*.txt')))
+        elif glob.has_magic(i):
+            found = sorted(f for f in glob.glob(i, recursive=True) if os.path.isfile(f))
+        else:
+            found = [i]
+        for f in found:
+            if f not in files:
+                files.append(f)
+    return files
+
+
+def format_summary(results, charts):
+    '''
+    Formats the timings of each file as a table.
+    :param results: the results of render_file.
+    :param charts: the charts that were rendered.
+    :return: the table as a string.
+    '''
+    columns = ['load'] + list(charts) + ['total']
+    width = max([len('file')] + [len(os.path.basename(r['file'])) for r in results])
+    lines = [f"{'file':<{width}}  " + '  '.join(f"{c:>9}" for c in columns) + '  status']
+    for r in results:
+        timings = '  '.join(f"{r['timings'][c]:>7}ms" if c in r['timings'] else f"{'-':>9}" for c in columns)
+        lines.append(f"{os.path.basename(r['file']):<{width}}  {timings}  {r['error'] or 'ok'}")
+    return '\n'.join(lines)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog='pypolarmap-batch',
+                                     description='Renders charts for a set of NFS exports without a display.')
+    parser.add_argument('inputs', nargs='+', help='NFS files, directories of NFS files or globs')
+    parser.add_argument('-o', '--output', default='.', help='the directory the charts are written to')
+    parser.add_argument('-c', '--charts', nargs='+', choices=CHARTS, default=CHARTS, help='the charts to render')
+    parser.add_argument('-f', '--formats', nargs='+', choices=FORMATS, default=['png'], help='the output formats')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='the number of worker processes, defaults to the number of CPUs')
+    parser.add_argument('--width', type=int, default=1200, help='the width of each chart in pixels')
+    parser.add_argument('--height', type=int, default=800, help='the height of each chart in pixels')
+    parser.add_argument('--dpi', type=int, default=100)
+    parser.add_argument('--colour-map', default=DEFAULT_PREFS[DISPLAY_COLOUR_MAP])
+    parser.add_argument('--db-range', type=int, default=DEFAULT_PREFS[DISPLAY_DB_RANGE])
+    parser.add_argument('--smoothing', type=int, default=DEFAULT_PREFS[DISPLAY_SMOOTHING],
+                        help='fractional octave smoothing as the denominator of the fraction, 0 is unsmoothed')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    '''
+    Renders the charts for every file, fanning the files out across a pool of processes, and prints the time taken to
+    render each one.
+    :param argv: the command line arguments.
+    :return: the exit code, non zero if any file could not be rendered.
+    '''
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+    files = find_files(args.inputs)
+    if not files:
+        print(f"No files found in {' '.join(args.inputs)}", file=sys.stderr)
+        return 2
+    os.makedirs(args.output, exist_ok=True)
+    prefs = {DISPLAY_COLOUR_MAP: args.colour_map, DISPLAY_DB_RANGE: args.db_range, DISPLAY_SMOOTHING: args.smoothing}
+    start = time.perf_counter()
+    results = []
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [executor.submit(render_file, f, args.output, args.charts, args.formats, args.width, args.height,
+                                   args.dpi, prefs) for f in files]
+        for future in as_completed(futures):
+            results.append(future.result())
+    results.sort(key=lambda r: files.index(r['file']))
+    print(format_summary(results, args.charts))
+    failed = sum(1 for r in results if r['error'] is not None)
+    print(f"Rendered {len(results) - failed}/{len(results)} files in {elapsed_ms(start)}ms")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,30 @@
+'''
+The numerical core of pypolarmap, i.e. loading, the measurement model, normalisation, smoothing, scale computation and
+the derived metrics. Nothing in this package depends on Qt or matplotlib so it can be used from scripts, e.g.
+
+    from core import load_files, MeasurementModel
+    model = MeasurementModel()
+    model.load(load_files(['nfs.txt']))
+    power = model.get_sound_power()
+
+The names exported here are the stable API, anything else is subject to change.
+'''
+from core.cache import FileCache
+from core.events import EventBus, LatencyHistogram
+from core.impulse import ImpulseLoader, ImpulseResponses
+from core.load import LoadCancelled, NFSLoader, SphereLoader, create_loader, guess_plane, load_files
+from core.measurement import AnalysisOptions, DirectivityMatrix, Measurement, MeasurementModel, SphericalMatrix, \
+    CLEAR_MEASUREMENTS, HORIZONTAL, LOAD_MEASUREMENTS, NORMALISATION_REFERENCES, SMOOTHING_FRACTIONS, VERTICAL, \
+    WINDOW_MAPPING, fractional_octave_smoothing, listening_window, sound_power, spatial_average
+from core.scales import calculate_dBFS_Scales, calculate_fill_levels
+
+__all__ = [
+    'FileCache',
+    'EventBus', 'LatencyHistogram',
+    'ImpulseLoader', 'ImpulseResponses',
+    'LoadCancelled', 'NFSLoader', 'SphereLoader', 'create_loader', 'guess_plane', 'load_files',
+    'AnalysisOptions', 'DirectivityMatrix', 'Measurement', 'MeasurementModel', 'SphericalMatrix',
+    'CLEAR_MEASUREMENTS', 'HORIZONTAL', 'LOAD_MEASUREMENTS', 'NORMALISATION_REFERENCES', 'SMOOTHING_FRACTIONS',
+    'VERTICAL', 'WINDOW_MAPPING', 'fractional_octave_smoothing', 'listening_window', 'sound_power', 'spatial_average',
+    'calculate_dBFS_Scales', 'calculate_fill_levels'
+]
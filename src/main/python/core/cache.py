@@ -0,0 +1,205 @@
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger('cache')
+
+INDEX_FILE = 'index.json'
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+class FileCache:
+    '''
+    A disk cache of parsed measurement files. The parsed data is stored as a memory mappable npy file in the cache
+    directory alongside an index which records the angles, the size and the last access time of each entry. Entries
+    are keyed by a fingerprint of the source file path, size, mtime and content so a changed file is never served
+    from the cache. The total size of the cache is capped with the least recently used entries evicted first.
+    '''
+
+    def __init__(self, cache_dir, max_size_bytes):
+        self.__cache_dir = cache_dir
+        self.__max_size_bytes = max_size_bytes
+        self.__index_file = os.path.join(cache_dir, INDEX_FILE)
+        self.__index = None
+
+    @property
+    def cache_dir(self):
+        return self.__cache_dir
+
+    @property
+    def size(self):
+        ''' :return: the total size of the cached data in bytes. '''
+        return sum(e['size'] for e in self.__get_index().values())
+
+    def __len__(self):
+        return len(self.__get_index())
+
+    @staticmethod
+    def fingerprint(file):
+        '''
+        Computes the cache key for the file.
+        :param file: the file.
+        :return: the key.
+        '''
+        path = os.path.abspath(file)
+        stat = os.stat(path)
+        content = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as fp:
+            for block in iter(lambda: fp.read(HASH_BLOCK_SIZE), b''):
+                content.update(block)
+        key = hashlib.blake2b(digest_size=16)
+        key.update(f"{path}|{stat.st_size}|{stat.st_mtime_ns}|{content.hexdigest()}".encode('utf-8'))
+        return key.hexdigest()
+
+    def get(self, key):
+        '''
+        Gets the cached data.
+        :param key: the fingerprint of the source file.
+        :return: the angles and the memory mapped data or None if there is no such entry.
+        '''
+        entry = self.__get_index().get(key, None)
+        if entry is not None:
+            try:
+                data = np.load(self.__data_file(key), mmap_mode='r')
+            except (OSError, ValueError):
+                logger.exception(f"Unable to read cache entry {key} for {entry['source']}, discarding")
+                self.__remove(key)
+                self.__save_index()
+                return None
+            entry['accessed'] = time.time()
+            self.__save_index()
+            logger.info(f"Cache hit for {entry['source']}")
+            return entry['angles'], data
+        return None
+
+    def put(self, key, file, angles, data):
+        '''
+        Caches the data, any older entries for the same file are replaced.
+        :param key: the fingerprint of the source file.
+        :param file: the source file.
+        :param angles: the angles.
+        :param data: the data.
+        '''
+        if self.__max_size_bytes <= 0 or data.nbytes > self.__max_size_bytes:
+            return
+        os.makedirs(self.__cache_dir, exist_ok=True)
+        source = os.path.abspath(file)
+        index = self.__get_index()
+        for stale in [k for k, v in index.items() if v['source'] == source]:
+            self.__remove(stale)
+        np.save(self.__data_file(key), data)
+        index[key] = {
+            'source': source,
+            'angles': [int(a) for a in angles],
+            'size': os.path.getsize(self.__data_file(key)),
+            'accessed': time.time()
+        }
+        self.__evict()
+        self.__save_index()
+        logger.info(f"Cached {source} as {key}")
+
+    def clear(self):
+        ''' Removes every entry from the cache. '''
+        for key in list(self.__get_index().keys()):
+            self.__remove(key)
+        self.__save_index()
+
+    def __evict(self):
+        ''' Removes the least recently used entries until the cache is within the size limit. '''
+        index = self.__get_index()
+        total = self.size
+        for key in sorted(index.keys(), key=lambda k: index[k]['accessed']):
+            if total <= self.__max_size_bytes:
+                break
+            total -= index[key]['size']
+            logger.info(f"Evicting {index[key]['source']} from cache")
+            self.__remove(key)
+
+    def __remove(self, key):
+        self.__get_index().pop(key, None)
+        try:
+            os.remove(self.__data_file(key))
+        except FileNotFoundError:
+            pass
+        except OSError:
+            # probably still mapped (e.g. on windows) so leave it to be cleaned up later
+            logger.warning(f"Unable to delete cache entry {key}")
+
+    def __data_file(self, key):
+        return os.path.join(self.__cache_dir, f"{key}.npy")
+
+    def __get_index(self):
+        if self.__index is None:
+            self.__index = {}
+            if os.path.exists(self.__index_file):
+                try:
+                    with open(self.__index_file) as fp:
+                        self.__index = json.load(fp)
+                except (OSError, ValueError):
+                    logger.exception(f"Unable to read cache index {self.__index_file}, ignoring")
+        return self.__index
+
+    def __save_index(self):
+        os.makedirs(self.__cache_dir, exist_ok=True)
+        tmp_file = f"{self.__index_file}.tmp"
+        with open(tmp_file, 'w') as fp:
+            json.dump(self.__get_index(), fp)
+        os.replace(tmp_file, self.__index_file)
+
+
+class VersionedCache:
+    '''
+    Memoises values derived from versioned data. Values are keyed by whatever settings they depend on and are discarded
+    as soon as a value for a newer version is requested. If a max number of entries is specified then the least
+    recently used values are discarded once that limit is reached.
+    '''
+
+    def __init__(self, name, max_entries=None):
+        self.__name = name
+        self.__max_entries = max_entries
+        self.__version = None
+        self.__values = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.__values)
+
+    @property
+    def nbytes(self):
+        ''' :return: the size of the cached arrays in bytes. '''
+        return sum(getattr(v, 'nbytes', 0) for v in self.__values.values())
+
+    def get(self, version, key, producer):
+        '''
+        Gets the value for the key, creating it if necessary.
+        :param version: the version of the data the value is derived from.
+        :param key: the key of the value within that version.
+        :param producer: a no arg callable that creates the value.
+        :return: the value.
+        '''
+        if version != self.__version:
+            self.__values = OrderedDict()
+            self.__version = version
+        if key in self.__values:
+            self.hits += 1
+            logger.debug(f"{self.__name} cache hit for {key} at v{version} ({self.hits} hits, {self.misses} misses)")
+            self.__values.move_to_end(key)
+            return self.__values[key]
+        self.misses += 1
+        logger.debug(f"{self.__name} cache miss for {key} at v{version} ({self.hits} hits, {self.misses} misses)")
+        value = producer()
+        self.__values[key] = value
+        if self.__max_entries is not None and len(self.__values) > self.__max_entries:
+            self.__values.popitem(last=False)
+        return value
+
+    def clear(self):
+        ''' Discards all cached values. '''
+        self.__values = OrderedDict()
+        self.__version = None
@@ -0,0 +1,205 @@
+import bisect
+import logging
+import time
+from collections import deque
+
+logger = logging.getLogger('events')
+
+# listeners are dispatched in ascending order of priority
+VISIBLE_PRIORITY = 0
+DEFAULT_PRIORITY = 10
+# the upper bound, in ms, of each latency bucket, the last bucket holds everything slower
+LATENCY_BUCKETS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+# the number of dispatches retained per listener
+LATENCY_HISTORY_SIZE = 256
+
+
+class LatencyHistogram:
+    '''
+    The time taken by a listener to handle its most recent events, grouped into buckets.
+    '''
+
+    def __init__(self, name, bounds=LATENCY_BUCKETS_MS, size=LATENCY_HISTORY_SIZE):
+        '''
+        :param name: the name of the listener.
+        :param bounds: the upper bound of each bucket in ms.
+        :param size: the number of samples retained.
+        '''
+        self.name = name
+        self.bounds = tuple(bounds)
+        self.__samples = deque(maxlen=size)
+        self.total = 0
+
+    def __len__(self):
+        return len(self.__samples)
+
+    def add(self, millis):
+        '''
+        Records a sample, the oldest sample is discarded once the history is full.
+        :param millis: the time taken in ms.
+        '''
+        self.__samples.append(millis)
+        self.total += 1
+
+    @property
+    def counts(self):
+        ''' :return: the number of retained samples in each bucket, the last entry counts those over the last bound. '''
+        counts = [0] * (len(self.bounds) + 1)
+        for s in self.__samples:
+            counts[bisect.bisect_right(self.bounds, s)] += 1
+        return counts
+
+    @property
+    def max(self):
+        return max(self.__samples) if self.__samples else None
+
+    @property
+    def mean(self):
+        return sum(self.__samples) / len(self.__samples) if self.__samples else None
+
+    def percentile(self, pct):
+        '''
+        :param pct: the percentile, 0 to 100.
+        :return: the retained sample at that percentile (by the nearest rank) or None if there are no samples.
+        '''
+        if not self.__samples:
+            return None
+        ordered = sorted(self.__samples)
+        return ordered[min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))]
+
+
+class EventBus:
+    '''
+    Delivers events to listeners. By default each event is delivered as soon as it is posted. If a scheduler is
+    supplied, events are instead queued until the scheduler next runs a flush which means a burst of events, e.g. a
+    load followed by a change of normalisation, are merged into one delivery per listener. A flush delivers to the
+    listeners with the highest priority (i.e. the lowest value) only, the rest are deferred to the next flush so the
+    visible chart is updated before hidden charts do any work. The time taken by each listener is recorded in a
+    LatencyHistogram.
+    '''
+
+    def __init__(self, scheduler=None, priority=None, on_flush=None, resets=()):
+        '''
+        :param scheduler: a callable which runs the supplied no arg callable later (e.g. on the next tick of an event
+        loop), events are delivered immediately if this is None.
+        :param priority: a callable which gives the priority of a listener, DEFAULT_PRIORITY for all if None.
+        :param on_flush: a callable invoked with the priority of the listeners after they have been sent their events.
+        :param resets: the event types which replace all the events pending before them.
+        '''
+        self.__scheduler = scheduler
+        self.__priority = priority
+        self.__on_flush = on_flush
+        self.__resets = set(resets)
+        self.__listeners = []
+        self.__pending = {}
+        self.__scheduled = False
+        self.__latencies = {}
+
+    def __len__(self):
+        return len(self.__listeners)
+
+    @property
+    def listeners(self):
+        return list(self.__listeners)
+
+    @property
+    def pending(self):
+        ''' :return: the number of listeners with undelivered events. '''
+        return len(self.__pending)
+
+    @property
+    def latencies(self):
+        ''' :return: the LatencyHistogram of each listener, in the order in which they were registered. '''
+        return [self.__latencies[id(l)] for l in self.__listeners]
+
+    def register(self, listener):
+        '''
+        Adds a listener, it must provide an on_update method which accepts the event type and the event args.
+        :param listener: the listener.
+        '''
+        self.__listeners.append(listener)
+        self.__latencies[id(listener)] = LatencyHistogram(str(listener))
+
+    def send(self, listener, event_type, **kwargs):
+        '''
+        Delivers an event to a single listener immediately.
+        :param listener: the listener.
+        :param event_type: the event type.
+        :param kwargs: the event args.
+        '''
+        start = time.perf_counter()
+        listener.on_update(event_type, **kwargs)
+        elapsed = (time.perf_counter() - start) * 1000
+        self.__latencies[id(listener)].add(elapsed)
+        logger.debug(f"Propagated event: {event_type} to {listener} in {round(elapsed)}ms")
+
+    def post(self, event_type, **kwargs):
+        '''
+        Sends an event to every listener. Pending events which are identical to this one are dropped as this one
+        supersedes them, as are all pending events if this is a reset.
+        :param event_type: the event type.
+        :param kwargs: the event args.
+        '''
+        if self.__scheduler is None:
+            for listener in self.__by_priority(self.__listeners):
+                self.send(listener, event_type, **kwargs)
+            return
+        event = (event_type, kwargs)
+        for listener in self.__listeners:
+            events = self.__pending.setdefault(id(listener), (listener, []))[1]
+            if event_type in self.__resets:
+                events.clear()
+            elif event in events:
+                events.remove(event)
+            events.append(event)
+        self.__schedule()
+
+    def flush(self, complete=False):
+        '''
+        Delivers the pending events to the listeners with the highest priority, a further flush is scheduled if any
+        listeners are left.
+        :param complete: if true, delivers to every listener in order of priority.
+        '''
+        self.__scheduled = False
+        while self.__pending:
+            priorities = {id(l): self.__get_priority(l) for l, _ in self.__pending.values()}
+            priority = min(priorities.values())
+            ready = [k for k, p in priorities.items() if p == priority]
+            for k in ready:
+                listener, events = self.__pending.pop(k)
+                for event_type, kwargs in events:
+                    self.send(listener, event_type, **kwargs)
+            if self.__on_flush is not None:
+                self.__on_flush(priority)
+            if not complete:
+                break
+        if self.__pending:
+            self.__schedule()
+
+    def __schedule(self):
+        if not self.__scheduled:
+            self.__scheduled = True
+            self.__scheduler(self.flush)
+
+    def __get_priority(self, listener):
+        return DEFAULT_PRIORITY if self.__priority is None else self.__priority(listener)
+
+    def __by_priority(self, listeners):
+        return sorted(listeners, key=self.__get_priority) if self.__priority is not None else listeners
+
+    def format_latencies(self):
+        '''
+        Formats the latency of each listener as a table.
+        :return: the table as a string.
+        '''
+        histograms = self.latencies
+        width = max([len('listener')] + [len(h.name) for h in histograms])
+        bounds = LATENCY_BUCKETS_MS if not histograms else histograms[0].bounds
+        columns = [f"<{b}" for b in bounds] + [f">={bounds[-1]}"]
+        lines = [f"{'listener':<{width}}  {'events':>6}  {'mean':>7}  {'p95':>7}  {'max':>7}  "
+                 + ' '.join(f"{c:>6}" for c in columns)]
+        for h in histograms:
+            stats = '  '.join(f"{v:>5.1f}ms" if v is not None else f"{'-':>7}"
+                              for v in (h.mean, h.percentile(95), h.max))
+            lines.append(f"{h.name:<{width}}  {h.total:>6}  {stats}  " + ' '.join(f"{c:>6}" for c in h.counts))
+        return '\n'.join(lines)
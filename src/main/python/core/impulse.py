@@ -0,0 +1,219 @@
+import logging
+import os
+import re
+import threading
+
+import numpy as np
+
+from core.cache import VersionedCache
+from core.load import LoadCancelled, mirror
+from core.measurement import DirectivityMatrix, WINDOW_MAPPING, HORIZONTAL
+
+logger = logging.getLogger('impulse')
+
+# the number in a file name which is taken to be the angle, the last one wins, e.g. ir_-30deg.wav
+ANGLE = re.compile(r'[+-]?\d+(?:\.\d+)?')
+ON_AXIS = re.compile(r'on[\s_-]?axis', re.IGNORECASE)
+# the time retained before the earliest peak when the impulses are aligned
+PRE_PEAK_MS = 2.0
+# the default time gated before and after the peak
+DEFAULT_LEFT_MS = 0.5
+DEFAULT_WINDOW = 'Tukey'
+DEFAULT_GATE_MS = 10.0
+# the min number of points in the FFT, short gates are zero padded up to this
+MIN_FFT_LENGTH = 1024
+# the number of gated data sets which are retained
+GATE_CACHE_SIZE = 8
+
+
+class ImpulseResponses:
+    '''
+    A set of impulse responses, one per angle, held as a single angles x samples array. The impulses are aligned to a
+    shared start, a little before the earliest peak, so the relative delay between angles is retained. The responses
+    are converted to the frequency domain by applying the same gate to every angle and transforming the whole array in
+    one go, each gating is cached so switching between gates is instant after the first time.
+    '''
+
+    def __init__(self, name, angles, fs, samples, plane=HORIZONTAL):
+        '''
+        :param name: the name of the measurements.
+        :param angles: the angle of each impulse.
+        :param fs: the sample rate.
+        :param samples: the impulses as an angles x samples array.
+        :param plane: the plane the impulses were measured in.
+        '''
+        samples = np.asarray(samples, dtype=np.float64)
+        if samples.ndim != 2 or samples.shape[0] != len(angles):
+            raise ValueError(f"Expected {len(angles)} impulses but was {samples.shape}")
+        self.__name = name
+        self.__angles = np.asarray(angles)
+        self.__fs = fs
+        self.__plane = plane
+        peaks = np.argmax(np.abs(samples), axis=1)
+        start = max(0, int(peaks.min()) - int(round(PRE_PEAK_MS * fs / 1000)))
+        self.__samples = np.ascontiguousarray(samples[:, start:])
+        self.__samples.setflags(write=False)
+        self.__peak = int(peaks.min()) - start
+        self.__cache = VersionedCache('gating', max_entries=GATE_CACHE_SIZE)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}: {self.__name} {self.__samples.shape} @ {self.__fs}Hz"
+
+    def __len__(self):
+        return self.__angles.size
+
+    @property
+    def name(self):
+        return self.__name
+
+    @property
+    def angles(self):
+        return self.__angles
+
+    @property
+    def fs(self):
+        return self.__fs
+
+    @property
+    def samples(self):
+        ''' :return: the aligned impulses as an angles x samples array. '''
+        return self.__samples
+
+    @property
+    def peak(self):
+        ''' :return: the index of the earliest peak in the aligned impulses. '''
+        return self.__peak
+
+    def gate(self, window=DEFAULT_WINDOW, length_ms=DEFAULT_GATE_MS, left_ms=DEFAULT_LEFT_MS, phase=False):
+        '''
+        Gates every impulse and converts it to the frequency domain.
+        :param window: the name of the window, a key in WINDOW_MAPPING.
+        :param length_ms: the time after the peak which is retained.
+        :param left_ms: the time before the peak which is retained.
+        :param phase: if true, the phase is returned alongside the magnitude.
+        :return: the magnitude as a DirectivityMatrix or, if phase is set, magnitude and phase in degrees.
+        '''
+        if window not in WINDOW_MAPPING:
+            raise ValueError(f"Unknown window {window}, expected one of {list(WINDOW_MAPPING.keys())}")
+        key = (window, float(length_ms), float(left_ms))
+        magnitude, phases = self.__cache.get(0, key, lambda: self.__transform(*key))
+        return (magnitude, phases) if phase else magnitude
+
+    def __transform(self, window, length_ms, left_ms):
+        left = min(self.__peak, int(round(left_ms * self.__fs / 1000)))
+        right = max(1, min(self.__samples.shape[1] - self.__peak, int(round(length_ms * self.__fs / 1000))))
+        gated = self.__samples[:, self.__peak - left:self.__peak + right] * gate_window(window, left, right)
+        n_fft = max(MIN_FFT_LENGTH, 1 << (gated.shape[1] - 1).bit_length())
+        # drop DC as it cannot be shown on a log frequency axis
+        spectrum = np.fft.rfft(gated, n=n_fft, axis=1)[:, 1:]
+        freqs = np.fft.rfftfreq(n_fft, d=1.0 / self.__fs)[1:]
+        logger.debug(f"Gated {self.__name} with {window} {left}/{right} samples, {n_fft} point FFT")
+        rows, angles = mirror(self.__angles)
+        spl = 20.0 * np.log10(np.maximum(np.abs(spectrum), np.finfo(np.float64).tiny))
+        magnitude = DirectivityMatrix(self.__name, angles, freqs, spl[rows], plane=self.__plane)
+        phases = DirectivityMatrix(self.__name, angles, freqs, np.degrees(np.angle(spectrum))[rows], plane=self.__plane)
+        return magnitude, phases
+
+
+def gate_window(window, left, right):
+    '''
+    Creates an asymmetric gate from a window, the rising half of the window covers the samples before the peak and the
+    falling half covers the samples from the peak onwards.
+    :param window: the name of the window.
+    :param left: the number of samples before the peak.
+    :param right: the number of samples from the peak onwards.
+    :return: the gate.
+    '''
+    func = WINDOW_MAPPING[window]
+    # an odd length window is 1 at its centre so the peak is passed through unchanged
+    return np.concatenate((func(left * 2 + 1)[:left], func(right * 2 + 1)[right:-1]))
+
+
+def angle_from_name(file):
+    '''
+    Finds the angle an impulse was measured at from its file name, i.e. the last number in the name or 0 if the name
+    mentions on axis.
+    :param file: the file.
+    :return: the angle.
+    '''
+    name = os.path.splitext(os.path.basename(file))[0]
+    if ON_AXIS.search(name):
+        return 0
+    matches = ANGLE.findall(name)
+    if not matches:
+        raise ValueError(f"Unable to find the angle in {file}")
+    angle = float(matches[-1])
+    return int(angle) if angle.is_integer() else angle
+
+
+class ImpulseLoader:
+    '''
+    A loader that loads a set of impulse responses, one file per angle, from WAV or text files. Text files contain
+    either a single column of samples, in which case the sample rate must be supplied, or time and sample columns.
+    '''
+
+    def __init__(self, files, fs=None, progress_listener=None, plane=HORIZONTAL):
+        '''
+        :param files: the files to load.
+        :param fs: the sample rate of any text files which only contain samples.
+        :param progress_listener: an optional callable which is passed the percentage of the files loaded so far.
+        :param plane: the plane the impulses were measured in.
+        '''
+        self.__files = files
+        self.__fs = fs
+        self.__progress_listener = progress_listener
+        self.__plane = plane
+        self.__cancelled = threading.Event()
+
+    @property
+    def file(self):
+        return ', '.join(self.__files)
+
+    def cancel(self):
+        '''
+        Requests that an in progress load stops, the load raises LoadCancelled when it sees the request.
+        '''
+        self.__cancelled.set()
+
+    def load(self):
+        '''
+        :return: the impulses as ImpulseResponses.
+        '''
+        impulses = []
+        rates = set()
+        for idx, file in enumerate(self.__files):
+            if self.__cancelled.is_set():
+                raise LoadCancelled(file)
+            fs, samples = self.read(file)
+            rates.add(fs)
+            impulses.append((angle_from_name(file), samples))
+            if self.__progress_listener is not None:
+                self.__progress_listener(int((idx + 1) * 100 / len(self.__files)))
+        if len(rates) != 1:
+            raise ValueError(f"Impulses must share a sample rate but found {sorted(rates)}")
+        impulses.sort(key=lambda i: i[0])
+        samples = np.zeros((len(impulses), max(i[1].size for i in impulses)), dtype=np.float64)
+        for row, (_, ir) in enumerate(impulses):
+            samples[row, :ir.size] = ir
+        return ImpulseResponses('IR', [i[0] for i in impulses], rates.pop(), samples, plane=self.__plane)
+
+    def read(self, file):
+        '''
+        Reads a single impulse.
+        :param file: the file.
+        :return: the sample rate and the samples.
+        '''
+        if file.lower().endswith('.wav'):
+            from scipy.io import wavfile
+            fs, data = wavfile.read(file)
+            if data.ndim > 1:
+                data = data[:, 0]
+            if np.issubdtype(data.dtype, np.integer):
+                return fs, data.astype(np.float64) / np.iinfo(data.dtype).max
+            return fs, data.astype(np.float64)
+        data = np.loadtxt(file, comments=('#', '*'), ndmin=2)
+        if data.shape[1] > 1:
+            return int(round(1.0 / np.median(np.diff(data[:, 0])))), data[:, 1]
+        if self.__fs is None:
+            raise ValueError(f"{file} has no time column so the sample rate must be supplied")
+        return self.__fs, data[:, 0]
@@ -0,0 +1,295 @@
+import logging
+import os
+import re
+import threading
+from itertools import islice
+from re import sub
+
+import numpy as np
+
+from core.measurement import DirectivityMatrix, SphericalMatrix, HORIZONTAL, VERTICAL
+
+logger = logging.getLogger('loader')
+
+# characters stripped from each value before it is parsed, i.e. quotes and thousands separators
+IGNORED_CHARS = str.maketrans('', '', '",')
+# number of lines of data parsed in one go
+CHUNK_SIZE = 4096
+INITIAL_CAPACITY = 8192
+# identifies the plane of an export from its file name, e.g. nfs_phi30.txt or nfs_vertical.txt
+EXPLICIT_PLANE = re.compile(r'(?:phi|plane)[\s_=-]*(\d+)', re.IGNORECASE)
+VERTICAL_PLANE = re.compile(r'vert', re.IGNORECASE)
+
+
+class LoadCancelled(Exception):
+    '''
+    Raised when a load is cancelled before it completes.
+    '''
+    pass
+
+
+class NFSLoader:
+    '''
+    A loader that loads single Klippel Near Field Scanner directivity file.
+    '''
+
+    def __init__(self, file, cache=None, progress_listener=None, plane=HORIZONTAL):
+        '''
+        :param file: the file to load.
+        :param cache: an optional FileCache used to avoid reparsing files which have been loaded before.
+        :param progress_listener: an optional callable which is passed the percentage of the file loaded so far.
+        :param plane: the plane the file was measured in.
+        '''
+        self.__file = file
+        self.__plane = plane
+        self.__cache = cache
+        self.__progress_listener = progress_listener
+        self.__cancelled = threading.Event()
+
+    @property
+    def file(self):
+        return self.__file
+
+    def cancel(self):
+        '''
+        Requests that an in progress load stops, the load raises LoadCancelled when it sees the request.
+        '''
+        self.__cancelled.set()
+
+    def __check_cancelled(self):
+        if self.__cancelled.is_set():
+            raise LoadCancelled(self.__file)
+
+    def __report_progress(self, pct):
+        if self.__progress_listener is not None:
+            self.__progress_listener(min(100, int(pct)))
+
+    def load(self):
+        '''
+        :return: the loaded measurements as a DirectivityMatrix.
+        '''
+        angles, data = self.__load_cached() if self.__cache is not None else self.parse()
+        self.__check_cancelled()
+        self.__report_progress(100)
+        return self.to_matrix(angles, data, plane=self.__plane)
+
+    def __load_cached(self):
+        '''
+        Loads the data from the cache if the file has been loaded before, parsing and caching it otherwise.
+        :return: the angles and the data.
+        '''
+        try:
+            key = self.__cache.fingerprint(self.__file)
+            cached = self.__cache.get(key)
+        except OSError:
+            logger.exception(f"Unable to read {self.__file} from cache")
+            return self.parse()
+        if cached is not None:
+            return cached
+        angles, data = self.parse()
+        try:
+            self.__cache.put(key, self.__file, angles, data)
+        except OSError:
+            logger.exception(f"Unable to cache {self.__file}")
+        return angles, data
+
+    def parse(self):
+        '''
+        Reads the header and the numeric data in a single pass over the file.
+        :return: the angles and the data as a 2D array with one row per column in the file.
+        '''
+        self.__check_cancelled()
+        file_size = max(1, os.path.getsize(self.__file))
+        with open(self.__file) as fp:
+            angles = self.__read_angles(fp)
+            if not angles:
+                raise ValueError(self.__file + ' is not an NFS export file, no angles found')
+            data = self.__read_data(fp, len(angles) * 2, file_size)
+        logger.debug(f"Loaded {data.shape[1]} rows for {len(angles)} angles from {self.__file}")
+        return angles, data
+
+    @staticmethod
+    def __read_angles(fp):
+        '''
+        Consumes lines until the On-Axis header is found.
+        :param fp: the file.
+        :return: the angles found in the header, empty if there is no header.
+        '''
+        angles = []
+        for line in fp:
+            if line.startswith('On-Axis') or line.startswith('"On-Axis"'):
+                for txt in line.strip().split('\t'):
+                    if 'On-Axis' in txt:
+                        angles.append(0)
+                    else:
+                        txt = sub(r"[^0-9\-]", "", txt)
+                        if txt:
+                            angles.append(int(txt))
+                break
+        return angles
+
+    def __read_data(self, fp, min_cols, file_size):
+        '''
+        Parses the numeric data that follows the header, any text rows between the header and the data are skipped.
+        Values are parsed in chunks of lines directly into a preallocated buffer which is grown (and finally trimmed)
+        in place.
+        :param fp: the file, positioned after the header.
+        :param min_cols: the minimum number of columns expected.
+        :param file_size: the size of the file in bytes, used to report progress.
+        :return: the data as a 2D array with one row per column in the file.
+        '''
+        first_row = self.__find_first_row(fp)
+        if first_row is None:
+            raise ValueError(f"{self.__file} contains no data")
+        cols = len(first_row)
+        if cols < min_cols:
+            raise ValueError(f"{self.__file} has {cols} columns, expected at least {min_cols}")
+        buffer = np.empty((INITIAL_CAPACITY, cols), dtype=np.float64)
+        buffer[0] = first_row
+        rows = 1
+        consumed = 0
+        while True:
+            self.__check_cancelled()
+            lines = [l for l in islice(fp, CHUNK_SIZE) if not l.isspace()]
+            if not lines:
+                break
+            chunk = ''.join(lines)
+            consumed += len(chunk)
+            values = np.array(chunk.translate(IGNORED_CHARS).split(), dtype=np.float64)
+            if values.size != len(lines) * cols:
+                raise ValueError(f"{self.__file} has rows which do not contain {cols} values near row {rows}")
+            capacity = buffer.shape[0]
+            while capacity < rows + len(lines):
+                capacity *= 2
+            if capacity != buffer.shape[0]:
+                buffer.resize((capacity, cols), refcheck=False)
+            buffer[rows:rows + len(lines)] = values.reshape(len(lines), cols)
+            rows += len(lines)
+            self.__report_progress(consumed * 100 / file_size)
+        buffer.resize((rows, cols), refcheck=False)
+        return buffer.T
+
+    @staticmethod
+    def __find_first_row(fp):
+        '''
+        Finds the first numeric row.
+        :param fp: the file.
+        :return: the values in the row as floats, None if there is no such row.
+        '''
+        for line in fp:
+            try:
+                values = [float(v) for v in line.translate(IGNORED_CHARS).split()]
+            except ValueError:
+                continue
+            if values:
+                return values
+        return None
+
+    @staticmethod
+    def to_matrix(angles, data, plane=HORIZONTAL):
+        '''
+        Converts the parsed columns into a matrix. If only one side has been measured (i.e. the angles start at 0) then
+        the measurements are mirrored to provide the other side.
+        :param angles: the angles.
+        :param data: the data as a 2D array of (freq, spl) column pairs, one pair per angle.
+        :param plane: the plane the data was measured in.
+        :return: the matrix.
+        '''
+        freqs = data[0]
+        freq_cols = data[0:len(angles) * 2:2]
+        spl = data[1:len(angles) * 2:2]
+        if not np.array_equal(freq_cols, np.broadcast_to(freqs, freq_cols.shape)):
+            spl = np.array([np.interp(freqs, f, s) for f, s in zip(freq_cols, spl)])
+        rows, angles = mirror(angles)
+        return DirectivityMatrix('NFS', angles, freqs, spl[rows], plane=plane)
+
+
+def mirror(angles):
+    '''
+    Mirrors a set of measurements which only cover one side, i.e. the angles start at 0, to provide the other side.
+    :param angles: the angles.
+    :return: the index of the measurement to use for each angle, the angles.
+    '''
+    angles = np.array(angles)
+    rows = np.arange(angles.size)
+    if angles.min() == 0:
+        mirrored = rows[angles != 0]
+        rows = np.concatenate((mirrored, rows))
+        angles = np.concatenate((-angles[mirrored], angles))
+    return rows, angles
+
+
+class SphereLoader:
+    '''
+    A loader that loads a set of Klippel Near Field Scanner directivity files, one per plane, into a SphericalMatrix.
+    '''
+
+    def __init__(self, files, cache=None, progress_listener=None):
+        '''
+        :param files: the files to load as a list of (plane, file).
+        :param cache: an optional FileCache used to avoid reparsing files which have been loaded before.
+        :param progress_listener: an optional callable which is passed the percentage of the files loaded so far.
+        '''
+        self.__progress_listener = progress_listener
+        self.__loaders = [NFSLoader(file, cache=cache, plane=plane,
+                                    progress_listener=lambda pct, idx=idx: self.__report_progress(idx, pct))
+                          for idx, (plane, file) in enumerate(files)]
+
+    @property
+    def file(self):
+        return ', '.join(l.file for l in self.__loaders)
+
+    def cancel(self):
+        '''
+        Requests that an in progress load stops, the load raises LoadCancelled when it sees the request.
+        '''
+        for l in self.__loaders:
+            l.cancel()
+
+    def __report_progress(self, idx, pct):
+        if self.__progress_listener is not None:
+            self.__progress_listener(int((idx * 100 + pct) / len(self.__loaders)))
+
+    def load(self):
+        '''
+        :return: the loaded measurements as a SphericalMatrix.
+        '''
+        return SphericalMatrix.from_planes([l.load() for l in self.__loaders])
+
+
+def guess_plane(file):
+    '''
+    Guesses the plane an export was measured in from its file name, an explicit plane (e.g. phi30) is used if present
+    otherwise a name which mentions vertical is taken to be VERTICAL and anything else to be HORIZONTAL.
+    :param file: the file.
+    :return: the plane.
+    '''
+    name = os.path.basename(file)
+    match = EXPLICIT_PLANE.search(name)
+    if match:
+        return int(match.group(1))
+    return VERTICAL if VERTICAL_PLANE.search(name) else HORIZONTAL
+
+
+def create_loader(files, cache=None, progress_listener=None):
+    '''
+    Creates the loader for a set of NFS exports, a single file is loaded as a single plane while several files are
+    loaded as a sphere. The plane of each file is guessed from its name.
+    :param files: the files.
+    :param cache: an optional FileCache used to avoid reparsing files which have been loaded before.
+    :param progress_listener: an optional callable which is passed the percentage of the files loaded so far.
+    :return: the loader.
+    '''
+    if len(files) == 1:
+        return NFSLoader(files[0], cache=cache, progress_listener=progress_listener, plane=guess_plane(files[0]))
+    return SphereLoader([(guess_plane(f), f) for f in files], cache=cache, progress_listener=progress_listener)
+
+
+def load_files(files, cache=None):
+    '''
+    Loads a set of NFS exports.
+    :param files: the files.
+    :param cache: an optional FileCache used to avoid reparsing files which have been loaded before.
+    :return: the measurements, a DirectivityMatrix for a single file or a SphericalMatrix for several files.
+    '''
+    return create_loader(files, cache=cache).load()
@@ -0,0 +1,966 @@
+import logging
+import math
+from collections.abc import Sequence
+
+import numpy as np
+
+from core.cache import VersionedCache
+from core.events import EventBus
+
+
+def _window(name):
+    '''
+    Creates a function which delegates to the named window in scipy.signal.windows, scipy.signal is slow to import so
+    it is only imported when a window is first used.
+    :param name: the name of the window function.
+    :return: the function.
+    '''
+
+    def window(*args, **kwargs):
+        from scipy.signal import windows
+        return getattr(windows, name)(*args, **kwargs)
+
+    window.__name__ = name
+    return window
+
+
+WINDOW_MAPPING = {
+    'Hann': _window('hann'),
+    'Hamming': _window('hamming'),
+    'Blackman-Harris': _window('blackmanharris'),
+    'Nuttall': _window('nuttall'),
+    'Tukey': _window('tukey'),
+    'Rectangle': _window('boxcar')
+}
+
+REAL_WORLD_DATA = 'REALWORLD'
+
+LISTENING_WINDOW = 'Listening Window'
+SOUND_POWER = 'Sound Power'
+DIRECTIVITY_INDEX = 'DI'
+# the number of normalised data sets which are retained
+NORMALISATION_CACHE_SIZE = 8
+# the measurement planes, as the rotation of the plane about the on axis
+HORIZONTAL = 0
+VERTICAL = 90
+# the available fractional octave smoothing widths, as the denominator of the fraction where 0 means no smoothing
+SMOOTHING_FRACTIONS = [0, 48, 24, 12, 6, 3]
+# the max number of elements smoothed at once, bounds the size of the temporary arrays
+SMOOTHING_CHUNK_SIZE = 4 * 1024 * 1024
+
+# events that listeners have to handle
+LOAD_MEASUREMENTS = 'LOAD'
+CLEAR_MEASUREMENTS = 'CLEAR'
+
+logger = logging.getLogger('measurement')
+
+
+class AnalysisOptions:
+    '''
+    The options, normally owned by the DisplayModel, which control how the measurements are analysed. This allows the
+    measurement model to be used without the UI.
+    '''
+
+    def __init__(self, normalised=False, normalisation_angle=0, smoothing=0):
+        '''
+        :param normalised: if true, the measurements are normalised to the normalisation angle.
+        :param normalisation_angle: the angle, or a key in NORMALISATION_REFERENCES, to normalise to.
+        :param smoothing: the fractional octave smoothing as the denominator of the fraction, 0 if unsmoothed.
+        '''
+        self.normalised = normalised
+        self.normalisation_angle = normalisation_angle
+        self.smoothing = smoothing
+
+
+def create_event_bus(scheduler=None, priority=None, on_flush=None):
+    '''
+    Creates an EventBus for a MeasurementModel, a clear replaces any events which are pending.
+    :param scheduler: runs the supplied no arg callable later, events are delivered immediately if None.
+    :param priority: gives the priority of a listener.
+    :param on_flush: invoked with the priority of the listeners once they have been sent their events.
+    :return: the event bus.
+    '''
+    return EventBus(scheduler=scheduler, priority=priority, on_flush=on_flush, resets=(CLEAR_MEASUREMENTS,))
+
+
+class MeasurementModel(Sequence):
+    '''
+    Models a related collection of measurements
+    Propagates events to listeners when the model changes
+    Allows assorted analysis to be performed against those measurements.
+    The measurements are held as a SphericalMatrix, which may contain a single plane, and the model exposes the
+    currently selected plane to the charts.
+    '''
+
+    def __init__(self, display_model=None, m=None, listeners=None, event_bus=None):
+        '''
+        :param display_model: supplies the analysis options, typically the DisplayModel, defaults to AnalysisOptions.
+        :param m: the measurements, if any.
+        :param listeners: the listeners to notify of changes.
+        :param event_bus: delivers events to the listeners, defaults to an EventBus which delivers them immediately.
+        '''
+        self.__sphere = None
+        self.__plane = HORIZONTAL
+        self.__matrix = None
+        self.__event_bus = event_bus if event_bus is not None else create_event_bus()
+        for l in (listeners if listeners is not None else []):
+            self.__event_bus.register(l)
+        self.__display_model = display_model if display_model is not None else AnalysisOptions()
+        self.__display_model.measurementModel = self
+        self.__version = 0
+        self.__data_version = 0
+        self.__cache = VersionedCache('measurement')
+        self.__analysis_cache = VersionedCache('analysis')
+        self.__normalised_cache = VersionedCache('normalisation', max_entries=NORMALISATION_CACHE_SIZE)
+        self.__smoothed_cache = VersionedCache('smoothing', max_entries=len(SMOOTHING_FRACTIONS))
+        self.table = None
+        super().__init__()
+
+    def __getitem__(self, i):
+        if self.__matrix is None:
+            raise IndexError(i)
+        return self.__matrix[i]
+
+    def __len__(self):
+        return 0 if self.__matrix is None else len(self.__matrix)
+
+    @property
+    def matrix(self):
+        '''
+        :return: the measurements in the selected plane as a DirectivityMatrix, None if nothing is loaded.
+        '''
+        return self.__matrix
+
+    @property
+    def sphere(self):
+        '''
+        :return: the loaded measurements as a SphericalMatrix, None if nothing is loaded.
+        '''
+        return self.__sphere
+
+    @property
+    def planes(self):
+        '''
+        :return: the planes which have been loaded.
+        '''
+        return [] if self.__sphere is None else self.__sphere.planes.tolist()
+
+    @property
+    def plane(self):
+        '''
+        :return: the selected plane.
+        '''
+        return self.__plane
+
+    @property
+    def version(self):
+        '''
+        :return: a counter which changes whenever the data derived from this model changes.
+        '''
+        return self.__version
+
+    @property
+    def data_version(self):
+        '''
+        :return: a counter which changes whenever the underlying measurements change, i.e. unlike version it does not
+        change when the normalisation or the selected plane changes.
+        '''
+        return self.__data_version
+
+    @property
+    def power_response(self):
+        '''
+        :return: the sound power, normalised if required, or None if nothing is loaded.
+        '''
+        return self.__get_cached('power', self.__create_power_response)
+
+    @property
+    def di(self):
+        '''
+        :return: the on axis directivity index or None if there is no on axis measurement.
+        '''
+        return self.__analysis_cache.get(self.__data_version, ('on_axis_di', self.__plane, self.__smoothing),
+                                         self.__create_on_axis_di)
+
+    def get_di_data(self):
+        '''
+        Gets the directivity index of every measurement, this is unaffected by normalisation.
+        :return: the DI as a DirectivityMatrix or None if nothing is loaded.
+        '''
+        return self.__analysis_cache.get(self.__data_version, ('di', self.__plane, self.__smoothing),
+                                         self.__create_di_data)
+
+    def get_sound_power(self):
+        '''
+        Gets the sound power calculated from every loaded plane, this is unaffected by normalisation.
+        :return: the sound power SPL or None if nothing is loaded.
+        '''
+        return self.__analysis_cache.get(self.__data_version, ('power', self.__smoothing), self.__create_sound_power)
+
+    @property
+    def __smoothing(self):
+        return self.__display_model.smoothing
+
+    def __create_sound_power(self):
+        sphere = self.__get_smoothed_sphere(self.__smoothing)
+        return None if sphere is None else _read_only(sound_power(sphere))
+
+    def __create_power_response(self):
+        data = self.get_directivity_data()
+        if data is None:
+            return None
+        # normalisation subtracts the same reference from every measurement so the power is shifted by it too
+        reference = self.get_smoothed_data(self.__smoothing).spl[0] - data.spl[0]
+        return ComputedMeasurement(SOUND_POWER, data.freqs, _read_only(self.get_sound_power() - reference))
+
+    def __create_di_data(self):
+        matrix = self.get_smoothed_data(self.__smoothing)
+        if matrix is None:
+            return None
+        return DirectivityMatrix(DIRECTIVITY_INDEX, matrix.angles, matrix.freqs, matrix.spl - self.get_sound_power(),
+                                 v=matrix.v, plane=matrix.plane)
+
+    def __create_on_axis_di(self):
+        di = self.get_di_data()
+        idx = None if di is None else di.index_of(0)
+        if idx is None:
+            return None
+        return ComputedMeasurement(DIRECTIVITY_INDEX, di.freqs, di.spl[idx])
+
+    def register_listener(self, listener):
+        '''
+        Registers a listener for changes to measurements. Must provide onMeasurementUpdate methods that take no args and
+        an idx as well as a clear method. A listener which registers after measurements have been loaded is sent a
+        single LOAD_MEASUREMENTS so it starts from the current data, however many changes it missed.
+        :param listener: the listener.
+        '''
+        self.__event_bus.register(listener)
+        if self.__matrix is not None:
+            self.__event_bus.send(listener, LOAD_MEASUREMENTS)
+
+    @property
+    def event_bus(self):
+        ''' :return: the EventBus which delivers events to the listeners, along with their latency. '''
+        return self.__event_bus
+
+    def __propagate_event(self, event_type, **kwargs):
+        '''
+        propagates the specified event to all listeners.
+        :param event_type: the event type.
+        :param kwargs: the event args.
+        '''
+        self.__event_bus.post(event_type, **kwargs)
+
+    def load(self, measurements):
+        '''
+        Loads measurements, the selected plane is retained if it is present in the new measurements.
+        :param measurements: the measurements, either a SphericalMatrix, a DirectivityMatrix or a list of Measurement.
+        '''
+        if self.table is not None:
+            self.table.beginResetModel()
+        if len(self) > 0:
+            self.clear(reset=False)
+        self.__version += 1
+        self.__data_version += 1
+        if len(measurements) == 0:
+            self.__sphere = None
+        elif isinstance(measurements, SphericalMatrix):
+            self.__sphere = measurements
+        elif isinstance(measurements, DirectivityMatrix):
+            self.__sphere = SphericalMatrix.from_planes([measurements])
+        else:
+            self.__sphere = SphericalMatrix.from_planes([DirectivityMatrix.from_measurements(measurements)])
+        if self.__sphere is None:
+            self.__matrix = None
+        else:
+            if self.__sphere.plane_index_of(self.__plane) is None:
+                self.__plane = self.__sphere.planes[0].item()
+            self.__matrix = self.__sphere.plane(self.__plane)
+        if self.table is not None:
+            self.table.endResetModel()
+        if len(self) > 0:
+            self.__propagate_event(LOAD_MEASUREMENTS)
+        else:
+            self.__propagate_event(CLEAR_MEASUREMENTS)
+
+    def clear(self, reset=True):
+        '''
+        Clears the loaded measurements.
+        '''
+        if self.table is not None and reset:
+            self.table.beginResetModel()
+        self.__sphere = None
+        self.__matrix = None
+        self.__version += 1
+        self.__data_version += 1
+        self.__cache.clear()
+        self.__normalised_cache.clear()
+        self.__smoothed_cache.clear()
+        self.__analysis_cache.clear()
+        if self.table is not None and reset:
+            self.table.endResetModel()
+        self.__propagate_event(CLEAR_MEASUREMENTS)
+
+    def normalisation_changed(self):
+        '''
+        flags that the normalisation selection has changed.
+        :param normalised: true if normalised.
+        :param angle: the angle to normalise to.
+        '''
+        self.__version += 1
+        self.__propagate_event(LOAD_MEASUREMENTS)
+
+    def smoothing_changed(self):
+        '''
+        flags that the smoothing selection has changed.
+        '''
+        self.__version += 1
+        self.__propagate_event(LOAD_MEASUREMENTS)
+
+    def select_plane(self, plane):
+        '''
+        Selects the plane which is exposed to the charts.
+        :param plane: the rotation of the plane.
+        '''
+        if self.__sphere is None or self.__sphere.plane_index_of(plane) is None:
+            raise ValueError(f"No such plane {plane}, available planes are {self.planes}")
+        if self.table is not None:
+            self.table.beginResetModel()
+        self.__plane = self.__sphere.planes[self.__sphere.plane_index_of(plane)].item()
+        self.__matrix = self.__sphere.plane(self.__plane)
+        self.__version += 1
+        if self.table is not None:
+            self.table.endResetModel()
+        self.__propagate_event(LOAD_MEASUREMENTS)
+
+    def __get_cached(self, name, producer):
+        '''
+        Gets a value derived from the current data and normalisation settings, creating it if necessary.
+        :param name: the name of the value.
+        :param producer: a no arg callable which creates the value.
+        :return: the value.
+        '''
+        key = (name, self.__plane, self.__display_model.normalised, str(self.__display_model.normalisation_angle),
+               self.__smoothing)
+        return self.__cache.get(self.__version, key, producer)
+
+    def get_magnitude_data(self):
+        '''
+        Gets the magnitude data of the specified type from the model.
+        :return: the data (if any)
+        '''
+        return self.__get_cached('magnitude', lambda: list(self.get_directivity_data() or []))
+
+    def get_directivity_data(self):
+        '''
+        Gets the magnitude data as a DirectivityMatrix, normalised if required.
+        :return: the data (if any)
+        '''
+        return self.__get_cached('directivity', self.__create_directivity_data)
+
+    def __create_directivity_data(self):
+        if self.__matrix is not None and self.__display_model.normalised:
+            return self.get_normalised_data(self.__display_model.normalisation_angle)
+        return self.get_smoothed_data(self.__smoothing)
+
+    def get_smoothed_data(self, fraction):
+        '''
+        Gets the data smoothed to the given fraction of an octave, the smoothed data for each width is retained so
+        switching between them does not require any recalculation.
+        :param fraction: the denominator of the fraction, e.g. 12 for 1/12 octave, 0 for no smoothing.
+        :return: the smoothed data.
+        '''
+        if self.__matrix is None or not fraction:
+            return self.__matrix
+        return self.__get_smoothed_sphere(fraction).plane(self.__plane)
+
+    def __get_smoothed_sphere(self, fraction):
+        if self.__sphere is None or not fraction:
+            return self.__sphere
+        return self.__smoothed_cache.get(self.__data_version, fraction, lambda: self.__sphere.smooth(fraction))
+
+    def get_normalised_data(self, reference):
+        '''
+        Gets the data normalised against the reference, the most recently used normalised data sets are retained so
+        switching between them does not require any recalculation.
+        :param reference: an angle or the name of a computed reference, e.g. LISTENING_WINDOW.
+        :return: the normalised data or the raw data if the reference is not available.
+        '''
+        if self.__matrix is None:
+            return None
+        key = (normalisation_key(reference), self.__smoothing)
+        return self.__normalised_cache.get(self.__data_version, (self.__plane,) + key, lambda: self.__normalise(*key))
+
+    def __normalise(self, key, smoothing):
+        matrix = self.get_smoothed_data(smoothing)
+        if key in NORMALISATION_REFERENCES:
+            return matrix.normalise(NORMALISATION_REFERENCES[key](matrix))
+        idx = matrix.index_of(key)
+        if idx is None:
+            logger.warning(f"Unable to normalise to {key}, no such angle")
+            return matrix
+        return matrix.normalise(matrix.spl[idx])
+
+    def get_contour_data(self):
+        '''
+        Generates data for contour plots from the analysed data sets.
+        :param type: the type of data to retrieve.
+        :return: the data as a dict with xyz keys.
+        '''
+        return self.__get_cached('contour', self.__create_contour_data)
+
+    def __create_contour_data(self):
+        # convert to a table of xyz coordinates where x = frequencies, y = angles, z = magnitude
+        data = self.get_directivity_data()
+        return {
+            'x': _read_only(np.tile(data.freqs, data.angles.size)),
+            'y': _read_only(np.repeat(data.angles, data.freqs.size)),
+            'z': data.spl.ravel()
+        }
+
+
+class Measurement:
+    '''
+    A single measurement taken in the real world.
+    '''
+
+    def __init__(self, name, h=0, v=0, freq=np.array([]), spl=np.array([])):
+        self.__name = name
+        self.__h = h
+        self.__v = v
+        self.__freq = freq
+        self.__spl = spl
+
+    def mirror(self):
+        return Measurement(self.__name, h=-self.h, v=-self.v, freq=self.freq, spl=self.spl)
+
+    @property
+    def h(self):
+        return self.__h
+
+    @property
+    def v(self):
+        return self.__v
+
+    @property
+    def name(self):
+        return self.__name
+
+    @property
+    def freq(self):
+        return self.__freq
+
+    @property
+    def x(self):
+        return self.freq
+
+    @property
+    def spl(self):
+        return self.__spl
+
+    @property
+    def y(self):
+        return self.spl
+
+    @property
+    def display_name(self):
+        '''
+        :return: the display name of this measurement.
+        '''
+        return f"{self.name}:H{self.h}V{self.v}"
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}: {self.display_name}"
+
+    def normalise(self, target):
+        '''
+        Normalises the y value against the target y.
+        :param target: the target.
+        :return: a normalised measurement.
+        '''
+        return Measurement(self.name, h=self.h, v=self.v, freq=self.x, spl=self.y - target.y)
+
+
+class ComputedMeasurement(Measurement):
+    '''
+    A response computed from a set of measurements, e.g. the sound power, so it has no position of its own.
+    '''
+
+    def __init__(self, name, freq, spl):
+        super().__init__(name, freq=freq, spl=spl)
+
+    @property
+    def display_name(self):
+        return self.name
+
+
+class DirectivityMatrix(Sequence):
+    '''
+    A set of measurements in a single plane held as a single contiguous angles x frequencies matrix of SPL with a shared
+    frequency vector and a sorted angle vector. All arrays are read only so they can be shared safely between consumers.
+    Each row is also available as a Measurement which views the underlying matrix.
+    '''
+
+    def __init__(self, name, angles, freqs, spl, v=0, plane=HORIZONTAL):
+        '''
+        :param name: the name of the measurements.
+        :param angles: the angle of each row in spl within the plane.
+        :param freqs: the frequencies shared by every row.
+        :param spl: the SPL as an angles x frequencies array.
+        :param v: the vertical angle of a horizontal plane.
+        :param plane: the rotation of the plane about the on axis, i.e. HORIZONTAL or VERTICAL.
+        '''
+        angles = np.asarray(angles)
+        freqs = np.asarray(freqs, dtype=np.float64)
+        spl = np.asarray(spl, dtype=np.float64)
+        if spl.shape != (angles.size, freqs.size):
+            raise ValueError(f"Expected SPL of shape {(angles.size, freqs.size)} but was {spl.shape}")
+        if angles.size > 1 and np.any(np.diff(angles) < 0):
+            order = np.argsort(angles, kind='stable')
+            angles = angles[order]
+            spl = spl[order]
+        self.__name = name
+        self.__v = v
+        self.__plane = plane
+        self.__angles = _read_only(np.array(angles))
+        self.__freqs = _read_only(np.array(freqs))
+        self.__spl = _read_only(np.ascontiguousarray(spl))
+        self.__rows = None
+
+    @staticmethod
+    def from_measurements(measurements):
+        '''
+        Creates a matrix from a list of measurements, measurements which do not share the frequency vector of the first
+        measurement are interpolated onto it.
+        :param measurements: the measurements.
+        :return: the matrix.
+        '''
+        freqs = measurements[0].x
+        spl = np.empty((len(measurements), freqs.size), dtype=np.float64)
+        for idx, m in enumerate(measurements):
+            spl[idx] = m.y if np.array_equal(m.x, freqs) else np.interp(freqs, m.x, m.y)
+        return DirectivityMatrix(measurements[0].name, [m.h for m in measurements], freqs, spl, v=measurements[0].v)
+
+    def __getitem__(self, i):
+        if self.__rows is None:
+            self.__rows = [Measurement(self.__name, *self.__position_of(a), freq=self.__freqs, spl=row)
+                           for a, row in zip(self.__angles.tolist(), self.__spl)]
+        return self.__rows[i]
+
+    def __position_of(self, angle):
+        return plane_position(self.__plane, angle) if self.__plane != HORIZONTAL else (angle, self.__v)
+
+    def __len__(self):
+        return self.__angles.size
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}: {self.__name} {self.__spl.shape}"
+
+    @property
+    def name(self):
+        return self.__name
+
+    @property
+    def v(self):
+        return self.__v
+
+    @property
+    def plane(self):
+        ''' :return: the rotation of the plane about the on axis. '''
+        return self.__plane
+
+    @property
+    def angles(self):
+        ''' :return: the sorted angles. '''
+        return self.__angles
+
+    @property
+    def freqs(self):
+        ''' :return: the frequencies. '''
+        return self.__freqs
+
+    @property
+    def spl(self):
+        ''' :return: the SPL as an angles x frequencies matrix. '''
+        return self.__spl
+
+    @property
+    def shape(self):
+        return self.__spl.shape
+
+    @property
+    def weights(self):
+        ''' :return: the fraction of the sphere represented by each row. '''
+        return solid_angle_weights(self.__angles)
+
+    def index_of(self, angle):
+        '''
+        Finds the row for the angle.
+        :param angle: the angle.
+        :return: the index of the row, None if there is no such angle.
+        '''
+        return exact_index(self.__angles, angle)
+
+    def nearest_index_of(self, angle):
+        '''
+        Finds the row closest to the angle, ties go to the lower angle.
+        :param angle: the angle.
+        :return: the index of the row.
+        '''
+        return nearest_index(self.__angles, angle)
+
+    def freq_index_of(self, freq):
+        '''
+        Finds the first frequency at or above the given frequency.
+        :param freq: the frequency.
+        :return: the index of the column, the last column if the frequency is beyond the measured range.
+        '''
+        return min(int(np.searchsorted(self.__freqs, freq)), self.__freqs.size - 1)
+
+    def normalise(self, reference):
+        '''
+        Normalises every row against the reference.
+        :param reference: the reference SPL, one value per frequency.
+        :return: the normalised matrix.
+        '''
+        return DirectivityMatrix(self.__name, self.__angles, self.__freqs, self.__spl - reference, v=self.__v,
+                                 plane=self.__plane)
+
+    def smooth(self, fraction):
+        '''
+        Smooths every row to the given fraction of an octave.
+        :param fraction: the denominator of the fraction, e.g. 12 for 1/12 octave.
+        :return: the smoothed matrix.
+        '''
+        return DirectivityMatrix(self.__name, self.__angles, self.__freqs,
+                                 fractional_octave_smoothing(self.__freqs, self.__spl, fraction), v=self.__v,
+                                 plane=self.__plane)
+
+
+class SphericalMatrix(Sequence):
+    '''
+    A set of measurement planes held as a single contiguous planes x angles x frequencies array of SPL where every plane
+    shares the same angles and frequencies. The planes are rotated about the on axis, e.g. HORIZONTAL and VERTICAL for
+    a pair of orthogonal scans or 0 to 170 in 10 degree steps for a full balloon, and each one is available as a
+    DirectivityMatrix which views the underlying array so selecting a plane never copies the data.
+    '''
+
+    def __init__(self, name, planes, angles, freqs, spl):
+        '''
+        :param name: the name of the measurements.
+        :param planes: the rotation of each plane about the on axis, 0 to 180.
+        :param angles: the angles shared by every plane.
+        :param freqs: the frequencies shared by every row.
+        :param spl: the SPL as a planes x angles x frequencies array.
+        '''
+        planes = np.asarray(planes)
+        angles = np.asarray(angles)
+        freqs = np.asarray(freqs, dtype=np.float64)
+        spl = np.asarray(spl, dtype=np.float64)
+        if spl.shape != (planes.size, angles.size, freqs.size):
+            raise ValueError(f"Expected SPL of shape {(planes.size, angles.size, freqs.size)} but was {spl.shape}")
+        if np.unique(planes).size != planes.size:
+            raise ValueError(f"Each plane can only be supplied once but was given {planes.tolist()}")
+        if planes.size > 1 and np.any(np.diff(planes) < 0):
+            order = np.argsort(planes, kind='stable')
+            planes = planes[order]
+            spl = spl[order]
+        if angles.size > 1 and np.any(np.diff(angles) < 0):
+            order = np.argsort(angles, kind='stable')
+            angles = angles[order]
+            spl = spl[:, order]
+        self.__name = name
+        self.__planes = _read_only(np.array(planes))
+        self.__angles = _read_only(np.array(angles))
+        self.__freqs = _read_only(np.array(freqs))
+        self.__spl = _read_only(np.ascontiguousarray(spl))
+        self.__matrices = [None] * planes.size
+
+    @staticmethod
+    def from_planes(matrices):
+        '''
+        Combines a set of planes into a sphere, planes which do not share the angles and frequencies of the first plane
+        are interpolated onto them. A single plane is wrapped without copying.
+        :param matrices: the planes as DirectivityMatrix.
+        :return: the sphere.
+        '''
+        first = matrices[0]
+        if len(matrices) == 1:
+            sphere = SphericalMatrix(first.name, [first.plane], first.angles, first.freqs, first.spl[np.newaxis])
+            sphere.__matrices[0] = first
+            return sphere
+        spl = np.empty((len(matrices), first.angles.size, first.freqs.size), dtype=np.float64)
+        for idx, m in enumerate(matrices):
+            rows = m.spl
+            if not np.array_equal(m.freqs, first.freqs):
+                rows = np.array([np.interp(first.freqs, m.freqs, row) for row in rows])
+            spl[idx] = rows if np.array_equal(m.angles, first.angles) else _interp_rows(first.angles, m.angles, rows)
+        return SphericalMatrix(first.name, [m.plane for m in matrices], first.angles, first.freqs, spl)
+
+    def __getitem__(self, i):
+        if self.__matrices[i] is None:
+            self.__matrices[i] = DirectivityMatrix(self.__name, self.__angles, self.__freqs, self.__spl[i],
+                                                   plane=self.__planes[i].item())
+        return self.__matrices[i]
+
+    def __len__(self):
+        return self.__planes.size
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}: {self.__name} {self.__spl.shape}"
+
+    @property
+    def name(self):
+        return self.__name
+
+    @property
+    def planes(self):
+        ''' :return: the sorted planes. '''
+        return self.__planes
+
+    @property
+    def angles(self):
+        ''' :return: the sorted angles. '''
+        return self.__angles
+
+    @property
+    def freqs(self):
+        ''' :return: the frequencies. '''
+        return self.__freqs
+
+    @property
+    def spl(self):
+        ''' :return: the SPL as a planes x angles x frequencies array. '''
+        return self.__spl
+
+    @property
+    def shape(self):
+        return self.__spl.shape
+
+    @property
+    def weights(self):
+        ''' :return: the fraction of the sphere represented by each measurement as a planes x angles array. '''
+        return spherical_weights(self.__planes, self.__angles)
+
+    def plane_index_of(self, plane):
+        '''
+        Finds the index of the plane.
+        :param plane: the rotation of the plane.
+        :return: the index, None if there is no such plane.
+        '''
+        return exact_index(self.__planes, plane)
+
+    def plane(self, plane):
+        '''
+        Gets the measurements in a single plane.
+        :param plane: the rotation of the plane.
+        :return: the plane as a DirectivityMatrix which views this sphere.
+        '''
+        idx = self.plane_index_of(plane)
+        if idx is None:
+            raise ValueError(f"No such plane {plane}, available planes are {self.__planes.tolist()}")
+        return self[idx]
+
+    def smooth(self, fraction):
+        '''
+        Smooths every measurement to the given fraction of an octave.
+        :param fraction: the denominator of the fraction, e.g. 12 for 1/12 octave.
+        :return: the smoothed sphere.
+        '''
+        smoothed = fractional_octave_smoothing(self.__freqs, self.__spl.reshape(-1, self.__freqs.size), fraction)
+        return SphericalMatrix(self.__name, self.__planes, self.__angles, self.__freqs,
+                               smoothed.reshape(self.__spl.shape))
+
+
+def listening_window(matrix, max_angle=30):
+    '''
+    Computes the listening window as the power average of the measurements within max_angle of the axis.
+    :param matrix: the measurements.
+    :param max_angle: the max angle to include.
+    :return: the listening window SPL.
+    '''
+    return spatial_average(matrix.spl[np.abs(matrix.angles) <= max_angle])
+
+
+def spatial_average(spl):
+    '''
+    Averages the supplied measurements in the power domain.
+    :param spl: the SPL as an angles x frequencies array.
+    :return: the average SPL.
+    '''
+    return 10.0 * np.log10(np.mean(np.power(10.0, spl / 10.0), axis=0))
+
+
+def fractional_octave_smoothing(freqs, spl, fraction):
+    '''
+    Smooths each curve by averaging, in the power domain, every bin with all the bins within 1/(2*fraction) of an
+    octave either side of it. The window sums are read off a cumulative sum along the frequency axis so the cost is
+    independent of the window width. Each row is scaled to its own peak before converting to power to retain precision
+    in the cumulative sum while nan is excluded from the average.
+    :param freqs: the frequencies in ascending order.
+    :param spl: the SPL as an angles x frequencies array.
+    :param fraction: the denominator of the fraction, e.g. 12 for 1/12 octave.
+    :return: the smoothed SPL.
+    '''
+    half_width = 2.0 ** (1.0 / (2.0 * fraction))
+    lo = np.searchsorted(freqs, freqs / half_width, side='left')
+    hi = np.searchsorted(freqs, freqs * half_width, side='right')
+    smoothed = np.empty(spl.shape, dtype=np.float64)
+    chunk = max(1, SMOOTHING_CHUNK_SIZE // max(1, freqs.size))
+    for first in range(0, spl.shape[0], chunk):
+        rows = spl[first:first + chunk]
+        valid = ~np.isnan(rows)
+        peak = np.max(np.where(valid, rows, -np.inf), axis=1, keepdims=True)
+        peak[~np.isfinite(peak)] = 0.0
+        power = np.where(valid, np.power(10.0, (rows - peak) / 10.0), 0.0)
+        power_sum = np.concatenate((np.zeros((rows.shape[0], 1)), np.cumsum(power, axis=1)), axis=1)
+        count_sum = np.concatenate((np.zeros((rows.shape[0], 1)), np.cumsum(valid, axis=1)), axis=1)
+        counts = count_sum[:, hi] - count_sum[:, lo]
+        window = np.maximum(power_sum[:, hi] - power_sum[:, lo], np.finfo(np.float64).tiny)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = np.where(counts > 0, window / counts, np.nan)
+        smoothed[first:first + chunk] = 10.0 * np.log10(mean) + peak
+    return smoothed
+
+
+def exact_index(values, value):
+    '''
+    Binary searches for the value.
+    :param values: the values in ascending order.
+    :param value: the value to look for.
+    :return: the index of the value, None if it is not present.
+    '''
+    idx = int(np.searchsorted(values, value))
+    for candidate in (idx, idx - 1):
+        if 0 <= candidate < values.size and np.isclose(values[candidate], value):
+            return candidate
+    return None
+
+
+def nearest_index(values, value):
+    '''
+    Binary searches for the value closest to the given value, ties go to the lower value.
+    :param values: the values in ascending order.
+    :param value: the value to look for.
+    :return: the index of the closest value.
+    '''
+    idx = int(np.searchsorted(values, value))
+    if idx == values.size or (idx > 0 and value - values[idx - 1] <= values[idx] - value):
+        return idx - 1
+    return idx
+
+
+def solid_angle_weights(angles):
+    '''
+    Calculates the fraction of the sphere represented by each measurement in a single plane. The radiation pattern is
+    assumed to be symmetrical about the axis so each half of the plane is treated as a complete set of zones and, if
+    both halves were measured, they are weighted equally.
+    :param angles: the angles in degrees, -180 to 180.
+    :return: the weight of each measurement, the weights sum to 1.
+    '''
+    return spherical_weights([HORIZONTAL], angles)[0]
+
+
+def spherical_weights(planes, angles):
+    '''
+    Calculates the fraction of the sphere represented by each measurement in a set of planes rotated about the on axis.
+    Each plane is split into a pair of half planes, the positive and negative angles, and each half plane covers the
+    sector of azimuth between the midpoints to its neighbouring half planes. Within a half plane, the measurement at
+    angle θ stands for the spherical zone between the midpoints to its neighbours, i.e. a solid angle of
+    2π(cos θ1 - cos θ2), so its weight is the part of that zone which lies in the sector.
+    :param planes: the rotation of each plane in degrees, 0 to 180.
+    :param angles: the angles within every plane in degrees, -180 to 180.
+    :return: the weight of each measurement as a planes x angles array, the weights sum to 1.
+    '''
+    planes = np.asarray(planes, dtype=np.float64)
+    angles = np.asarray(angles, dtype=np.float64)
+    halves = [(half, offset) for half, offset in ((angles >= 0, 0.0), (angles <= 0, 180.0))
+              if np.count_nonzero(half) > 0]
+    sectors = azimuth_sectors(np.concatenate([(planes + offset) % 360 for _, offset in halves]))
+    weights = np.zeros((planes.size, angles.size))
+    for idx, (half, _) in enumerate(halves):
+        polar = np.radians(np.abs(angles[half]))
+        order = np.argsort(polar)
+        mid = (polar[order][1:] + polar[order][:-1]) / 2
+        zones = np.empty(polar.size)
+        zones[order] = 2 * np.pi * (np.cos(np.concatenate(([0.0], mid))) - np.cos(np.concatenate((mid, [np.pi]))))
+        weights[:, half] += sectors[idx * planes.size:(idx + 1) * planes.size, np.newaxis] * zones / (4 * np.pi)
+    return weights
+
+
+def azimuth_sectors(azimuths):
+    '''
+    Calculates the fraction of the circle closer to each azimuth than to its neighbours.
+    :param azimuths: the azimuths in degrees, 0 to 360.
+    :return: the fraction of the circle which belongs to each azimuth.
+    '''
+    order = np.argsort(azimuths, kind='stable')
+    ordered = azimuths[order]
+    gaps = np.diff(np.concatenate((ordered, [ordered[0] + 360])))
+    sectors = np.empty(azimuths.size)
+    sectors[order] = (gaps + np.roll(gaps, 1)) / 2 / 360
+    return sectors
+
+
+def plane_position(plane, angle):
+    '''
+    Converts a position in a measurement plane into horizontal and vertical angles, the angle within a plane which is
+    neither HORIZONTAL nor VERTICAL is split between the two according to the rotation of the plane.
+    :param plane: the rotation of the plane.
+    :param angle: the angle within the plane.
+    :return: h, v.
+    '''
+    if plane == HORIZONTAL:
+        return angle, 0
+    if plane == VERTICAL:
+        return 0, angle
+    rotation = math.radians(plane)
+    return round(angle * math.cos(rotation), 1), round(angle * math.sin(rotation), 1)
+
+
+def sound_power(matrix):
+    '''
+    Calculates the sound power as the average of the measurements in the power domain, weighted by the solid angle
+    each one represents.
+    :param matrix: the measurements, either a DirectivityMatrix or a SphericalMatrix.
+    :return: the sound power SPL, one value per frequency.
+    '''
+    weights = matrix.weights
+    return 10.0 * np.log10(np.tensordot(weights, np.power(10.0, matrix.spl / 10.0), axes=weights.ndim))
+
+
+# computed references which can be used for normalisation
+NORMALISATION_REFERENCES = {
+    LISTENING_WINDOW: listening_window
+}
+
+
+def normalisation_key(reference):
+    '''
+    Converts a normalisation reference, as supplied by the display model, into a cache key.
+    :param reference: an angle, possibly as a string, or the name of a computed reference.
+    :return: the key.
+    '''
+    if reference in NORMALISATION_REFERENCES:
+        return reference
+    return float(reference)
+
+
+def _interp_rows(positions, known, rows):
+    '''
+    Linearly interpolates between rows, positions beyond either end take the value of the row at that end.
+    :param positions: the positions to interpolate at.
+    :param known: the position of each row in ascending order.
+    :param rows: the rows.
+    :return: one row per position.
+    '''
+    if known.size == 1:
+        return np.repeat(rows, len(positions), axis=0)
+    idx = np.clip(np.searchsorted(known, positions), 1, known.size - 1)
+    weight = np.clip((positions - known[idx - 1]) / (known[idx] - known[idx - 1]), 0.0, 1.0)[:, np.newaxis]
+    return rows[idx - 1] * (1.0 - weight) + rows[idx] * weight
+
+
+def _read_only(arr):
+    arr.setflags(write=False)
+    return arr
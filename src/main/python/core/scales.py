@@ -0,0 +1,38 @@
+import math
+
+import numpy as np
+
+
+def calculate_dBFS_Scales(data, max_range=60, vmax_to_round=True, fill_levels=None):
+    '''
+    Calculates the min/max in the data and returns the steps to use when displaying lines on a chart, this uses -2 for
+    the first 12 and then -6 thereafter.
+    :param data: the data.
+    :param max_range: the max range.
+    :param fill_levels: the number of fill steps to return, if not set then steps are 0.05dB apart.
+    :return: max, min, steps, fillSteps
+    '''
+    vmax = math.ceil(np.nanmax(data))
+    # coerce max to a round value
+    if vmax_to_round:
+        multiple = 5 if max_range <= 30 else 10
+        if vmax % multiple != 0:
+            vmax = (vmax - vmax % multiple) + multiple
+    vmin = vmax - max_range
+    steps = np.sort(np.concatenate((np.arange(vmax, vmax - 14, -2), np.arange(vmax - 18, vmin - 6, -6))))
+    if fill_levels is None:
+        fillSteps = np.sort(np.arange(vmax, vmin, -0.05))
+    else:
+        fillSteps = np.sort(np.linspace(vmax, vmin, fill_levels, endpoint=False))
+    return vmax, vmin, steps, fillSteps
+
+
+def calculate_fill_levels(pixel_height, cmap_size):
+    '''
+    Calculates how many fill levels are required to render a colour mapped surface smoothly, i.e. there is no point
+    using more levels than there are colours in the colour map or pixels available to show them in.
+    :param pixel_height: the height of the surface in pixels.
+    :param cmap_size: the number of colours in the colour map.
+    :return: the number of levels.
+    '''
+    return max(2, min(int(pixel_height), cmap_size))
@@ -1,12 +1,15 @@
+from collections import namedtuple
 from math import log10
 
-import numpy as np
 from matplotlib.gridspec import GridSpec
 from matplotlib.ticker import Formatter, NullFormatter, EngFormatter
 from mpl_toolkits.axes_grid1 import make_axes_locatable
 
 SINGLE_SUBPLOT_SPEC = GridSpec(1, 1).new_subplotspec((0, 0), 1, 1)
 
+# a position on a chart in data coordinates, replaced rather than mutated so x and y are always seen together
+Cursor = namedtuple('Cursor', ['x', 'y'])
+
 
 class PrintFirstHalfFormatter(Formatter):
     '''
@@ -48,26 +51,6 @@ def format_axes_dbfs_hz(axes):
     axes.set_xlabel('Hz')
 
 
-def calculate_dBFS_Scales(data, max_range=60, vmax_to_round=True):
-    '''
-    Calculates the min/max in the data and returns the steps to use when displaying lines on a chart, this uses -2 for
-    the first 12 and then -6 thereafter.
-    :param data: the data.
-    :param max_range: the max range.
-    :return: max, min, steps, fillSteps
-    '''
-    vmax = np.math.ceil(np.nanmax(data))
-    # coerce max to a round value
-    if vmax_to_round:
-        multiple = 5 if max_range <= 30 else 10
-        if vmax % multiple != 0:
-            vmax = (vmax - vmax % multiple) + multiple
-    vmin = vmax - max_range
-    steps = np.sort(np.concatenate((np.arange(vmax, vmax - 14, -2), np.arange(vmax - 18, vmin - 6, -6))))
-    fillSteps = np.sort(np.arange(vmax, vmin, -0.05))
-    return vmax, vmin, steps, fillSteps
-
-
 def set_y_limits(axes, dBRange):
     '''
     Updates the decibel range on the chart.
@@ -79,14 +62,16 @@ def set_y_limits(axes, dBRange):
         axes.set_ylim(bottom=ylim[1] - dBRange, top=ylim[1])
 
 
-def colorbar(mappable, **kwargs):
+def colorbar(mappable, ax=None, **kwargs):
     '''
     Creates a colour bar for a given plot that will exist at a specific position relative to the given chart.
     :param mappable: the plot.
+    :param ax: the axes the colour bar sits next to, only required if the mappable is not an artist on those axes.
     :param **kwargs: passed through to colorbar.
     :return: the colorbar.
     '''
-    ax = mappable.ax
+    if ax is None:
+        ax = getattr(mappable, 'axes', None) or mappable.ax
     fig = ax.figure
     divider = make_axes_locatable(ax)
     cax = divider.append_axes("right", size="5%", pad=0.05)
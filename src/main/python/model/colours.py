@@ -0,0 +1,108 @@
+import logging
+
+import numpy as np
+
+logger = logging.getLogger('colours')
+
+DEFAULT_COLOUR_MAP = 'bgyw'
+CUSTOM_COLOUR_MAP = 'custom'
+CUSTOM_COLOURS = ['black', 'magenta', 'blue', 'cyan', 'lime', 'yellow', 'red', 'white']
+# the number of entries in the lookup table used to colour images
+LUT_SIZE = 256
+
+
+class ColourMapRegistry:
+    '''
+    The colour maps which can be selected. colorcet creates every one of its colour maps when it is imported, which
+    is a noticeable part of the startup time, so it is only imported when a colour map, or the list of names, is first
+    needed. Each colour map is then created once and cached along with a lookup table of its colours.
+    '''
+
+    def __init__(self):
+        self.__sources = None
+        self.__colour_maps = {}
+        self.__luts = {}
+
+    def __load_sources(self):
+        '''
+        Finds the available colour maps, i.e. the colorcet maps plus the custom one. Names which are aliases of the
+        same colorcet map are grouped together, the custom map is only created when it is first used.
+        :return: the colorcet map (or None for the custom map) by name.
+        '''
+        if self.__sources is None:
+            import colorcet as cc
+            # from http://colorcet.pyviz.org/index.html
+            inverse = {}
+            for k, v in cc.cm_n.items():
+                if not k[-2:] == "_r":
+                    inverse[id(v)] = inverse.get(id(v), (v, []))
+                    inverse[id(v)][1].insert(0, k)
+            sources = dict(sorted({',  '.join(reversed(names)): cm for (cm, names) in inverse.values()}.items()))
+            sources[CUSTOM_COLOUR_MAP] = None
+            self.__sources = sources
+        return self.__sources
+
+    @property
+    def names(self):
+        ''' :return: the names of the available colour maps. '''
+        return list(self.__load_sources().keys())
+
+    def get(self, name):
+        '''
+        :param name: the name of the colour map.
+        :return: the named colour map or the default colour map if there is no such colour map.
+        '''
+        sources = self.__load_sources()
+        if name not in sources:
+            name = DEFAULT_COLOUR_MAP
+        cmap = self.__colour_maps.get(name, None)
+        if cmap is None:
+            cmap = sources.get(name, None)
+            if cmap is None:
+                from matplotlib.colors import LinearSegmentedColormap
+                cmap = LinearSegmentedColormap.from_list(CUSTOM_COLOUR_MAP, CUSTOM_COLOURS)
+            self.__colour_maps[name] = cmap
+        return cmap
+
+    def get_lut(self, cmap):
+        '''
+        :param cmap: the colour map.
+        :return: the colours of the colour map as a LUT_SIZE x 4 array of bytes, entry i being the colour used for the
+        values from i / LUT_SIZE up to (i + 1) / LUT_SIZE.
+        '''
+        lut = self.__luts.get(cmap.name, None)
+        if lut is None:
+            lut = cmap(np.arange(LUT_SIZE) / (LUT_SIZE - 1), bytes=True)
+            lut.setflags(write=False)
+            self.__luts[cmap.name] = lut
+        return lut
+
+
+_registry = ColourMapRegistry()
+
+
+def get_colour_map(name):
+    '''
+    :param name: the name of the colour map.
+    :return: the named colour map or the default colour map if there is no such colour map.
+    '''
+    return _registry.get(name)
+
+
+def get_colour_map_names():
+    '''
+    :return: the names of the available colour maps.
+    '''
+    return _registry.names
+
+
+def to_colours(cmap, values):
+    '''
+    Maps values to colours using the lookup table of the colour map, values outside 0 to 1 get the colour at the
+    nearest end of the colour map as is the case when the colour map is called directly.
+    :param cmap: the colour map.
+    :param values: the values, normalised to 0 to 1.
+    :return: the colours as a values x 4 array of bytes.
+    '''
+    idx = np.floor(np.asarray(values, dtype=np.float64) * LUT_SIZE)
+    return _registry.get_lut(cmap)[np.clip(np.nan_to_num(idx), 0, LUT_SIZE - 1).astype(np.intp)]
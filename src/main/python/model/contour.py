@@ -1,14 +1,120 @@
 import logging
 
 import numpy as np
-from matplotlib import animation
+from matplotlib.artist import Artist
+from matplotlib.cm import ScalarMappable
+from matplotlib.colors import Normalize
+from matplotlib.image import AxesImage
+from matplotlib.transforms import Bbox
 
-from model import configureFreqAxisFormatting, calculate_dBFS_Scales, colorbar, SINGLE_SUBPLOT_SPEC
-from model.measurement import CLEAR_MEASUREMENTS, LOAD_MEASUREMENTS
+from core.cache import VersionedCache
+from core.measurement import CLEAR_MEASUREMENTS, LOAD_MEASUREMENTS
+from core.scales import calculate_dBFS_Scales, calculate_fill_levels
+from model import configureFreqAxisFormatting, colorbar, SINGLE_SUBPLOT_SPEC, Cursor
+from model.colours import to_colours
 from model.preferences import DISPLAY_COLOUR_MAP
+from model.scheduler import get_scheduler
 
 logger = logging.getLogger('contour')
 
+# gridded data which needs more fill levels than this is rendered as a continuous image instead of as filled contours
+MAX_FILL_LEVELS = 64
+# the max number of cells along either axis of the image unless the data itself has more samples than this
+MAX_IMAGE_CELLS = 4096
+# the number of coloured images to retain so flipping between display settings does not recolour the image
+IMAGE_CACHE_SIZE = 4
+
+
+def to_grid(x, y, z):
+    '''
+    Converts flattened xyz data to a structured grid if the data is laid out as a regular grid, i.e. each row is the
+    same ascending x vector with a single y value and rows are ordered by y.
+    :param x: the x values.
+    :param y: the y values.
+    :param z: the z values.
+    :return: the unique x values, the unique y values and z as a y x x array or None if the data is not gridded.
+    '''
+    if x.size == 0 or x.size != y.size or x.size != z.size:
+        return None
+    row_len = int(np.argmax(y != y[0])) or x.size
+    if x.size % row_len != 0:
+        return None
+    xx = x.reshape(-1, row_len)
+    yy = y.reshape(-1, row_len)
+    gx = xx[0]
+    gy = yy[:, 0]
+    if not (np.all(np.diff(gx) > 0) and np.all(np.diff(gy) > 0)):
+        return None
+    if not np.array_equal(xx, np.broadcast_to(gx, xx.shape)):
+        return None
+    if not np.array_equal(yy, np.broadcast_to(gy[:, None], yy.shape)):
+        return None
+    return gx, gy, z.reshape(-1, row_len)
+
+
+def to_image_cells(centres, log=False):
+    '''
+    Lays a regular grid of image cells over data sampled at the supplied, not necessarily evenly spaced, values. Each
+    image cell shows the nearest sample so the image looks like the data drawn as a mesh of flat shaded cells.
+    :param centres: the ascending sample values.
+    :param log: true if the image is laid out on a log scale.
+    :return: the (first, last) extent of the image in (log scaled if necessary) data units and the index of the sample
+    shown in each image cell.
+    '''
+    scaled = np.log10(centres) if log else np.asarray(centres, dtype=np.float64)
+    if scaled.size == 1:
+        return (scaled[0], scaled[0]), np.zeros(1, dtype=np.intp)
+    mid = (scaled[1:] + scaled[:-1]) / 2
+    edges = np.concatenate(([2 * scaled[0] - mid[0]], mid, [2 * scaled[-1] - mid[-1]]))
+    span = edges[-1] - edges[0]
+    # enough cells to show the narrowest sample
+    count = int(np.ceil(np.round(span / np.diff(edges).min(), 6)))
+    count = min(max(count, scaled.size), max(MAX_IMAGE_CELLS, scaled.size))
+    cell_centres = edges[0] + (np.arange(count) + 0.5) * (span / count)
+    return (edges[0], edges[-1]), np.searchsorted(mid, cell_centres)
+
+
+class SonagramImage:
+    '''
+    Gridded sonagram data resampled onto a regular log frequency x angle grid so it can be drawn as a single image. The
+    image is coloured by quantising the data into the fill levels and looking each level up in a table of colours
+    taken from the colour map so changing the colour map or the decibel range never requires the data to be contoured.
+    '''
+
+    def __init__(self, freqs, angles, spl):
+        x_extent, cols = to_image_cells(freqs, log=True)
+        y_extent, rows = to_image_cells(angles)
+        self.__extent = x_extent + y_extent
+        self.__field = spl[np.ix_(rows, cols)]
+
+    @property
+    def nbytes(self):
+        return self.__field.nbytes
+
+    @property
+    def extent(self):
+        '''
+        :return: left, right, bottom, top in log10(freq) and degrees.
+        '''
+        return self.__extent
+
+    def to_rgba(self, cmap, fill_steps, vmin, vmax):
+        '''
+        Colours the image, values are coloured in the same way as contourf colours the bands between the fill steps.
+        :param cmap: the colour map.
+        :param fill_steps: the fill levels, values below the first level are transparent.
+        :param vmin: the value mapped to the bottom of the colour map.
+        :param vmax: the value mapped to the top of the colour map.
+        :return: the image as a rows x cols x 4 array of bytes.
+        '''
+        band = np.searchsorted(fill_steps, self.__field, side='right')
+        np.minimum(band, fill_steps.size - 1, out=band)
+        band[np.isnan(self.__field)] = 0
+        # entry 0 is the transparent colour shown for values below the range
+        lut = np.zeros((fill_steps.size, 4), dtype=np.uint8)
+        lut[1:] = to_colours(cmap, Normalize(vmin=vmin, vmax=vmax)((fill_steps[1:] + fill_steps[:-1]) / 2))
+        return lut[band]
+
 
 class ContourModel:
     '''
@@ -17,15 +123,17 @@ class ContourModel:
 
     def __init__(self, chart, measurement_model, display_model, preferences,
                  subplot_spec=SINGLE_SUBPLOT_SPEC, redraw_on_display=True, depends_on=lambda: False,
-                 show_crosshairs=False):
+                 show_crosshairs=False, cursor_listener=None, name='contour'):
         '''
         Creates a new contour model.
         :param chart: the MplWidget that owns the canvas onto which the chart will be drawn.
         :param measurement_model: the underlying measurements.
         :param subplot_spec: the spec for the subplot, defaults to a single plot.
         :param cbSubplotSpec: the spec for the colorbar, defaults to put it anywhere you like.
+        :param cursor_listener: a callable invoked with the new Cursor whenever the cursor moves.
+        :param name: the name of the chart, distinguishes this chart from any other sonagram.
         '''
-        self.__chart = chart
+        self._chart = chart
         self.__axes = None
         self.__crosshair_axes = None
         self.__show_crosshairs = show_crosshairs
@@ -35,20 +143,26 @@ class ContourModel:
         self.__depends_on = depends_on
         self.__selected_cmap = preferences.get(DISPLAY_COLOUR_MAP)
         self.__cmap_changed = False
-        self.name = 'contour'
+        self.name = name
         self.__data = None
-        self.__tc = None
+        self.__tc = []
         self.__tcf = None
+        self.__image = None
+        self.__fill_scale = None
+        self.__image_cache = VersionedCache(f"{self.name} image", max_entries=IMAGE_CACHE_SIZE)
+        self.__drawn = False
+        self._chart.canvas.mpl_connect('draw_event', self.__on_draw)
         self.__cid = []
         self.__refresh_data = False
         self.__measurement_model.register_listener(self)
         self.__record_y = False
         self.__dragging = False
-        self.cursor_x = None
-        self.cursor_y = None
+        self.cursor = None
         self.__crosshair_h = None
         self.__crosshair_v = None
-        self.__ani = None
+        self.__drawn_crosshairs = None
+        self.__scheduler = get_scheduler(self._chart.canvas)
+        self.__cursor_listener = cursor_listener
         self.__redraw_on_display = redraw_on_display
         self.__display_model = display_model
         self.__required_clim = None
@@ -58,7 +172,15 @@ class ContourModel:
         return self.name
 
     def should_refresh(self):
-        return self.__refresh_data or self.__depends_on
+        return self.__refresh_data or self.__depends_on()
+
+    @property
+    def memory_usage(self):
+        ''' :return: the size in bytes of the image and colourings held by this chart. '''
+        return (0 if self.__image is None else self.__image.nbytes) + self.__image_cache.nbytes
+
+    def __on_draw(self, event):
+        self.__drawn = True
 
     def __init_chart(self, subplotSpec):
         '''
@@ -66,12 +188,14 @@ class ContourModel:
         :param subplotSpec: the spec for the subplot.
         '''
         if self.__axes is None:
-            self.__axes = self.__chart.canvas.figure.add_subplot(subplotSpec)
+            self.__axes = self._chart.canvas.figure.add_subplot(subplotSpec)
         if self.__show_crosshairs is True and self.__crosshair_axes is None:
             self.__crosshair_axes = self.__axes.twinx()
             self.__crosshair_axes.get_yaxis().set_visible(False)
         self.__axes.axis('auto')
         self.__axes.set_xscale('log')
+        # an empty log axis has no positive limits to draw so show the audible range until there is data to scale to
+        self.__axes.set_xlim(left=20, right=20000, auto=None)
         self.__axes.set_xlabel('Hz')
         self.__axes.set_ylabel('Degrees')
         self.__axes.grid(linestyle='-', which='major', linewidth=1, alpha=0.5)
@@ -82,13 +206,18 @@ class ContourModel:
         Updates the decibel range on the chart.
         '''
         # record the target clim in case we don't want to draw right now
-        if self.__tcf is not None:
+        if self.__image is not None:
+            vmax, vmin, steps, fill_steps = self.__calculate_scales()
+            self.__update_image(vmin, vmax, fill_steps)
+            self._cb.set_ticks(steps)
+            self.__required_clim = (vmin, vmax)
+        elif self.__tcf is not None:
             _, cmax = self.__tcf.get_clim()
             self.__required_clim = (cmax - self.__display_model.db_range, cmax)
             self.__tcf.set_clim(vmin=self.__required_clim[0], vmax=self.__required_clim[1])
         if draw:
             self.__required_clim = None
-            self.__chart.canvas.draw_idle()
+            self._chart.canvas.draw_idle()
 
     def on_update(self, type, **kwargs):
         '''
@@ -118,76 +247,160 @@ class ContourModel:
                 self.__redraw()
                 self.connect_mouse()
                 if self.__redraw_on_display:
-                    self.__chart.canvas.draw_idle()
+                    self._chart.canvas.draw_idle()
                 self.__refresh_data = False
                 return True
             else:
                 # this is called when the owning tab is selected so we need to update the clim if the y range
                 # was changed while this chart was off screen
                 if self.__tcf is not None and self.__required_clim is not None:
-                    self.update_decibel_range(draw=self.__redraw_on_display)
+                    if self.__image is not None:
+                        # the image is already up to date so it just needs to be drawn
+                        self.__required_clim = None
+                        self.__cmap_changed = False
+                        if self.__redraw_on_display:
+                            self._chart.canvas.draw_idle()
+                    else:
+                        self.update_decibel_range(draw=self.__redraw_on_display)
                     return self.__redraw_on_display
                 if self.__cmap_changed:
-                    self.__chart.canvas.draw_idle()
+                    if self.__image is not None:
+                        self.__blit_fill()
+                    else:
+                        self._chart.canvas.draw_idle()
                     self.__cmap_changed = False
         return False
 
+    def __calculate_scales(self):
+        '''
+        :return: vmax, vmin, steps, fill_steps for the current data, colour map and decibel range.
+        '''
+        fill_levels = calculate_fill_levels(self.__axes.bbox.height,
+                                            self._chart.get_colour_map(self.__selected_cmap).N)
+        return calculate_dBFS_Scales(self.__data['z'], max_range=self.__display_model.db_range, vmax_to_round=False,
+                                     fill_levels=fill_levels)
+
     def __redraw(self):
         '''
         draws the contours and the colorbar.
         :return:
         '''
-        vmax, vmin, steps, fill_steps = calculate_dBFS_Scales(self.__data['z'],
-                                                              max_range=self.__display_model.db_range,
-                                                              vmax_to_round=False)
+        cmap = self._chart.get_colour_map(self.__selected_cmap)
+        vmax, vmin, steps, fill_steps = self.__calculate_scales()
         actual_vmax = np.math.ceil(np.nanmax(self.__data['z']))
         line_offset = actual_vmax - vmax
         line_steps = steps + line_offset
-        self.__tc = self.__axes.tricontour(self.__data['x'], self.__data['y'], self.__data['z'],
-                                           line_steps if not self.__display_model.normalised else line_steps - np.max(line_steps) - 2,
-                                           linewidths=0.5, colors='k', linestyles='--')
-        self.__tc = self.__axes.tricontour(self.__data['x'], self.__data['y'], self.__data['z'],
-                                           levels=[actual_vmax - 6] if not self.__display_model.normalised else [-6],
-                                           linewidths=1.5, colors='k')
-        self.__tcf = self.__axes.tricontourf(self.__data['x'], self.__data['y'], self.__data['z'], fill_steps,
-                                             vmin=vmin, vmax=vmax,
-                                             cmap=self.__chart.get_colour_map(self.__selected_cmap))
-        self._cb = colorbar(self.__tcf)
+        grid = to_grid(self.__data['x'], self.__data['y'], self.__data['z'])
+        if grid is not None:
+            contour, contourf, xyz = self.__axes.contour, self.__axes.contourf, grid
+        else:
+            logger.info(f"Data is not on a regular grid, falling back to triangulation in {self.name}")
+            contour, contourf = self.__axes.tricontour, self.__axes.tricontourf
+            xyz = (self.__data['x'], self.__data['y'], self.__data['z'])
+        self.__tc = [
+            contour(*xyz,
+                    line_steps if not self.__display_model.normalised else line_steps - np.max(line_steps) - 2,
+                    linewidths=0.5, colors='k', linestyles='--'),
+            contour(*xyz,
+                    levels=[actual_vmax - 6] if not self.__display_model.normalised else [-6],
+                    linewidths=1.5, colors='k')
+        ]
+        if grid is not None and fill_steps.size > MAX_FILL_LEVELS:
+            logger.debug(f"Rendering {fill_steps.size} levels as an image in {self.name}")
+            self.__image = SonagramImage(*grid)
+            # the image is laid out in log10(freq) so is drawn via the axes scaled -> display transform
+            self.__tcf = AxesImage(self.__axes, interpolation='nearest', origin='lower', extent=self.__image.extent,
+                                   transform=self.__axes.transLimits + self.__axes.transAxes)
+            self.__axes.add_image(self.__tcf)
+            self.__fill_scale = ScalarMappable(cmap=cmap)
+            self.__update_image(vmin, vmax, fill_steps)
+            self._cb = colorbar(self.__fill_scale, ax=self.__axes)
+        else:
+            logger.debug(f"Rendering {fill_steps.size} filled contours in {self.name}")
+            self.__tcf = contourf(*xyz, fill_steps, vmin=vmin, vmax=vmax, cmap=cmap)
+            self.__tcf.set_clim(vmin=vmin, vmax=vmax)
+            self._cb = colorbar(self.__tcf)
         self._cb.set_ticks(steps)
         configureFreqAxisFormatting(self.__axes)
-        self.__tcf.set_clim(vmin=vmin, vmax=vmax)
         if self.__crosshair_axes is not None:
             xlim = self.__axes.get_xlim()
             ylim = self.__axes.get_ylim()
             self.__crosshair_axes.set_xlim(left=xlim[0], right=xlim[1])
             self.__crosshair_axes.set_ylim(bottom=ylim[0], top=ylim[1])
-            self.__crosshair_h = self.__crosshair_axes.axhline(color='k', linestyle=':')
-            self.__crosshair_v = self.__crosshair_axes.axvline(color='k', linestyle=':')
-            if self.__ani is None:
-                logger.info(f"Starting animation in {self.name}")
-                self.__ani = animation.FuncAnimation(self.__chart.canvas.figure, self.__redraw_crosshairs, interval=50,
-                                                     init_func=self.__init_crosshairs, blit=True, save_count=50, repeat=False)
-
-    def __init_crosshairs(self):
-        self.__crosshair_h.set_ydata([self.__extents[3], self.__extents[3]])
-        self.__crosshair_v.set_xdata([self.__extents[0], self.__extents[0]])
-        return self.__crosshair_h, self.__crosshair_v
-
-    def __redraw_crosshairs(self, frame, *fargs):
-        if self.cursor_y is not None:
-            self.__crosshair_h.set_ydata([self.cursor_y] * 2)
-        if self.cursor_x is not None:
-            self.__crosshair_v.set_xdata([self.cursor_x] * 2)
-        return self.__crosshair_h, self.__crosshair_v
+            self.__crosshair_h = self.__crosshair_axes.axhline(y=self.__extents[3], color='k', linestyle=':')
+            self.__crosshair_v = self.__crosshair_axes.axvline(x=self.__extents[0], color='k', linestyle=':')
+            self.__drawn_crosshairs = None
+            self.__scheduler.add(self, (self.__crosshair_h, self.__crosshair_v), self.__redraw_crosshairs)
+
+    def __update_image(self, vmin, vmax, fill_steps):
+        '''
+        Colours the image for the current display settings, recently used colourings are cached.
+        :param vmin: the bottom of the colour scale.
+        :param vmax: the top of the colour scale.
+        :param fill_steps: the fill levels.
+        '''
+        cmap = self._chart.get_colour_map(self.__selected_cmap)
+        # version changes whenever the data behind the image does, e.g. on a change of normalisation or plane
+        key = (self.__selected_cmap, self.__display_model.db_range, fill_steps.size)
+        rgba = self.__image_cache.get(self.__measurement_model.version, key,
+                                      lambda: self.__image.to_rgba(cmap, fill_steps, vmin, vmax))
+        self.__tcf.set_data(rgba)
+        self.__fill_scale.set_cmap(cmap)
+        self.__fill_scale.set_clim(vmin=vmin, vmax=vmax)
+
+    def __blit_fill(self):
+        '''
+        Repaints the sonagram and the colour bar after the colours have changed by drawing the affected artists over
+        the existing canvas and blitting just that region to the screen.
+        '''
+        canvas = self._chart.canvas
+        if not self.__drawn or not getattr(canvas, 'supports_blit', False):
+            canvas.draw_idle()
+            return
+        artists = [self.__tcf]
+        for cs in self.__tc:
+            artists.extend([cs] if isinstance(cs, Artist) else cs.collections)
+        for axis in (self.__axes.xaxis, self.__axes.yaxis):
+            lo, hi = sorted(axis.get_view_interval())
+            ticks = axis.get_major_ticks(len(axis.get_majorticklocs())) + \
+                    axis.get_minor_ticks(len(axis.get_minorticklocs()))
+            artists.extend([t.gridline for t in ticks if lo <= t.get_loc() <= hi])
+        artists.extend(self.__axes.spines.values())
+        # the background is always drawn first, as it is in a full draw, regardless of its zorder
+        for a in [self.__axes.patch] + sorted(artists, key=lambda a: a.get_zorder()):
+            self.__axes.draw_artist(a)
+        # the crosshairs are drawn over a copy of the old image so make sure it is grabbed again
+        self.__scheduler.update_background(self.__axes)
+        cax = self._cb.ax
+        for a in [self._cb.solids, getattr(self._cb, 'outline', None)] + list(cax.spines.values()):
+            if a is not None:
+                cax.draw_artist(a)
+        canvas.blit(Bbox.union([self.__axes.bbox, cax.bbox]))
+
+    def __redraw_crosshairs(self):
+        '''
+        Moves the crosshairs to the cursor.
+        :return: true if they moved.
+        '''
+        cursor = self.cursor
+        if cursor is None or cursor == self.__drawn_crosshairs:
+            return False
+        self.__crosshair_h.set_ydata([cursor.y] * 2)
+        self.__crosshair_v.set_xdata([cursor.x] * 2)
+        self.__drawn_crosshairs = cursor
+        return True
 
     def recordDataCoords(self, event):
         '''
         Records the current location of the mouse
         :param event: the event.
         '''
-        if event is not None and self.__record_y and self.__dragging:
-            self.cursor_x = event.xdata
-            self.cursor_y = event.ydata
+        if event is not None and self.__record_y and self.__dragging \
+                and event.xdata is not None and event.ydata is not None:
+            self.cursor = Cursor(event.xdata, event.ydata)
+            self.__scheduler.request_draw(self)
+            if self.__cursor_listener is not None:
+                self.__cursor_listener(self.cursor)
 
     def enterAxes(self, event):
         '''
@@ -210,11 +423,11 @@ class ContourModel:
         :return:
         '''
         if self.__cid is None or len(self.__cid) == 0:
-            self.__cid.append(self.__chart.canvas.mpl_connect('motion_notify_event', self.recordDataCoords))
-            self.__cid.append(self.__chart.canvas.mpl_connect('button_press_event', self.depress))
-            self.__cid.append(self.__chart.canvas.mpl_connect('button_release_event', self.release))
-            self.__cid.append(self.__chart.canvas.mpl_connect('axes_enter_event', self.enterAxes))
-            self.__cid.append(self.__chart.canvas.mpl_connect('axes_leave_event', self.leaveAxes))
+            self.__cid.append(self._chart.canvas.mpl_connect('motion_notify_event', self.recordDataCoords))
+            self.__cid.append(self._chart.canvas.mpl_connect('button_press_event', self.depress))
+            self.__cid.append(self._chart.canvas.mpl_connect('button_release_event', self.release))
+            self.__cid.append(self._chart.canvas.mpl_connect('axes_enter_event', self.enterAxes))
+            self.__cid.append(self._chart.canvas.mpl_connect('axes_leave_event', self.leaveAxes))
 
     def depress(self, event):
         if not event.dblclick:
@@ -230,11 +443,18 @@ class ContourModel:
         '''
         if cmap_name != self.__selected_cmap:
             self.__selected_cmap = cmap_name
-            if self.__tcf:
-                cmap = self.__chart.get_colour_map(cmap_name)
+            if self.__image is not None:
+                vmax, vmin, _, fill_steps = self.__calculate_scales()
+                self.__update_image(vmin, vmax, fill_steps)
+                if draw:
+                    self.__blit_fill()
+                else:
+                    self.__cmap_changed = True
+            elif self.__tcf:
+                cmap = self._chart.get_colour_map(cmap_name)
                 self.__tcf.set_cmap(cmap)
                 if draw:
-                    self.__chart.canvas.draw_idle()
+                    self._chart.canvas.draw_idle()
                 else:
                     self.__cmap_changed = True
 
@@ -245,26 +465,24 @@ class ContourModel:
         if self.__tcf:
             if disconnect:
                 for cid in self.__cid:
-                    self.__chart.canvas.mpl_disconnect(cid)
+                    self._chart.canvas.mpl_disconnect(cid)
                 self.__cid = []
             self.stop_animation()
             self._cb.remove()
             self.__axes.clear()
             if self.__crosshair_axes is not None:
                 self.__crosshair_axes.clear()
-            self.__tc = None
+            self.__tc = []
             self.__tcf = None
+            self.__image = None
+            self.__fill_scale = None
             self.__init_chart(self.__subplot_spec)
             self.__refresh_data = True
             if draw:
-                self.__chart.canvas.draw_idle()
+                self._chart.canvas.draw_idle()
 
     def stop_animation(self):
         '''
         Stops the animation.
         '''
-        if self.__ani is not None:
-            logger.info(f"Stopping animation in {self.name}")
-            ani = self.__ani
-            self.__ani = None
-            ani._stop()
+        self.__scheduler.remove(self)
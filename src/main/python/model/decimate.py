@@ -0,0 +1,131 @@
+import logging
+
+import numpy as np
+
+from core.cache import VersionedCache
+
+logger = logging.getLogger('decimate')
+
+# the number of decimated data sets retained per axes, i.e. enough to flip between a few sizes and zoom levels
+DECIMATION_CACHE_SIZE = 8
+# the max number of elements processed at once, bounds the size of the temporary arrays used to find the extremes
+CHUNK_SIZE = 1024 * 1024
+
+
+def decimate(freqs, spl, pixels, fmin, fmax):
+    '''
+    Reduces a set of curves, which share a frequency axis, to the resolution of a log frequency axis that is pixels
+    wide and shows fmin to fmax. The axis is divided into one log spaced bucket per pixel, buckets which hold more than
+    2 points are reduced to the points with the min and max SPL (in frequency order) so peaks and notches survive while
+    sparsely populated buckets, i.e. typically the low frequencies, are left untouched. Points outside the visible range
+    are bucketed in the same way so panning does not reveal gaps before the data is decimated again.
+    :param freqs: the frequencies in ascending order.
+    :param spl: the SPL, either a single curve or an curves x frequencies array.
+    :param pixels: the width of the axis in pixels.
+    :param fmin: the lowest visible frequency.
+    :param fmax: the highest visible frequency.
+    :return: x, y with the same leading shape as spl, each curve has its own x as the extremes of each row can fall
+    at different frequencies.
+    '''
+    freqs = np.asarray(freqs, dtype=np.float64)
+    spl = np.asarray(spl, dtype=np.float64)
+    if freqs.size <= 2 * pixels or fmin <= 0 or fmax <= fmin:
+        return np.broadcast_to(freqs, spl.shape), spl
+    log_freqs = np.log10(np.maximum(freqs, np.finfo(np.float64).tiny))
+    buckets = np.floor((log_freqs - np.log10(fmin)) / (np.log10(fmax) - np.log10(fmin)) * pixels).astype(np.int64)
+    starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+    counts = np.diff(np.append(starts, freqs.size))
+    dense = counts > 2
+    if not np.any(dense):
+        return np.broadcast_to(freqs, spl.shape), spl
+    widths = np.where(dense, 2, counts)
+    offsets = np.cumsum(widths) - widths
+    rows = spl.reshape(-1, freqs.size)
+    idx = np.empty((rows.shape[0], int(widths.sum())), dtype=np.intp)
+    # points in sparse buckets keep their place in every row
+    bucket_of = np.repeat(np.arange(starts.size), counts)
+    kept = np.flatnonzero(~dense[bucket_of])
+    idx[:, offsets[bucket_of[kept]] + kept - starts[bucket_of[kept]]] = kept
+    # dense buckets are replaced by their extremes
+    chunk = max(1, CHUNK_SIZE // freqs.size)
+    for first in range(0, rows.shape[0], chunk):
+        block = rows[first:first + chunk]
+        lo = _arg_extreme(np.fmin, block, starts, counts)[:, dense]
+        hi = _arg_extreme(np.fmax, block, starts, counts)[:, dense]
+        idx[first:first + chunk, offsets[dense]] = np.minimum(lo, hi)
+        idx[first:first + chunk, offsets[dense] + 1] = np.maximum(lo, hi)
+    shape = spl.shape[:-1] + (idx.shape[1],)
+    return freqs[idx].reshape(shape), np.take_along_axis(rows, idx, axis=1).reshape(shape)
+
+
+def _arg_extreme(ufunc, rows, starts, counts):
+    '''
+    Finds the first position of the extreme value in each bucket of each row, nan is ignored unless the bucket holds
+    nothing else in which case the start of the bucket is used.
+    :param ufunc: np.fmin or np.fmax.
+    :param rows: the curves.
+    :param starts: the index of the first point in each bucket.
+    :param counts: the number of points in each bucket.
+    :return: the index of the extreme value, a curves x buckets array.
+    '''
+    extremes = np.repeat(ufunc.reduceat(rows, starts, axis=1), counts, axis=1)
+    missing = rows.shape[1]
+    candidates = np.where(rows == extremes, np.arange(rows.shape[1]), missing)
+    found = np.minimum.reduceat(candidates, starts, axis=1)
+    return np.where(found == missing, starts, found)
+
+
+class Decimator:
+    '''
+    Decimates the curves drawn on an axes to the resolution at which that axes is currently displayed. Decimated data
+    is cached against the data version and the resolution so it is only recalculated when the data changes or the axes
+    is resized or zoomed, in which case the owner is called back so it can replace the data in its artists.
+    '''
+
+    def __init__(self, axes, name, on_change):
+        '''
+        :param axes: the axes.
+        :param name: the name of the owning chart.
+        :param on_change: a no arg callable invoked when the resolution of the axes changes.
+        '''
+        self.__axes = axes
+        self.__name = name
+        self.__on_change = on_change
+        self.__cache = VersionedCache(f"{name}-decimation", max_entries=DECIMATION_CACHE_SIZE)
+        self.__resolution = None
+        self.__axes.figure.canvas.mpl_connect('resize_event', self.__check_resolution)
+        self.connect()
+
+    @property
+    def resolution(self):
+        ''' :return: the width of the axes in pixels and the visible frequency range. '''
+        left, right = self.__axes.get_xlim()
+        return max(1, int(round(self.__axes.bbox.width))), float(min(left, right)), float(max(left, right))
+
+    def connect(self):
+        '''
+        Listens for changes to the x limits of the axes, this must be called again after the axes is cleared as that
+        discards its callbacks.
+        '''
+        self.__axes.callbacks.connect('xlim_changed', self.__check_resolution)
+        self.__resolution = self.resolution
+
+    def get(self, version, key, freqs, spl):
+        '''
+        Gets the decimated data at the current resolution.
+        :param version: the version of the data.
+        :param key: identifies the data within that version.
+        :param freqs: the frequencies.
+        :param spl: the SPL, a single curve or a curves x frequencies array.
+        :return: x, y.
+        '''
+        resolution = self.resolution
+        self.__resolution = resolution
+        return self.__cache.get(version, (key, resolution), lambda: decimate(freqs, spl, *resolution))
+
+    def __check_resolution(self, *args):
+        resolution = self.resolution
+        if resolution != self.__resolution:
+            logger.debug(f"{self.__name} resolution changed from {self.__resolution} to {resolution}")
+            self.__resolution = resolution
+            self.__on_change()
@@ -1,6 +1,9 @@
 from PyQt5.QtWidgets import QDialog, QDialogButtonBox
 
-from model.preferences import DISPLAY_DB_RANGE, DISPLAY_COLOUR_MAP, DISPLAY_POLAR_360
+from core.measurement import NORMALISATION_REFERENCES, SMOOTHING_FRACTIONS, HORIZONTAL, VERTICAL, WINDOW_MAPPING
+from model.colours import get_colour_map_names
+from model.preferences import DISPLAY_DB_RANGE, DISPLAY_COLOUR_MAP, DISPLAY_POLAR_360, DISPLAY_SMOOTHING, \
+    IMPULSE_GATE_WINDOW, IMPULSE_GATE_MS
 from ui.display import Ui_displayControlsDialog
 
 
@@ -18,6 +21,10 @@ class DisplayModel:
         self.__colour_map = self.__preferences.get(DISPLAY_COLOUR_MAP)
         self.__locked = False
         self.__full_polar_range = self.__preferences.get(DISPLAY_POLAR_360)
+        self.__smoothing = self.__preferences.get(DISPLAY_SMOOTHING)
+        self.__gate_window = self.__preferences.get(IMPULSE_GATE_WINDOW)
+        self.__gate_length = self.__preferences.get(IMPULSE_GATE_MS)
+        self.__impulses = None
         self.results_charts = []
         self.measurement_model = None
 
@@ -28,7 +35,8 @@ class DisplayModel:
     def colour_map(self):
         return self.__colour_map
 
-    def accept(self, colour_map, db_range, is_normalised, normalisation_angle, full_polar_range):
+    def accept(self, colour_map, db_range, is_normalised, normalisation_angle, full_polar_range, smoothing,
+               plane=None, gate_window=None, gate_length=None):
         self.lock()
         should_refresh = False
         norm_change = False
@@ -62,8 +70,40 @@ class DisplayModel:
                 norm_change = True
                 should_refresh = True
 
-        if norm_change:
+        smoothing_change = False
+        if smoothing != self.__smoothing:
+            self.__smoothing = smoothing
+            self.__preferences.set(DISPLAY_SMOOTHING, smoothing)
+            smoothing_change = True
+            should_refresh = True
+
+        plane_change = plane is not None and plane != self.measurement_model.plane
+        if plane_change:
+            should_refresh = True
+
+        gate_change = False
+        if gate_window is not None and gate_window != self.__gate_window:
+            self.__gate_window = gate_window
+            self.__preferences.set(IMPULSE_GATE_WINDOW, gate_window)
+            gate_change = True
+        if gate_length is not None and gate_length != self.__gate_length:
+            self.__gate_length = gate_length
+            self.__preferences.set(IMPULSE_GATE_MS, gate_length)
+            gate_change = True
+        gate_change = gate_change and self.__impulses is not None
+        if gate_change:
+            should_refresh = True
+
+        # each of these invalidates all the derived data so one event covers them all
+        if gate_change:
+            # impulses cover a single plane so there is no plane to select after they are gated
+            self.__gate()
+        elif plane_change:
+            self.measurement_model.select_plane(plane)
+        elif norm_change:
             self.measurement_model.normalisation_changed()
+        elif smoothing_change:
+            self.measurement_model.smoothing_changed()
 
         self.unlock(should_refresh)
 
@@ -79,6 +119,36 @@ class DisplayModel:
     def normalisation_angle(self):
         return self.__normalisation_angle
 
+    @property
+    def smoothing(self):
+        ''' :return: the fractional octave smoothing as the denominator of the fraction, 0 if unsmoothed. '''
+        return self.__smoothing
+
+    @property
+    def gate_window(self):
+        ''' :return: the window used to gate impulse responses. '''
+        return self.__gate_window
+
+    @property
+    def gate_length(self):
+        ''' :return: the length of the gate, in ms after the peak, applied to impulse responses. '''
+        return self.__gate_length
+
+    @property
+    def impulses(self):
+        ''' :return: the impulse responses the measurements were derived from, if any. '''
+        return self.__impulses
+
+    @impulses.setter
+    def impulses(self, impulses):
+        self.__impulses = impulses
+        if impulses is not None:
+            self.__gate()
+
+    def __gate(self):
+        ''' loads the impulses, gated with the current gate, into the measurement model. '''
+        self.measurement_model.load(self.__impulses.gate(self.__gate_window, self.__gate_length))
+
     @property
     def full_polar_range(self):
         return self.__full_polar_range
@@ -89,8 +159,8 @@ class DisplayModel:
 
     @visible_chart.setter
     def visible_chart(self, visible_chart):
-        if self.__visible_chart is not None and getattr(self.__visible_chart, 'hide', None) is not None:
-            self.__visible_chart.hide()
+        if self.__visible_chart is not None and getattr(self.__visible_chart, 'suspend', None) is not None:
+            self.__visible_chart.suspend()
         self.__visible_chart = visible_chart
         self.redraw_visible()
 
@@ -125,16 +195,39 @@ class DisplayControlDialog(QDialog, Ui_displayControlsDialog):
         self.normaliseCheckBox.setChecked(self.__display_model.normalised)
         for m in self.__measurement_model:
             self.normalisationAngle.addItem(str(m.h))
+        for name in NORMALISATION_REFERENCES.keys():
+            self.normalisationAngle.addItem(name)
         self.__select_combo(self.normalisationAngle, str(self.__display_model.normalisation_angle))
+        for fraction in SMOOTHING_FRACTIONS:
+            self.smoothing.addItem(f"1/{fraction}" if fraction else 'None', fraction)
+        self.smoothing.setCurrentIndex(max(0, self.smoothing.findData(self.__display_model.smoothing)))
+        for plane in self.__measurement_model.planes:
+            self.plane.addItem(self.__plane_name(plane), plane)
+        self.plane.setCurrentIndex(max(0, self.plane.findData(self.__measurement_model.plane)))
+        self.plane.setEnabled(self.plane.count() > 1)
+        for name in WINDOW_MAPPING.keys():
+            self.gateWindow.addItem(name)
+        self.__select_combo(self.gateWindow, self.__display_model.gate_window)
+        self.gateLength.setValue(self.__display_model.gate_length)
+        has_impulses = self.__display_model.impulses is not None
+        self.gateWindow.setEnabled(has_impulses)
+        self.gateLength.setEnabled(has_impulses)
         stored_idx = 0
-        from app import cms_by_name
-        for idx, (name, cm) in enumerate(cms_by_name.items()):
+        for idx, name in enumerate(get_colour_map_names()):
             self.colourMapSelector.addItem(name)
             if name == self.__display_model.colour_map:
                 stored_idx = idx
         self.colourMapSelector.setCurrentIndex(stored_idx)
         self.buttonBox.button(QDialogButtonBox.Apply).clicked.connect(self.apply)
 
+    @staticmethod
+    def __plane_name(plane):
+        if plane == HORIZONTAL:
+            return 'Horizontal'
+        if plane == VERTICAL:
+            return 'Vertical'
+        return f"{plane}\N{DEGREE SIGN}"
+
     @staticmethod
     def __select_combo(combo, value):
         if value is not None:
@@ -152,4 +245,8 @@ class DisplayControlDialog(QDialog, Ui_displayControlsDialog):
                                         self.yAxisRange.value(),
                                         self.normaliseCheckBox.isChecked(),
                                         self.normalisationAngle.currentText(),
-                                        self.polarRange.isChecked())
+                                        self.polarRange.isChecked(),
+                                        self.smoothing.currentData(),
+                                        self.plane.currentData(),
+                                        self.gateWindow.currentText(),
+                                        self.gateLength.value())
@@ -0,0 +1,57 @@
+import logging
+import time
+
+logger = logging.getLogger('lazy')
+
+
+class LazyChartModel:
+    '''
+    Stands in for a chart model until its tab is first shown. The model is only created, and so only starts listening
+    to the measurement model, when it is first displayed which means a load costs nothing for a tab that has never been
+    opened. Changes to the display made before then are picked up when the model is created as it reads the current
+    values from the display model, the measurements are replayed to it as a single load by the measurement model.
+    '''
+
+    def __init__(self, chart, name, factory):
+        '''
+        :param chart: the MplWidget that owns the canvas onto which the chart will be drawn.
+        :param name: the name of the chart.
+        :param factory: a no arg callable which creates the chart model.
+        '''
+        self._chart = chart
+        self.name = name
+        self.__factory = factory
+        self.__model = None
+
+    def __repr__(self):
+        return self.name
+
+    @property
+    def model(self):
+        ''' :return: the chart model, None if it has not been created yet. '''
+        return self.__model
+
+    def __get_model(self):
+        if self.__model is None:
+            start = time.perf_counter()
+            self.__model = self.__factory()
+            logger.info(f"Created {self.name} in {round((time.perf_counter() - start) * 1000)}ms")
+        return self.__model
+
+    def display(self):
+        '''
+        Creates the model, if necessary, and displays it.
+        '''
+        self.__get_model().display()
+
+    def suspend(self):
+        if self.__model is not None and getattr(self.__model, 'suspend', None) is not None:
+            self.__model.suspend()
+
+    def update_decibel_range(self, draw=True):
+        if self.__model is not None:
+            self.__model.update_decibel_range(draw=draw)
+
+    def update_colour_map(self, cmap_name, draw=True):
+        if self.__model is not None and getattr(self.__model, 'update_colour_map', None) is not None:
+            self.__model.update_colour_map(cmap_name, draw=draw)
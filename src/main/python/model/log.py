@@ -42,6 +42,12 @@ class LogViewer(QMainWindow, Ui_logsForm):
         if level:
             self.__owner.change_level(level)
 
+    def showLatency(self):
+        '''
+        Shows the time taken by each listener to handle measurement model events.
+        '''
+        self.__owner.show_latency()
+
     def refresh(self, data):
         '''
         Refreshes the displayed data.
@@ -69,6 +75,7 @@ class RollingLogger(logging.Handler):
         self.__preferences = preferences
         self.__buffer = RingBuffer(self.__preferences.get(LOGGING_BUFFER_SIZE))
         self.__logWindow = None
+        self.__latency_source = None
         self.parent = parent
         self.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(funcName)s - %(message)s'))
         level = self.__preferences.get(LOGGING_LEVEL)
@@ -104,6 +111,22 @@ class RollingLogger(logging.Handler):
             self.__logWindow.refresh(self.__buffer)
             logging.info("Opening Log Viewer")
 
+    def set_latency_source(self, source):
+        '''
+        :param source: a no arg callable which formats the latency of each event listener.
+        '''
+        self.__latency_source = source
+
+    def show_latency(self):
+        '''
+        Writes the latency of each event listener to the log viewer.
+        '''
+        if self.__logWindow is not None:
+            if self.__latency_source is None:
+                self.__logWindow.appendMsg('No event latency is available')
+            else:
+                self.__logWindow.appendMsg(f"Event latency\n{self.__latency_source()}")
+
     def close_logs(self):
         '''
         Reacts to the closure of the window so we don't keep writing logs to something that doesn't exist.
@@ -1,30 +1,47 @@
 import logging
 
 import numpy as np
-from matplotlib import animation
-from qtpy import QtCore
-from qtpy.QtWidgets import QListWidgetItem
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
 
-from model import configureFreqAxisFormatting, format_axes_dbfs_hz, set_y_limits, SINGLE_SUBPLOT_SPEC, \
-    calculate_dBFS_Scales
-from model.measurement import CLEAR_MEASUREMENTS, LOAD_MEASUREMENTS
+from core.measurement import CLEAR_MEASUREMENTS, LOAD_MEASUREMENTS
+from core.scales import calculate_dBFS_Scales
+from model import configureFreqAxisFormatting, format_axes_dbfs_hz, set_y_limits, SINGLE_SUBPLOT_SPEC
+from model.decimate import Decimator
+from model.scheduler import get_scheduler
 
 logger = logging.getLogger('magnitude')
 
+# the max no of measurements which are named individually in the legend
+MAX_LEGEND_ENTRIES = 12
+
 
 class MagnitudeModel:
     '''
-    Allows a set of measurements to be displayed on a chart as magnitude responses.
+    Allows a set of measurements to be displayed on a chart as magnitude responses. The measurements are drawn as a
+    single LineCollection, so hundreds of curves cost little more to draw than one, while the computed curves (power
+    and DI) are drawn as individual lines, the DI on a secondary axis as it is a much smaller value. Every curve is
+    decimated to the resolution of the axes.
     '''
 
     def __init__(self, chart, measurement_model, display_model, model_listener=None,
                  subplot_spec=SINGLE_SUBPLOT_SPEC, show_legend=True, selector=None, depends_on=lambda: False):
-        self.__chart = chart
-        self.__axes = self.__chart.canvas.figure.add_subplot(subplot_spec)
+        self._chart = chart
+        self.__axes = self._chart.canvas.figure.add_subplot(subplot_spec)
+        self.__secondary_axes = self.__axes.twinx()
+        self.__secondary_axes.set_ylim(bottom=0, top=30)
         format_axes_dbfs_hz(self.__axes)
         self.__curves = {}
+        self.__collection = None
+        self.__names = []
+        self.__segments = None
+        self.__colours = None
+        self.__data = None
+        self.__version = None
+        self.__computed = []
         self.__refresh_data = False
         self.name = f"magnitude"
+        self.__decimator = Decimator(self.__axes, self.name, self.__on_resolution_change)
         self.__measurement_model = measurement_model
         self.__model_listener = model_listener
         self.__show_legend = show_legend
@@ -38,10 +55,29 @@ class MagnitudeModel:
 
     def set_visible(self):
         ''' ensures the visible curves tracks the contents of the selector '''
-        selected = [x.text() for x in self.__selector.selectedItems()]
+        self.__show_selected()
+        self._chart.canvas.draw_idle()
+
+    def __show_selected(self):
+        ''' shows the curves selected in the selector, or all of them if there is no selector. '''
+        if self.__selector is None:
+            return
+        selected = {x.text() for x in self.__selector.selectedItems()}
+        if self.__collection is not None:
+            mask = np.array([name in selected for name in self.__names], dtype=bool)
+            self.__collection.set_segments(self.__segments[mask])
+            self.__collection.set_color(self.__colours[mask])
         for name, curve in self.__curves.items():
             curve.set_visible(name in selected)
-        self.__chart.canvas.draw_idle()
+
+    def __on_resolution_change(self):
+        ''' replaces the curves with data decimated to the new size or zoom level of the axes. '''
+        if self.__collection is not None:
+            self.__update_collection(self.__data)
+            for measurement, axes, linestyle in self.__computed:
+                self._create_or_update_curve(measurement, axes, 'k', linestyle=linestyle)
+            self.__show_selected()
+            self._chart.canvas.draw_idle()
 
     def __repr__(self):
         return self.name
@@ -55,7 +91,7 @@ class MagnitudeModel:
         '''
         if draw:
             set_y_limits(self.__axes, self.__display_model.db_range)
-            self.__chart.canvas.draw_idle()
+            self._chart.canvas.draw_idle()
 
     def display(self):
         '''
@@ -64,23 +100,21 @@ class MagnitudeModel:
         # TODO might need to update the ylim even if we haven't refreshed
         if self.should_refresh():
             # pressure
-            data = self.__measurement_model.get_magnitude_data()
-            current_names = [x.display_name for x in data]
-            all_y = [x.y for x in data]
-            for idx, x in enumerate(data):
-                self._create_or_update_curve(x, self.__axes, self.__chart.get_colour(idx, len(self.__measurement_model)))
-            # power
-            power = self.__measurement_model.power_response
-            if power is not None:
-                self._create_or_update_curve(power, self.__axes, 'k')
-                all_y.append(power.y)
-                current_names.append(power.display_name)
-            # di
-            di = self.__measurement_model.di
-            if di is not None:
-                self._create_or_update_curve(di, self.__axes, 'k')
-                all_y.append(di.y)
-                current_names.append(di.display_name)
+            data = self.__measurement_model.get_directivity_data()
+            self.__version = self.__measurement_model.version
+            self.__data = data
+            self.__update_collection(data)
+            current_names = list(self.__names)
+            all_y = [data.spl.ravel()]
+            # power shares the SPL axis, di is relative to the power so is shown on the secondary axis
+            self.__computed = [c for c in ((self.__measurement_model.power_response, self.__axes, 'solid'),
+                                           (self.__measurement_model.di, self.__secondary_axes, 'dashed'))
+                               if c[0] is not None]
+            for measurement, axes, linestyle in self.__computed:
+                self._create_or_update_curve(measurement, axes, 'k', linestyle=linestyle)
+                if axes is self.__axes:
+                    all_y.append(measurement.y)
+                current_names.append(measurement.display_name)
             # scales
             self._update_y_lim(np.concatenate(all_y), self.__axes)
             # delete redundant data
@@ -88,43 +122,100 @@ class MagnitudeModel:
             for d in to_delete:
                 self.__curves[d].remove()
                 del self.__curves[d]
-                for item in self.__selector.findItems(d, QtCore.Qt.MatchExactly):
-                    self.__selector.takeItem(self.__selector.row(item))
             # legend
             if self.__show_legend:
-                lines = self.__curves.values()
-                if self.__axes.get_legend() is not None:
-                    self.__axes.get_legend().remove()
-                self.__axes.legend(lines, [l.get_label() for l in lines], loc=8, ncol=4, fancybox=True, shadow=True)
+                self.__update_legend(data)
             # selector
             if self.__selector is not None:
+                self.__update_selector(current_names)
                 self.__selector.selectAll()
             else:
-                self.__chart.canvas.draw_idle()
+                self._chart.canvas.draw_idle()
             self.__refresh_data = False
         else:
             ylim = self.__axes.get_ylim()
             if ylim[1] - ylim[0] != self.__display_model.db_range:
                 self.update_decibel_range()
 
+    def __update_collection(self, data):
+        '''
+        Replaces the contents of the collection with the measurements.
+        :param data: the measurements as a DirectivityMatrix.
+        '''
+        if self.__collection is None:
+            self.__axes.set_xscale('log')
+        self.__names = [x.display_name for x in data]
+        x, y = self.__decimator.get(self.__version, data.name, data.freqs, data.spl)
+        self.__segments = np.stack((x, y), axis=-1)
+        self.__colours = np.array([self._chart.get_colour(idx, len(data)) for idx in range(len(data))])
+        if self.__collection is None:
+            self.__collection = LineCollection(self.__segments, colors=self.__colours, linewidths=2,
+                                               antialiased=True, linestyle='solid')
+            self.__axes.add_collection(self.__collection, autolim=False)
+        else:
+            self.__collection.set_segments(self.__segments)
+            self.__collection.set_color(self.__colours)
+
+    def __update_legend(self, data):
+        '''
+        Shows each curve in the legend if there are only a few of them, otherwise the measurements are summarised as
+        a single entry.
+        :param data: the measurements.
+        '''
+        if self.__axes.get_legend() is not None:
+            self.__axes.get_legend().remove()
+        if len(self.__names) <= MAX_LEGEND_ENTRIES:
+            handles = [Line2D([], [], linewidth=2, color=c) for c in self.__colours]
+            labels = list(self.__names)
+        else:
+            handles = [Line2D([], [], linewidth=2, color=self.__colours[len(self.__colours) // 2])]
+            labels = [f"{data.name} x{len(self.__names)} ({data.angles[0]:g}\N{DEGREE SIGN} to "
+                      f"{data.angles[-1]:g}\N{DEGREE SIGN})"]
+        lines = list(self.__curves.values())
+        handles += lines
+        labels += [l.get_label() for l in lines]
+        self.__axes.legend(handles, labels, loc=8, ncol=4, fancybox=True, shadow=True)
+
+    def __update_selector(self, names):
+        '''
+        Ensures the selector lists exactly the given curves in the same order as the curves, existing items are
+        moved rather than recreated.
+        :param names: the curve names.
+        '''
+        wanted = set(names)
+        for row in reversed(range(self.__selector.count())):
+            if self.__selector.item(row).text() not in wanted:
+                self.__selector.takeItem(row)
+        # imported here as the selector is the only part of this chart which needs Qt
+        from qtpy.QtWidgets import QListWidgetItem
+        for idx, name in enumerate(names):
+            item = self.__selector.item(idx)
+            if item is not None and item.text() == name:
+                continue
+            row = next((r for r in range(idx + 1, self.__selector.count()) if self.__selector.item(r).text() == name),
+                       None)
+            self.__selector.insertItem(idx, QListWidgetItem(name) if row is None else self.__selector.takeItem(row))
+        # anything left over is a duplicate
+        while self.__selector.count() > len(names):
+            self.__selector.takeItem(len(names))
+
     def _update_y_lim(self, data, axes):
         configureFreqAxisFormatting(axes)
         ymax, ymin, _, _ = calculate_dBFS_Scales(data, max_range=self.__display_model.db_range)
         axes.set_ylim(bottom=ymin, top=ymax)
 
-    def _create_or_update_curve(self, data, axes, colour):
+    def _create_or_update_curve(self, data, axes, colour, linestyle='solid'):
+        x, y = self.__decimator.get(self.__version, data.display_name, data.x, data.y)
         curve = self.__curves.get(data.display_name, None)
         if curve:
-            curve.set_data(data.x, data.y)
+            curve.set_data(x, y)
         else:
-            self.__curves[data.display_name] = axes.semilogx(data.x, data.y,
+            self.__curves[data.display_name] = axes.semilogx(x, y,
                                                      linewidth=2,
                                                      antialiased=True,
-                                                     linestyle='solid',
+                                                     linestyle=linestyle,
                                                      color=colour,
                                                      label=data.display_name)[0]
-            if self.__selector is not None:
-                self.__selector.addItem(QListWidgetItem(data.display_name, self.__selector))
 
     def on_update(self, event_type, **kwargs):
         '''
@@ -146,31 +237,43 @@ class MagnitudeModel:
         clears the graph.
         '''
         self.__axes.clear()
+        self.__secondary_axes.clear()
+        self.__secondary_axes.set_ylim(bottom=0, top=30)
         self.__curves = {}
+        self.__collection = None
+        self.__names = []
+        self.__segments = None
+        self.__colours = None
+        self.__data = None
+        self.__computed = []
         format_axes_dbfs_hz(self.__axes)
+        self.__decimator.connect()
         if self.__selector is not None:
             self.__selector.clear()
 
 
 class AnimatedSingleLineMagnitudeModel:
     '''
-    Allows a single measurement from a selection of magnitude data to be displayed on a chart.
+    Allows a single measurement from a selection of magnitude data to be displayed on a chart. The curves are decimated
+    to the resolution of the axes while the marker values are read from the full resolution data.
     '''
 
     def __init__(self, chart, measurement_model, display_model, marker_data,
                  subplot_spec=SINGLE_SUBPLOT_SPEC, redraw_on_display=True):
         self._chart = chart
         self.__measurement_model = measurement_model
-        self.__measurement_model.register_listener(self)
         self.__axes = self._chart.canvas.figure.add_subplot(subplot_spec)
         self.__secondary_axes = self.__axes.twinx()
         self.__secondary_axes.set_ylim(bottom=0, top=30)
         format_axes_dbfs_hz(self.__axes)
         self.name = f"single-magnitude"
         self.__refresh_data = False
-        self.x_position = None
-        self.y_position = None
+        self.cursor = None
+        self.__version = None
+        self.__decimator = Decimator(self.__axes, self.name, self.__on_resolution_change)
         self.__pressure_data = None
+        self.__pressure_xy = None
+        self.__di_xy = None
         self.__pressure_curve = None
         self.__pressure_marker = None
         self.__power_data = None
@@ -180,11 +283,13 @@ class AnimatedSingleLineMagnitudeModel:
         self.__di_curve = None
         self.__di_marker = None
         self.__vline = None
-        self.__ani = None
+        self.__scheduler = get_scheduler(self._chart.canvas)
+        self.__drawn_indices = None
         self.__y_range_update_required = False
         self.__redraw_on_display = redraw_on_display
         self.__display_model = display_model
         self.__marker_data = marker_data
+        self.__measurement_model.register_listener(self)
 
     def __repr__(self):
         return self.name
@@ -198,10 +303,6 @@ class AnimatedSingleLineMagnitudeModel:
         '''
         self.__y_range_update_required = True
         set_y_limits(self.__axes, self.__display_model.db_range)
-        if self.__ani:
-            # have to clear the blit cache to get the r grid to redraw as per
-            # https://stackoverflow.com/questions/25021311/matplotlib-animation-updating-radial-view-limit-for-polar-plot
-            self.__ani._blit_cache.clear()
         if draw:
             self._chart.canvas.draw_idle()
             self.__y_range_update_required = False
@@ -215,23 +316,27 @@ class AnimatedSingleLineMagnitudeModel:
         if self.should_refresh():
             if self.__pressure_curve is None:
                 # pressure
-                self.__pressure_data = self.__measurement_model.get_magnitude_data()
+                self.__pressure_data = self.__measurement_model.get_directivity_data()
+                self.__version = self.__measurement_model.version
+                self.__drawn_indices = None
                 self.__pressure_curve = self.__axes.semilogx(self.__pressure_data[0].x,
                                                              [np.nan] * len(self.__pressure_data[0].x),
                                                              linewidth=2,
                                                              antialiased=True,
                                                              linestyle='solid')[0]
                 self.__pressure_marker = self.__axes.plot(0, 0, 'bo', markersize=8)[0]
-                all_data = [x.y for x in self.__pressure_data]
+                all_data = [self.__pressure_data.spl.ravel()]
+                self.__power_data = self.__measurement_model.power_response
+                self.__di_data = self.__measurement_model.get_di_data()
                 # directivity
-                if self.__di_data:
+                if self.__di_data is not None:
                     self.__di_curve = self.__secondary_axes.semilogx(self.__di_data[0].x,
                                                                     [np.nan] * len(self.__pressure_data[0].x),
                                                                     linewidth=2,
                                                                     antialiased=True,
                                                                     linestyle='--')[0]
                     self.__di_marker = self.__secondary_axes.plot(0, 0, 'bo', markersize=8)[0]
-                if self.__power_data:
+                if self.__power_data is not None:
                     # power
                     self.__power_curve = self.__axes.semilogx(self.__power_data.x,
                                                               self.__power_data.y,
@@ -241,6 +346,7 @@ class AnimatedSingleLineMagnitudeModel:
                                                               linestyle='solid')[0]
                     self.__power_marker = self.__axes.plot(0, 0, 'ko', markersize=8)[0]
                     all_data.append(self.__power_data.y)
+                self.__decimate()
                 # line
                 self.__vline = self.__axes.axvline(x=0, linewidth=2, color='gray', linestyle=':')
                 # scales
@@ -256,79 +362,75 @@ class AnimatedSingleLineMagnitudeModel:
                 if self.__y_range_update_required:
                     self.update_decibel_range(self.__redraw_on_display)
         # make sure we are animating
-        if self.__ani is None and self.__pressure_data is not None:
-            logger.info(f"Starting animation in {self.name}")
-            self.__ani = animation.FuncAnimation(self._chart.canvas.figure, self.redraw, interval=50,
-                                                 init_func=self.initAnimation, blit=True, save_count=50, repeat=False)
+        if self.__pressure_curve is not None and self not in self.__scheduler:
+            artists = [self.__pressure_curve, self.__pressure_marker]
+            if self.__power_data is not None:
+                artists += [self.__power_curve, self.__power_marker]
+            if self.__di_data is not None:
+                artists += [self.__di_curve, self.__di_marker]
+            artists.append(self.__vline)
+            self.__scheduler.add(self, artists, self.redraw)
         return redrew
 
-    def initAnimation(self):
-        '''
-        Inits a blank screen.
-        :return: the curve artist.
-        '''
-        self.__pressure_curve.set_ydata([np.nan] * len(self.__pressure_data[0].x))
-        vals = [self.__pressure_curve, self.__pressure_marker]
-        if self.__power_data:
-            vals.append(self.__power_curve)
-            vals.append(self.__power_marker)
-        if self.__di_data:
-            vals.append(self.__di_curve)
-            vals.append(self.__di_data)
-        vals.append(self.__vline)
-        return vals
-
-    def __find_nearest_xy(self, curve):
-        return np.argmax(curve.x >= self.x_position)
-
-    def redraw(self, frame, *fargs):
+    def __decimate(self):
+        ''' reduces the curves to the current resolution of the axes. '''
+        self.__pressure_xy = self.__decimator.get(self.__version, 'spl', self.__pressure_data.freqs,
+                                                  self.__pressure_data.spl)
+        if self.__di_data is not None:
+            self.__di_xy = self.__decimator.get(self.__version, 'di', self.__di_data.freqs, self.__di_data.spl)
+        if self.__power_data is not None:
+            self.__power_curve.set_data(*self.__decimator.get(self.__version, 'power', self.__power_data.x,
+                                                              self.__power_data.y))
+
+    def __on_resolution_change(self):
+        ''' replaces the curves with data decimated to the new size or zoom level of the axes. '''
+        if self.__pressure_curve is not None:
+            self.__decimate()
+            self.__drawn_indices = None
+            self.__scheduler.request_draw(self)
+
+    def redraw(self):
         '''
-        Redraws the graph based on the yPosition.
+        Redraws the graph based on the cursor position.
+        :return: true if the cursor has moved onto a different curve or frequency.
         '''
-        curve_data, curve_idx = self.find_nearest_xy_data()
-        if curve_idx != -1:
+        indices = self.find_nearest_indices()
+        if indices == self.__drawn_indices:
+            return False
+        if indices is not None:
+            curve_idx, idx = indices
             colour = self._chart.get_colour(curve_idx, len(self.__measurement_model))
-            self.__pressure_curve.set_ydata(curve_data.y)
+            freq = self.__pressure_data.freqs[idx]
+            spl = self.__pressure_data.spl[curve_idx]
+            self.__pressure_curve.set_data(self.__pressure_xy[0][curve_idx], self.__pressure_xy[1][curve_idx])
             self.__pressure_curve.set_color(colour)
-            idx = self.__find_nearest_xy(curve_data)
-            self.__pressure_marker.set_data(curve_data.x[idx], curve_data.y[idx])
-            self.__marker_data.freq = curve_data.x[idx]
-            self.__marker_data.spl = curve_data.y[idx]
+            self.__pressure_marker.set_data(freq, spl[idx])
+            self.__marker_data.freq = freq
+            self.__marker_data.spl = spl[idx]
             self.__pressure_marker.set_color(colour)
-            self.__vline.set_xdata([curve_data.x[idx], curve_data.x[idx]])
-            if self.__power_data:
-                di_y = (curve_data.y * curve_data.y) / self.__power_data.y
-                di_y += (0.0 - di_y[0])
-                self.__di_curve.set_ydata(di_y)
+            self.__vline.set_xdata([freq, freq])
+            if self.__power_data is not None:
+                di_y = self.__di_data.spl[curve_idx]
+                self.__di_curve.set_data(self.__di_xy[0][curve_idx], self.__di_xy[1][curve_idx])
                 self.__di_curve.set_color(colour)
                 self.__di_marker.set_color(colour)
-                self.__di_marker.set_data(curve_data.x[idx], di_y[idx])
-                self.__power_marker.set_data(curve_data.x[idx], self.__power_data.y[idx])
+                self.__di_marker.set_data(freq, di_y[idx])
+                self.__power_marker.set_data(freq, self.__power_data.y[idx])
                 self.__marker_data.di = di_y[idx]
                 self.__marker_data.power = self.__power_data.y[idx]
-        if self.__power_data:
-            return self.__pressure_curve, self.__pressure_marker, self.__power_curve, self.__power_marker, self.__di_curve, self.__di_marker, self.__vline
-        else:
-            return self.__pressure_curve, self.__pressure_marker, self.__vline
+        self.__drawn_indices = indices
+        return True
 
-    def find_nearest_xy_data(self):
+    def find_nearest_indices(self):
         '''
-        Searches the available data to find the curve that is the closest hAngle to our current yPosition.
-        :return: (curve_idx, curve_data) or (-1, None) if nothing is found.
+        Binary searches the data for the curve that is the closest hAngle to the cursor and the first frequency at or
+        above the cursor.
+        :return: (curve_idx, freq_idx) or None if there is no data or no cursor.
         '''
-        curve_idx = -1
-        curve_data = None
-        delta = 100000000
-        if self.y_position is not None:
-            for idx, x in enumerate(self.__pressure_data):
-                new_delta = abs(self.y_position - x.h)
-                if new_delta < delta:
-                    delta = new_delta
-                    curve_idx = idx
-                    curve_data = x
-                elif new_delta > delta:
-                    break
-        return curve_data, curve_idx
+        cursor = self.cursor
+        if self.__pressure_data is None or cursor is None:
+            return None
+        return self.__pressure_data.nearest_index_of(cursor.y), self.__pressure_data.freq_index_of(cursor.x)
 
     def on_update(self, type, **kwargs):
         '''
@@ -348,8 +450,13 @@ class AnimatedSingleLineMagnitudeModel:
         '''
         self.stop_animation()
         self.__axes.clear()
+        self.__secondary_axes.clear()
+        self.__secondary_axes.set_ylim(bottom=0, top=30)
         self.__pressure_curve = None
+        self.__pressure_xy = None
+        self.__di_xy = None
         format_axes_dbfs_hz(self.__axes)
+        self.__decimator.connect()
         if draw:
             self._chart.canvas.draw_idle()
 
@@ -357,9 +464,6 @@ class AnimatedSingleLineMagnitudeModel:
         '''
         Stops the animation.
         '''
-        if self.__ani is not None:
-            logger.info(f"Stopping animation in {self.name}")
-            ani = self.__ani
-            self.__ani = None
+        if self in self.__scheduler:
+            self.__scheduler.remove(self)
             self.__refresh_data = True
-            ani._stop()
@@ -1,13 +1,12 @@
 import logging
-from threading import Timer
-from time import sleep
 
-from matplotlib import animation
 from matplotlib.gridspec import GridSpec
 
 from model.contour import ContourModel
 from model.magnitude import AnimatedSingleLineMagnitudeModel
 from model.polar import PolarModel
+from model.preferences import DISPLAY_SUSPENDED_MEMORY_MB
+from model.scheduler import get_scheduler
 
 logger = logging.getLogger('multi')
 
@@ -39,6 +38,7 @@ class MultiChartModel:
     def __init__(self, chart, measurement_model, display_model, preferences):
         self.__chart = chart
         self.__measurement_model = measurement_model
+        self.__preferences = preferences
         self.name = f"multi"
         self.__data = MarkerData()
         gs = GridSpec(2, 3, width_ratios=[1, 1, 0.75])
@@ -46,14 +46,15 @@ class MultiChartModel:
                                                             self.__data, subplot_spec=gs.new_subplotspec((0, 0), 1, 2))
         self.__sonagram = ContourModel(self.__chart, self.__measurement_model, display_model, preferences,
                                        subplot_spec=gs.new_subplotspec((1, 0), 1, 2),
-                                       redraw_on_display=False, show_crosshairs=True)
+                                       redraw_on_display=False, show_crosshairs=True,
+                                       cursor_listener=self.propagate_cursor, name=f"{self.name}/contour")
         self.__polar = PolarModel(self.__chart, self.__measurement_model, display_model, self.__data,
                                   subplotSpec=gs.new_subplotspec((1, 2), 1, 1))
         self.__table_axes = self.__chart.canvas.figure.add_subplot(gs.new_subplotspec((0, 2), 1, 1))
         self.__table = None
-        self.__ani = None
-        self.__stopping = False
-        self.__mouse_reactor = MouseReactor(0.10, self.propagateCoords)
+        self.__drawn_table = None
+        self.__scheduler = get_scheduler(self.__chart.canvas)
+        self.__redraw_required = True
 
     def __repr__(self):
         return self.name
@@ -64,13 +65,22 @@ class MultiChartModel:
         :return: always true as the multi chart always redraws (otherwise you end up with lots of glitches like old
         charts being seen behind a new chart)
         '''
+        self.__scheduler.resume()
+        if not self.__redraw_required and not any(c.should_refresh() for c in self.__charts()):
+            # only the colours of the sonagram can have changed so let it repaint itself
+            self.__sonagram.display()
+            return True
         self.__magnitude.display()
         self.__polar.display()
         self.__sonagram.display()
         self.__init_table()
         self.__chart.canvas.draw_idle()
+        self.__redraw_required = False
         return True
 
+    def __charts(self):
+        return self.__magnitude, self.__polar, self.__sonagram
+
     def __init_table(self):
         ''' Initialises the table '''
         if self.__table is None:
@@ -94,93 +104,74 @@ class MultiChartModel:
                 else:
                     key_cell.visible_edges = 'RTB'
                     value_cell.visible_edges = 'TB'
-        if self.__ani is None:
-            logger.info(f"Starting animation in {self.name}")
-            self.__ani = animation.FuncAnimation(self.__chart.canvas.figure, self.redraw, interval=50,
-                                                 init_func=self.init_animation, blit=True, save_count=50, repeat=False)
-
-    def init_animation(self):
-        return self.__table,
-
-    def redraw(self, frame, *fargs):
-        for idx, value in enumerate(self.__data.as_table()):
-            self.__table[idx, 1].get_text().set_text(' ' if self.__stopping else value[1])
-        return self.__table,
-
-    def hide(self):
-        ''' Reacts to the chart no longer being visible by stopping the animation '''
-        logger.info(f"Hiding {self.name}")
-        self.__sonagram.clear(draw=False)
-        self.__polar.clear(draw=False)
-        self.__magnitude.clear(draw=False)
-        self.__stopping = True
-        self.stop_animation()
-        sleep(0.125)
-        self.__stopping = False
-        self.__chart.canvas.draw_idle()
+        # the table shows the values found by the other charts so it has to be updated after them
+        self.__drawn_table = None
+        self.__scheduler.add(self, (self.__table,), self.redraw)
+
+    def redraw(self):
+        '''
+        Updates the table with the values under the cursor.
+        :return: true if any value changed.
+        '''
+        table_data = self.__data.as_table()
+        if table_data == self.__drawn_table:
+            return False
+        for idx, value in enumerate(table_data):
+            self.__table[idx, 1].get_text().set_text(value[1])
+        self.__drawn_table = table_data
+        return True
+
+    def suspend(self):
+        '''
+        Reacts to the chart no longer being visible by pausing the animation. The charts are kept as they are so they
+        can be shown again immediately unless they hold more memory than the configured budget, in which case they
+        are cleared and rebuilt when next displayed.
+        '''
+        self.__scheduler.suspend()
+        retained = self.__sonagram.memory_usage + self.__polar.memory_usage
+        budget = self.__preferences.get(DISPLAY_SUSPENDED_MEMORY_MB) * 1024 * 1024
+        if retained > budget:
+            logger.info(f"Clearing {self.name} as it holds {retained} bytes, more than the {budget} byte budget")
+            self.__sonagram.clear(draw=False)
+            self.__polar.clear(draw=False)
+            self.__magnitude.clear(draw=False)
+            self.stop_animation()
+            self.__redraw_required = True
+        else:
+            logger.info(f"Suspending {self.name} holding {retained} bytes")
 
     def stop_animation(self):
         '''
         Stops the animation.
         '''
-        if self.__ani is not None:
-            logger.info(f"Stopping animation in {self.name}")
-            ani = self.__ani
-            self.__ani = None
-            ani._stop()
+        self.__scheduler.remove(self)
 
     def update_decibel_range(self, draw=True):
         '''
         Updates the decibel range on the charts.
         '''
-        # we have to redraw otherwise the grid & labels don't update properly because of blitting
-        self.__magnitude.clear()
-        self.__magnitude.update_decibel_range(draw=False)
-        self.__magnitude.__refresh_data = True
-        self.__magnitude.display()
-        self.__polar.update_decibel_range(draw=False)
-        self.__sonagram.update_decibel_range(draw=False)
+        for chart in self.__charts():
+            chart.update_decibel_range(draw=False)
+        # the grid & labels are outside the blitted areas so the whole canvas has to be redrawn
+        self.__redraw_required = True
         if draw:
             self.__chart.canvas.draw_idle()
 
-    def propagateCoords(self):
+    def update_colour_map(self, cmap_name, draw=True):
         '''
-        Propagates the mouse cursor position to the magnitude & polar models.
+        Updates the colour map used by the sonagram.
+        :param cmap_name: the cmap name.
         '''
-        if self.__sonagram.cursor_x is not None and self.__sonagram.cursor_y is not None:
-            if self.__magnitude.y_position != self.__sonagram.cursor_y:
-                self.__magnitude.x_position = self.__sonagram.cursor_x
-                self.__magnitude.y_position = self.__sonagram.cursor_y
-                self.__polar.xPosition = self.__sonagram.cursor_x
-                self.__polar.yPosition = self.__sonagram.cursor_y
+        self.__sonagram.update_colour_map(cmap_name, draw=draw)
 
+    def propagate_cursor(self, cursor):
+        '''
+        Propagates the mouse cursor position to the magnitude & polar models, they are redrawn on the next frame so any
+        further moves before then are coalesced into a single redraw.
+        :param cursor: the cursor.
+        '''
+        if cursor != self.__magnitude.cursor:
+            self.__magnitude.cursor = cursor
+            self.__polar.cursor = cursor
+            self.__scheduler.request_draw(self.__magnitude, self.__polar, self)
 
-class MouseReactor(object):
-    '''
-    A timer which updates the mouse position on the downstream charts periodically.
-    '''
-
-    def __init__(self, interval, function, *args, **kwargs):
-        self._timer = None
-        self.function = function
-        self.interval = interval
-        self.args = args
-        self.kwargs = kwargs
-        self.is_running = False
-        self.start()
-
-    def _run(self):
-        self.is_running = False
-        self.start()
-        self.function(*self.args, **self.kwargs)
-
-    def start(self):
-        if not self.is_running:
-            self._timer = Timer(self.interval, self._run)
-            self._timer.daemon = True
-            self._timer.start()
-            self.is_running = True
-
-    def stop(self):
-        self._timer.cancel()
-        self.is_running = False
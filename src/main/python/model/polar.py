@@ -2,11 +2,12 @@ import logging
 import math
 
 import numpy as np
-from matplotlib import animation
 from matplotlib.ticker import MultipleLocator, FuncFormatter
 
-from model import calculate_dBFS_Scales, SINGLE_SUBPLOT_SPEC, set_y_limits
-from model.measurement import REAL_WORLD_DATA, LOAD_MEASUREMENTS, CLEAR_MEASUREMENTS
+from core.measurement import REAL_WORLD_DATA, LOAD_MEASUREMENTS, CLEAR_MEASUREMENTS, nearest_index
+from core.scales import calculate_dBFS_Scales
+from model import SINGLE_SUBPLOT_SPEC, set_y_limits, Cursor
+from model.scheduler import get_scheduler
 
 logger = logging.getLogger('polar')
 
@@ -21,17 +22,19 @@ class PolarModel:
         self._chart = chart
         self._axes = self._chart.canvas.figure.add_subplot(subplotSpec, projection='polar')
         self.__init_axes()
-        self._data = {}
+        self._freqs = None
+        self._theta = None
+        self._r = None
         self._curve = None
         self._refreshData = False
         self.name = f"polar"
         self._measurementModel = measurement_model
         self._measurementModel.register_listener(self)
-        self.xPosition = 1000
-        self.yPosition = 0
+        self.cursor = Cursor(1000, 0)
         self._vline = None
         self._vmarker = None
-        self._ani = None
+        self._scheduler = get_scheduler(self._chart.canvas)
+        self._drawnIndices = None
         self._redrawOnDisplay = redrawOnDisplay
         self.__display_model = display_model
         self._y_range_update_required = False
@@ -44,16 +47,17 @@ class PolarModel:
     def should_refresh(self):
         return self._refreshData
 
+    @property
+    def memory_usage(self):
+        ''' :return: the size in bytes of the freq major copy of the data held by this chart. '''
+        return 0 if self._r is None else self._r.nbytes
+
     def update_decibel_range(self, draw=True):
         '''
         Updates the decibel range on the chart.
         '''
         self._y_range_update_required = True
         set_y_limits(self._axes, self.__display_model.db_range)
-        if self._ani:
-            # have to clear the blit cache to get the r grid to redraw as per
-            # https://stackoverflow.com/questions/25021311/matplotlib-animation-updating-radial-view-limit-for-polar-plot
-            self._ani._blit_cache.clear()
         if draw:
             self._chart.canvas.draw_idle()
             self._y_range_update_required = False
@@ -65,15 +69,13 @@ class PolarModel:
         '''
         redrew = False
         if self.should_refresh():
-            # convert x-y by theta data to theta-r by freq
-            xydata = self._measurementModel.get_magnitude_data()
-            self._data = {}
-            for idx, freq in enumerate(xydata[0].x):
-                theta, r = zip(*[(math.radians(x.h), x.y[idx]) for x in xydata])
-                self._data[freq] = (theta, r)
+            # store the angle x freq data freq major so each curve is a contiguous row
+            data = self._measurementModel.get_directivity_data()
+            self._freqs = data.freqs
+            self._theta = np.radians(data.angles)
+            self._r = np.ascontiguousarray(data.spl.T)
             self._axes.set_thetagrids(np.arange(0, 360, 15))
-            rmax, rmin, rsteps, _ = calculate_dBFS_Scales(np.concatenate([x[1] for x in self._data.values()]),
-                                                          max_range=self.__display_model.db_range)
+            rmax, rmin, rsteps, _ = calculate_dBFS_Scales(data.spl, max_range=self.__display_model.db_range)
             self._axes.set_rgrids(rsteps)
             # show degrees as +/- 180
             self._axes.xaxis.set_major_formatter(FuncFormatter(self.formatAngle))
@@ -86,6 +88,7 @@ class PolarModel:
             self._curve = self._axes.plot([math.radians(-180), math.radians(180)], [-200, -200], linewidth=2,
                                           antialiased=True, linestyle='solid', visible=False)[0]
             self._axes.set_ylim(bottom=rmin, top=rmax)
+            self._drawnIndices = None
             self._y_range_update_required = False
             self._refreshData = False
             redrew = True
@@ -93,10 +96,8 @@ class PolarModel:
             if self._axes is not None and self._y_range_update_required:
                 self.update_decibel_range(self._redrawOnDisplay)
         # make sure we are animating
-        if self._ani is None and self._curve is not None:
-            logger.info(f"Starting animation in {self.name}")
-            self._ani = animation.FuncAnimation(self._chart.canvas.figure, self.redraw, interval=50,
-                                                init_func=self.initAnimation, blit=True, save_count=50)
+        if self._curve is not None and self not in self._scheduler:
+            self._scheduler.add(self, (self._curve, self._vline, self._vmarker), self.redraw)
         return redrew
 
     def formatAngle(self, x, pos=None):
@@ -106,48 +107,39 @@ class PolarModel:
             deg = deg - 360
         return format_str.format(value=deg, digits=0)
 
-    def initAnimation(self):
-        '''
-        Inits a blank screen.
-        :return: the curve artist.
+    def redraw(self):
         '''
-        self._curve.set_ydata([-200, -200])
-        return self._curve,
-
-    def redraw(self, frame, *fargs):
+        Redraws the graph based on the cursor position.
+        :return: true if the cursor has moved onto a different curve or angle.
         '''
-        Redraws the graph based on the yPosition.
-        '''
-        curveIdx, curveData = self.findNearestData()
+        cursor = self.cursor
+        curveIdx = self.findNearestData(cursor)
+        idx = -1
+        if curveIdx != -1:
+            idx = min(int(np.searchsorted(self._theta, math.radians(cursor.y))), self._theta.size - 1)
+        if (curveIdx, idx) == self._drawnIndices:
+            return False
         if curveIdx != -1:
+            r = self._r[curveIdx]
             self._curve.set_visible(True)
-            self._curve.set_xdata(curveData[0])
-            self._curve.set_ydata(curveData[1])
-            self._curve.set_color(self._chart.get_colour(curveIdx, len(self._data.keys())))
+            self._curve.set_data(self._theta, r)
+            self._curve.set_color(self._chart.get_colour(curveIdx, self._freqs.size))
             self._vline.set_visible(True)
-            idx = np.argmax(np.array(curveData[0]) >= math.radians(self.yPosition))
-            self._vline.set_xdata([curveData[0][idx], curveData[0][idx]])
-            self._vmarker.set_data(curveData[0][idx], curveData[1][idx])
-            self.__marker_data.angle = self.formatAngle(curveData[0][idx])
-        return self._curve, self._vline, self._vmarker
+            self._vline.set_xdata([self._theta[idx], self._theta[idx]])
+            self._vmarker.set_data(self._theta[idx], r[idx])
+            self.__marker_data.angle = self.formatAngle(self._theta[idx])
+        self._drawnIndices = (curveIdx, idx)
+        return True
 
-    def findNearestData(self):
+    def findNearestData(self, cursor):
         '''
-        Searches the available data to find the curve that is the closest freq to our current xPosition.
-        :return: (curveIdx, curveData) or (-1, None) if nothing is found.
+        Binary searches the frequencies to find the curve that is the closest freq to the cursor.
+        :param cursor: the cursor.
+        :return: the index of the curve or -1 if there is no data.
         '''
-        curveIdx = -1
-        curveData = None
-        delta = 100000000
-        for idx, (freq, v) in enumerate(self._data.items()):
-            newDelta = abs(self.xPosition - freq)
-            if newDelta < delta:
-                delta = newDelta
-                curveIdx = idx
-                curveData = v
-            elif newDelta > delta:
-                break
-        return curveIdx, curveData
+        if self._freqs is None or self._freqs.size == 0:
+            return -1
+        return nearest_index(self._freqs, cursor.x)
 
     def on_update(self, type, **kwargs):
         '''
@@ -167,7 +159,9 @@ class PolarModel:
         '''
         self.stop_animation()
         self._axes.clear()
-        self._data = {}
+        self._freqs = None
+        self._theta = None
+        self._r = None
         self._curve = None
         self.__init_axes()
         self._refreshData = True
@@ -178,11 +172,7 @@ class PolarModel:
         '''
         Stops the animation.
         '''
-        if self._ani is not None:
-            logger.info(f"Stopping animation in {self.name}")
-            ani = self._ani
-            self._ani = None
-            ani._stop()
+        self._scheduler.remove(self)
 
     def __init_axes(self):
         self._axes.grid(linestyle='--', axis='y', alpha=0.7)
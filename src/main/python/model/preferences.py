@@ -3,19 +3,33 @@ LOGGING_BUFFER_SIZE = 'logging/buffer_size'
 DISPLAY_DB_RANGE = 'display/db_range'
 DISPLAY_COLOUR_MAP = 'display/colour_map'
 DISPLAY_POLAR_360 = 'display/polar_360'
+DISPLAY_SMOOTHING = 'display/smoothing'
+LOAD_CACHE_SIZE_MB = 'load/cache_size_mb'
+DISPLAY_SUSPENDED_MEMORY_MB = 'display/suspended_memory_mb'
+IMPULSE_GATE_WINDOW = 'impulse/gate_window'
+IMPULSE_GATE_MS = 'impulse/gate_ms'
 
 DEFAULT_PREFS = {
     LOGGING_LEVEL: 'INFO',
     LOGGING_BUFFER_SIZE: 5000,
     DISPLAY_DB_RANGE: 60,
     DISPLAY_COLOUR_MAP: 'bgyw',
-    DISPLAY_POLAR_360: False
+    DISPLAY_POLAR_360: False,
+    DISPLAY_SMOOTHING: 0,
+    LOAD_CACHE_SIZE_MB: 512,
+    DISPLAY_SUSPENDED_MEMORY_MB: 256,
+    IMPULSE_GATE_WINDOW: 'Tukey',
+    IMPULSE_GATE_MS: 10.0
 }
 
 TYPES = {
     DISPLAY_DB_RANGE: int,
     DISPLAY_POLAR_360: bool,
-    LOGGING_BUFFER_SIZE: int
+    DISPLAY_SMOOTHING: int,
+    LOGGING_BUFFER_SIZE: int,
+    LOAD_CACHE_SIZE_MB: int,
+    DISPLAY_SUSPENDED_MEMORY_MB: int,
+    IMPULSE_GATE_MS: float
 }
 
 
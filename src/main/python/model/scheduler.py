@@ -0,0 +1,177 @@
+import logging
+import weakref
+
+from matplotlib.transforms import Bbox
+
+logger = logging.getLogger('scheduler')
+
+# the minimum time between frames, i.e. a typical 60Hz display refresh rate
+FRAME_INTERVAL_MS = 16
+
+_schedulers = weakref.WeakKeyDictionary()
+
+
+def get_scheduler(canvas):
+    '''
+    Gets the scheduler which owns the animated artists on the canvas, creating it if necessary.
+    :param canvas: the canvas.
+    :return: the scheduler.
+    '''
+    scheduler = _schedulers.get(canvas, None)
+    if scheduler is None:
+        scheduler = BlitScheduler(canvas)
+        _schedulers[canvas] = scheduler
+    return scheduler
+
+
+class BlitScheduler:
+    '''
+    Draws the animated artists of every chart on a canvas from a single timer. Each chart registers its artists along
+    with an update function and requests a draw whenever the cursor or its data moves. The timer only runs while a
+    draw is pending, each tick updates the dirty sources, restores the background behind the regions they occupy,
+    redraws every animated artist in those regions and then blits them to the screen in one go.
+    '''
+
+    def __init__(self, canvas, interval=FRAME_INTERVAL_MS):
+        self.__canvas = canvas
+        self.__sources = {}
+        self.__dirty = set()
+        self.__backgrounds = {}
+        self.__timer = canvas.new_timer(interval=interval)
+        self.__timer.add_callback(self.tick)
+        self.__ticking = False
+        self.__suspended = False
+        self.ticks = 0
+        self.blits = 0
+        canvas.mpl_connect('draw_event', self.__on_draw)
+        canvas.mpl_connect('resize_event', self.__on_resize)
+
+    @property
+    def is_ticking(self):
+        return self.__ticking
+
+    def add(self, owner, artists, update):
+        '''
+        Registers some animated artists, sources are updated in the order in which they were added so a source which
+        is added again moves to the back of the queue.
+        :param owner: the owner of the artists.
+        :param artists: the artists.
+        :param update: a no arg callable which updates the artists and returns true if they need to be drawn.
+        '''
+        if self.__sources.pop(owner, None) is None:
+            logger.info(f"Animating {owner}")
+        for a in artists:
+            a.set_animated(True)
+        self.__sources[owner] = (update, list(artists))
+        self.request_draw(owner)
+
+    def remove(self, owner):
+        '''
+        Stops animating the artists owned by the owner.
+        :param owner: the owner.
+        '''
+        if self.__sources.pop(owner, None) is not None:
+            logger.info(f"Stopped animating {owner}")
+        self.__dirty.discard(owner)
+
+    def __contains__(self, owner):
+        return owner in self.__sources
+
+    def request_draw(self, *owners):
+        '''
+        Marks the artists as needing to be drawn on the next tick.
+        :param owners: the owners of the artists, every owner if none are specified.
+        '''
+        self.__dirty.update(o for o in (owners if owners else self.__sources.keys()) if o in self.__sources)
+        self.__start()
+
+    def suspend(self):
+        '''
+        Stops drawing while the canvas is hidden, any draws requested in the meantime are held until it is resumed.
+        '''
+        if not self.__suspended:
+            logger.info(f"Suspending animation of {len(self.__sources)} sources")
+            self.__suspended = True
+            self.__stop()
+
+    def resume(self):
+        ''' Starts drawing again after a suspend. '''
+        if self.__suspended:
+            logger.info(f"Resuming animation of {len(self.__sources)} sources")
+            self.__suspended = False
+            self.__start()
+
+    def __start(self):
+        if self.__dirty and not self.__ticking and not self.__suspended:
+            self.__ticking = True
+            self.__timer.start()
+
+    def __stop(self):
+        if self.__ticking:
+            self.__ticking = False
+            self.__timer.stop()
+
+    def tick(self):
+        '''
+        Draws the artists of every source which requested a draw, the timer is stopped once nothing is pending.
+        '''
+        self.ticks += 1
+        dirty = [(owner, source) for owner, source in self.__sources.items() if owner in self.__dirty]
+        self.__dirty = set()
+        regions = {}
+        for owner, (update, artists) in dirty:
+            if update():
+                regions.update(self.__get_regions(artists))
+        if regions:
+            if getattr(self.__canvas, 'supports_blit', False):
+                self.__draw_regions(regions)
+                self.__canvas.blit(Bbox.union(list(regions.values())))
+                self.blits += 1
+            else:
+                self.__canvas.draw_idle()
+        if not self.__dirty:
+            self.__stop()
+
+    def update_background(self, *axes):
+        '''
+        Grabs the background behind the given axes from the canvas after they have been drawn outside of a full draw
+        and then draws the animated artists on top, the caller is responsible for blitting the result.
+        :param axes: the axes.
+        '''
+        regions = {self.__get_region_key(ax): ax.bbox for ax in axes}
+        regions = {k: v for k, v in regions.items() if k in self.__backgrounds}
+        for key, bbox in regions.items():
+            self.__backgrounds[key] = self.__canvas.copy_from_bbox(bbox)
+        self.__draw_artists(regions)
+
+    def __on_draw(self, event):
+        ''' a full draw leaves out the animated artists so grab the new background and put them back. '''
+        regions = self.__get_regions(a for _, artists in self.__sources.values() for a in artists)
+        self.__backgrounds = {k: self.__canvas.copy_from_bbox(v) for k, v in regions.items()}
+        self.__draw_artists(regions)
+
+    def __on_resize(self, event):
+        ''' the old backgrounds no longer fit the canvas and are replaced when it is redrawn. '''
+        self.__backgrounds = {}
+
+    def __draw_regions(self, regions):
+        for key in regions.keys():
+            background = self.__backgrounds.get(key, None)
+            if background is not None:
+                self.__canvas.restore_region(background)
+        self.__draw_artists(regions)
+
+    def __draw_artists(self, regions):
+        ''' draws every animated artist that lies in the regions, as long as there is a background to draw it on. '''
+        artists = [a for _, artists in self.__sources.values() for a in artists
+                   if self.__get_region_key(a.axes) in regions and self.__get_region_key(a.axes) in self.__backgrounds]
+        for a in sorted(artists, key=lambda a: a.get_zorder()):
+            a.axes.draw_artist(a)
+
+    def __get_regions(self, artists):
+        return {self.__get_region_key(a.axes): a.axes.bbox for a in artists}
+
+    @staticmethod
+    def __get_region_key(axes):
+        ''' twinned axes share a region so the region is identified by its bounds. '''
+        return tuple(axes.bbox.bounds)
@@ -0,0 +1,58 @@
+import logging
+import time
+
+from qtpy.QtCore import QObject, QRunnable, Signal
+
+from core.load import LoadCancelled
+
+logger = logging.getLogger('worker')
+
+
+class LoadSignals(QObject):
+    '''
+    The signals emitted by a LoadWorker. Receivers living on the UI thread are invoked on the UI thread.
+    '''
+    progress = Signal(int)
+    loaded = Signal(object)
+    failed = Signal(object)
+    cancelled = Signal()
+
+
+class LoadWorker(QRunnable):
+    '''
+    Runs a loader, i.e. an NFSLoader, SphereLoader or ImpulseLoader, off the UI thread, the loaded data is passed back
+    via the loaded signal.
+    '''
+
+    def __init__(self, loader_factory):
+        '''
+        :param loader_factory: a callable which accepts a progress listener and returns the loader to run.
+        '''
+        super().__init__()
+        self.setAutoDelete(False)
+        self.signals = LoadSignals()
+        self.__loader = loader_factory(self.signals.progress.emit)
+
+    @property
+    def file(self):
+        return self.__loader.file
+
+    def cancel(self):
+        '''
+        Requests that the load stops as soon as possible.
+        '''
+        self.__loader.cancel()
+
+    def run(self):
+        start = time.time()
+        try:
+            measurements = self.__loader.load()
+        except LoadCancelled:
+            logger.info(f"Cancelled load of {self.file}")
+            self.signals.cancelled.emit()
+        except Exception as e:
+            logger.exception(f"Unable to load {self.file}")
+            self.signals.failed.emit(e)
+        else:
+            logger.info(f"Loaded {self.file} in {round((time.time() - start) * 1000)}ms")
+            self.signals.loaded.emit(measurements)
@@ -13,7 +13,7 @@ from PyQt5 import QtCore, QtGui, QtWidgets
 class Ui_displayControlsDialog(object):
     def setupUi(self, displayControlsDialog):
         displayControlsDialog.setObjectName("displayControlsDialog")
-        displayControlsDialog.resize(302, 188)
+        displayControlsDialog.resize(302, 240)
         self.gridLayout = QtWidgets.QGridLayout(displayControlsDialog)
         self.gridLayout.setObjectName("gridLayout")
         self.buttonBox = QtWidgets.QDialogButtonBox(displayControlsDialog)
@@ -55,6 +55,35 @@ class Ui_displayControlsDialog(object):
         self.polarRange = QtWidgets.QCheckBox(displayControlsDialog)
         self.polarRange.setObjectName("polarRange")
         self.formLayout.setWidget(0, QtWidgets.QFormLayout.FieldRole, self.polarRange)
+        self.smoothingLabel = QtWidgets.QLabel(displayControlsDialog)
+        self.smoothingLabel.setObjectName("smoothingLabel")
+        self.formLayout.setWidget(5, QtWidgets.QFormLayout.LabelRole, self.smoothingLabel)
+        self.smoothing = QtWidgets.QComboBox(displayControlsDialog)
+        self.smoothing.setObjectName("smoothing")
+        self.formLayout.setWidget(5, QtWidgets.QFormLayout.FieldRole, self.smoothing)
+        self.planeLabel = QtWidgets.QLabel(displayControlsDialog)
+        self.planeLabel.setObjectName("planeLabel")
+        self.formLayout.setWidget(6, QtWidgets.QFormLayout.LabelRole, self.planeLabel)
+        self.plane = QtWidgets.QComboBox(displayControlsDialog)
+        self.plane.setObjectName("plane")
+        self.formLayout.setWidget(6, QtWidgets.QFormLayout.FieldRole, self.plane)
+        self.gateWindowLabel = QtWidgets.QLabel(displayControlsDialog)
+        self.gateWindowLabel.setObjectName("gateWindowLabel")
+        self.formLayout.setWidget(7, QtWidgets.QFormLayout.LabelRole, self.gateWindowLabel)
+        self.gateWindow = QtWidgets.QComboBox(displayControlsDialog)
+        self.gateWindow.setObjectName("gateWindow")
+        self.formLayout.setWidget(7, QtWidgets.QFormLayout.FieldRole, self.gateWindow)
+        self.gateLengthLabel = QtWidgets.QLabel(displayControlsDialog)
+        self.gateLengthLabel.setObjectName("gateLengthLabel")
+        self.formLayout.setWidget(8, QtWidgets.QFormLayout.LabelRole, self.gateLengthLabel)
+        self.gateLength = QtWidgets.QDoubleSpinBox(displayControlsDialog)
+        self.gateLength.setDecimals(1)
+        self.gateLength.setMinimum(0.5)
+        self.gateLength.setMaximum(500.0)
+        self.gateLength.setSingleStep(0.5)
+        self.gateLength.setProperty("value", 10.0)
+        self.gateLength.setObjectName("gateLength")
+        self.formLayout.setWidget(8, QtWidgets.QFormLayout.FieldRole, self.gateLength)
         self.gridLayout.addLayout(self.formLayout, 0, 0, 1, 1)
 
         self.retranslateUi(displayControlsDialog)
@@ -73,3 +102,8 @@ class Ui_displayControlsDialog(object):
         self.normalisationAngle.setItemText(0, _translate("displayControlsDialog", "0"))
         self.polarRangeLabel.setText(_translate("displayControlsDialog", "Polar Range"))
         self.polarRange.setText(_translate("displayControlsDialog", "+/- 180?"))
+        self.smoothingLabel.setText(_translate("displayControlsDialog", "Smoothing"))
+        self.planeLabel.setText(_translate("displayControlsDialog", "Plane"))
+        self.gateWindowLabel.setText(_translate("displayControlsDialog", "Gate Window"))
+        self.gateLengthLabel.setText(_translate("displayControlsDialog", "Gate Length"))
+        self.gateLength.setSuffix(_translate("displayControlsDialog", " ms"))
@@ -45,6 +45,9 @@ class Ui_logsForm(object):
         self.logLevel.addItem("")
         self.logLevel.addItem("")
         self.gridLayout.addWidget(self.logLevel, 1, 1, 1, 1)
+        self.eventLatency = QtWidgets.QPushButton(self.centralwidget)
+        self.eventLatency.setObjectName("eventLatency")
+        self.gridLayout.addWidget(self.eventLatency, 2, 1, 1, 1)
         self.logViewer = QtWidgets.QPlainTextEdit(self.centralwidget)
         font = QtGui.QFont()
         font.setFamily("Consolas")
@@ -52,12 +55,13 @@ class Ui_logsForm(object):
         self.logViewer.setFont(font)
         self.logViewer.setReadOnly(True)
         self.logViewer.setObjectName("logViewer")
-        self.gridLayout.addWidget(self.logViewer, 2, 0, 1, 2)
+        self.gridLayout.addWidget(self.logViewer, 3, 0, 1, 2)
         logsForm.setCentralWidget(self.centralwidget)
 
         self.retranslateUi(logsForm)
         self.maxRows.valueChanged['int'].connect(logsForm.setLogSize)
         self.logLevel.currentTextChanged['QString'].connect(logsForm.setLogLevel)
+        self.eventLatency.clicked.connect(logsForm.showLatency)
         QtCore.QMetaObject.connectSlotsByName(logsForm)
 
     def retranslateUi(self, logsForm):
@@ -65,6 +69,7 @@ class Ui_logsForm(object):
         logsForm.setWindowTitle(_translate("logsForm", "Logs"))
         self.label.setText(_translate("logsForm", "Log Size"))
         self.label_2.setText(_translate("logsForm", "Log Level"))
+        self.eventLatency.setText(_translate("logsForm", "Event Latency"))
         self.logLevel.setCurrentText(_translate("logsForm", "DEBUG"))
         self.logLevel.setItemText(0, _translate("logsForm", "DEBUG"))
         self.logLevel.setItemText(1, _translate("logsForm", "INFO"))
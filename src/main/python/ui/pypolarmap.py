@@ -98,6 +98,11 @@ class Ui_MainWindow(object):
         MainWindow.setStatusBar(self.statusbar)
         self.actionLoad = QtWidgets.QAction(MainWindow)
         self.actionLoad.setObjectName("actionLoad")
+        self.actionLoad_Impulses = QtWidgets.QAction(MainWindow)
+        self.actionLoad_Impulses.setObjectName("actionLoad_Impulses")
+        self.actionCancel_Load = QtWidgets.QAction(MainWindow)
+        self.actionCancel_Load.setEnabled(False)
+        self.actionCancel_Load.setObjectName("actionCancel_Load")
         self.actionSave_Current_Image = QtWidgets.QAction(MainWindow)
         self.actionSave_Current_Image.setObjectName("actionSave_Current_Image")
         self.actionShow_Logs = QtWidgets.QAction(MainWindow)
@@ -107,6 +112,8 @@ class Ui_MainWindow(object):
         self.action_Display = QtWidgets.QAction(MainWindow)
         self.action_Display.setObjectName("action_Display")
         self.menuFile.addAction(self.actionLoad)
+        self.menuFile.addAction(self.actionLoad_Impulses)
+        self.menuFile.addAction(self.actionCancel_Load)
         self.menuFile.addAction(self.actionSave_Current_Image)
         self.menuHelp.addAction(self.actionShow_Logs)
         self.menuHelp.addAction(self.actionAbout)
@@ -136,6 +143,10 @@ class Ui_MainWindow(object):
         self.menuSettings.setTitle(_translate("MainWindow", "&Settings"))
         self.actionLoad.setText(_translate("MainWindow", "&Load"))
         self.actionLoad.setShortcut(_translate("MainWindow", "Ctrl+O"))
+        self.actionLoad_Impulses.setText(_translate("MainWindow", "Load &Impulse Responses"))
+        self.actionLoad_Impulses.setShortcut(_translate("MainWindow", "Ctrl+I"))
+        self.actionCancel_Load.setText(_translate("MainWindow", "&Cancel Load"))
+        self.actionCancel_Load.setShortcut(_translate("MainWindow", "Esc"))
         self.actionSave_Current_Image.setText(_translate("MainWindow", "Save &Chart"))
         self.actionSave_Current_Image.setShortcut(_translate("MainWindow", "Ctrl+S"))
         self.actionShow_Logs.setText(_translate("MainWindow", "Show &Logs"))
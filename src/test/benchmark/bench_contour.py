@@ -0,0 +1,67 @@
+'''
+Compares the time taken to render the sonagram from gridded data against the triangulated fallback.
+
+    PYTHONPATH=./src/main/python python src/test/benchmark/bench_contour.py [angles] [bins]
+'''
+import sys
+import time
+from types import SimpleNamespace
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+import numpy as np
+from matplotlib import cm
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from core.measurement import MeasurementModel, DirectivityMatrix
+from model.contour import ContourModel
+
+
+class HeadlessChart:
+    def __init__(self):
+        self.canvas = FigureCanvasAgg(Figure(figsize=(12, 6), dpi=100))
+
+    def get_colour_map(self, name):
+        return cm.get_cmap('viridis')
+
+
+class ShuffledMeasurementModel(MeasurementModel):
+    ''' presents the contour data in a random order so it cannot be treated as a grid '''
+
+    def get_contour_data(self):
+        data = super().get_contour_data()
+        order = np.random.default_rng(0).permutation(data['z'].size)
+        return {k: v[order] for k, v in data.items()}
+
+
+def make_data(angles, bins):
+    freqs = np.geomspace(20, 24000, bins)
+    h = np.linspace(-180, 180, angles)
+    spl = 90 - (h[:, None] / 30.0) ** 2 * np.log10(freqs)[None, :] / 2 + np.sin(freqs / 300)[None, :]
+    return DirectivityMatrix('NFS', h, freqs, spl)
+
+
+def render(model_type, data):
+    display_model = SimpleNamespace(db_range=60, normalised=False, normalisation_angle=0, smoothing=0)
+    model = model_type(display_model)
+    chart = HeadlessChart()
+    contour = ContourModel(chart, model, display_model, SimpleNamespace(get=lambda k: 'viridis'))
+    model.load(data)
+    start = time.perf_counter()
+    contour.display()
+    chart.canvas.draw()
+    return time.perf_counter() - start
+
+
+if __name__ == '__main__':
+    angles = int(sys.argv[1]) if len(sys.argv) > 1 else 181
+    bins = int(sys.argv[2]) if len(sys.argv) > 2 else 8192
+    data = make_data(angles, bins)
+    gridded = render(MeasurementModel, data)
+    print(f"gridded      {angles}x{bins}: {gridded:.2f}s")
+    triangulated = render(ShuffledMeasurementModel, data)
+    print(f"triangulated {angles}x{bins}: {triangulated:.2f}s")
+    print(f"speedup: {triangulated / gridded:.1f}x")
@@ -0,0 +1,50 @@
+'''
+Compares the time taken to import the Qt free core against the time taken to import the full UI, each import is timed
+in a fresh interpreter and the median of several runs is reported.
+
+    PYTHONPATH=./src/main/python python src/test/benchmark/bench_import.py [runs]
+'''
+import os
+import statistics
+import subprocess
+import sys
+
+PRESENTATION_MODULES = ('PyQt5', 'qtpy', 'matplotlib', 'scipy', 'colorcet')
+# the module imported for each target, the generated UI module is imported rather than app as it imports app itself
+TARGETS = {'numpy': 'numpy', 'core': 'core', 'ui': 'ui.pypolarmap'}
+
+TIMER = '''
+import sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+loaded = sorted({{m.split('.')[0] for m in sys.modules}} & set({presentation}))
+print(elapsed, ','.join(loaded))
+'''
+
+
+def time_import(module, runs):
+    '''
+    :param module: the module to import.
+    :param runs: the number of times to import it.
+    :return: the median import time in seconds, the presentation layer modules the import pulled in.
+    '''
+    timings = []
+    loaded = ''
+    env = {**os.environ, 'QT_QPA_PLATFORM': 'offscreen'}
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', TIMER.format(module=module, presentation=PRESENTATION_MODULES)],
+                             check=True, capture_output=True, text=True, env=env).stdout.split()
+        timings.append(float(out[0]))
+        loaded = out[1] if len(out) > 1 else ''
+    return statistics.median(timings), loaded
+
+
+if __name__ == '__main__':
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    results = {name: time_import(module, runs) for name, module in TARGETS.items()}
+    for name, (elapsed, loaded) in results.items():
+        print(f"{name:<6} {elapsed * 1000:7.0f}ms  {loaded or '-'}")
+    print(f"core imports in {results['core'][0] / results['ui'][0]:.0%} of the time taken by the UI")
+    if results['core'][1]:
+        sys.exit(f"core imported {results['core'][1]}")
@@ -0,0 +1,48 @@
+'''
+Times a cold start of the application, i.e. from a fresh interpreter to the main window being shown, the median of
+several runs is reported along with whether colorcet had been imported by the time the window was shown.
+
+    PYTHONPATH=./src/main/python python src/test/benchmark/bench_startup.py [runs]
+'''
+import os
+import statistics
+import subprocess
+import sys
+
+STARTUP = '''
+import time
+start = time.perf_counter()
+import sys
+from qtpy.QtWidgets import QApplication
+qapp = QApplication([])
+# the generated UI module imports app itself so app cannot be imported first
+import ui.pypolarmap
+from app import PyPolarmap
+form = PyPolarmap(qapp)
+form.show()
+qapp.processEvents()
+print(time.perf_counter() - start, 'colorcet' in sys.modules)
+'''
+
+
+def time_startup(runs):
+    '''
+    :param runs: the number of times to start the application.
+    :return: the time taken by each start in seconds, whether colorcet was imported during startup.
+    '''
+    timings = []
+    colorcet = False
+    env = {**os.environ, 'QT_QPA_PLATFORM': os.environ.get('QT_QPA_PLATFORM', 'offscreen')}
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, '-c', STARTUP], check=True, capture_output=True, text=True,
+                             env=env).stdout.split()
+        timings.append(float(out[0]))
+        colorcet = out[1] == 'True'
+    return timings, colorcet
+
+
+if __name__ == '__main__':
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    timings, colorcet = time_startup(runs)
+    print(f"window shown in {statistics.median(timings) * 1000:.0f}ms (median of {runs}, "
+          f"min {min(timings) * 1000:.0f}ms), colorcet imported: {colorcet}")
@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+import core
+from core import AnalysisOptions, DirectivityMatrix, MeasurementModel, load_files
+
+
+def test_core_does_not_import_the_presentation_layer():
+    script = 'import sys, core; print(",".join(sorted({m.split(".")[0] for m in sys.modules})))'
+    out = subprocess.run([sys.executable, '-c', script], check=True, capture_output=True, text=True,
+                         env={**os.environ, 'PYTHONPATH': os.pathsep.join(sys.path)}).stdout.strip().split(',')
+    assert not {'PyQt5', 'qtpy', 'matplotlib', 'scipy', 'colorcet', 'model', 'ui'} & set(out)
+
+
+def test_api_is_exported():
+    for name in core.__all__:
+        assert getattr(core, name) is not None
+
+
+def test_model_without_a_display_model():
+    freqs = np.geomspace(20, 20000, 50)
+    angles = np.arange(-180, 190, 10)
+    model = MeasurementModel()
+    model.load(DirectivityMatrix('NFS', angles, freqs, 90 - np.abs(angles)[:, None] / 10 + 0 * freqs[None, :]))
+    assert model.get_sound_power().shape == freqs.shape
+    assert np.allclose(model.get_directivity_data().spl[18], 90)
+    options = AnalysisOptions(normalised=True, normalisation_angle=0)
+    normalised = MeasurementModel(options)
+    normalised.load(model.matrix)
+    assert np.allclose(normalised.get_directivity_data().spl[18], 0)
+
+
+def test_load_files(tmp_path):
+    file = tmp_path / 'nfs.txt'
+    file.write_text('Directivity\nOn-Axis\t\t10 deg\t\n'
+                    'Frequency [Hz]\tSPL [dB]\tFrequency [Hz]\tSPL [dB]\n'
+                    '20\t90\t20\t89\n'
+                    '20000\t88\t20000\t80\n')
+    measurements = load_files([str(file)])
+    assert [m.h for m in measurements] == [-10, 0, 10]
@@ -0,0 +1,68 @@
+import os
+
+import numpy as np
+
+from core.cache import FileCache
+from core.load import NFSLoader
+
+
+def write_nfs(path, offset=0.0, rows=100):
+    with open(path, 'w') as fp:
+        fp.write('Directivity\n"On-Axis"\t""\t"10 deg"\t""\nunits\n')
+        for f in np.linspace(20, 20000, rows):
+            fp.write(f'"{f:,.2f}"\t"{90 + offset:.2f}"\t"{f:,.2f}"\t"{80 + offset:.2f}"\n')
+    return str(path)
+
+
+def test_reload_is_served_from_cache(tmp_path):
+    cache = FileCache(str(tmp_path / 'cache'), 1024 * 1024)
+    file = write_nfs(tmp_path / 'nfs.txt')
+    first = NFSLoader(file, cache=cache).load()
+    assert len(cache) == 1
+    key = cache.fingerprint(file)
+    angles, data = cache.get(key)
+    assert angles == [0, 10]
+    assert isinstance(data, np.memmap)
+    second = NFSLoader(file, cache=cache).load()
+    assert [m.h for m in first] == [m.h for m in second]
+    for a, b in zip(first, second):
+        assert np.array_equal(a.x, b.x)
+        assert np.array_equal(a.y, b.y)
+
+
+def test_changed_file_invalidates_entry(tmp_path):
+    cache = FileCache(str(tmp_path / 'cache'), 1024 * 1024)
+    file = write_nfs(tmp_path / 'nfs.txt')
+    NFSLoader(file, cache=cache).load()
+    old_key = cache.fingerprint(file)
+    write_nfs(tmp_path / 'nfs.txt', offset=3.0)
+    assert cache.fingerprint(file) != old_key
+    assert cache.get(cache.fingerprint(file)) is None
+    measurements = NFSLoader(file, cache=cache).load()
+    assert np.allclose(measurements[1].y, 93.0)
+    assert len(cache) == 1
+    assert cache.get(old_key) is None
+
+
+def test_lru_eviction(tmp_path):
+    files = [write_nfs(tmp_path / f"nfs_{i}.txt", rows=1000) for i in range(3)]
+    # room for 2 entries only
+    cache = FileCache(str(tmp_path / 'cache'), 2 * (4 * 1000 * 8 + 1024))
+    NFSLoader(files[0], cache=cache).load()
+    NFSLoader(files[1], cache=cache).load()
+    # touch the first so the second is the least recently used
+    assert cache.get(cache.fingerprint(files[0])) is not None
+    NFSLoader(files[2], cache=cache).load()
+    assert len(cache) == 2
+    assert cache.size <= 2 * (4 * 1000 * 8 + 1024)
+    assert cache.get(cache.fingerprint(files[0])) is not None
+    assert cache.get(cache.fingerprint(files[1])) is None
+    assert cache.get(cache.fingerprint(files[2])) is not None
+    assert len([f for f in os.listdir(cache.cache_dir) if f.endswith('.npy')]) == 2
+
+
+def test_index_survives_restart(tmp_path):
+    file = write_nfs(tmp_path / 'nfs.txt')
+    NFSLoader(file, cache=FileCache(str(tmp_path / 'cache'), 1024 * 1024)).load()
+    cache = FileCache(str(tmp_path / 'cache'), 1024 * 1024)
+    assert cache.get(cache.fingerprint(file)) is not None
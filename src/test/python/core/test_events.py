@@ -0,0 +1,145 @@
+import pytest
+
+from core.events import EventBus, LatencyHistogram, VISIBLE_PRIORITY, DEFAULT_PRIORITY
+
+
+class Listener:
+    def __init__(self, name, log=None):
+        self.name = name
+        self.events = []
+        self.log = log
+
+    def __repr__(self):
+        return self.name
+
+    def on_update(self, event_type, **kwargs):
+        self.events.append((event_type, kwargs) if kwargs else event_type)
+        if self.log is not None:
+            self.log.append(self.name)
+
+
+class Scheduler:
+    def __init__(self):
+        self.pending = []
+
+    def __call__(self, callback):
+        self.pending.append(callback)
+
+    def tick(self):
+        callbacks, self.pending = self.pending, []
+        for c in callbacks:
+            c()
+
+
+def test_events_are_delivered_immediately_without_a_scheduler():
+    bus = EventBus()
+    a = Listener('a')
+    bus.register(a)
+    bus.post('LOAD')
+    bus.post('LOAD')
+    assert a.events == ['LOAD', 'LOAD']
+    assert bus.pending == 0
+
+
+def test_events_are_merged_within_a_tick():
+    scheduler = Scheduler()
+    bus = EventBus(scheduler=scheduler, resets=('CLEAR',))
+    a = Listener('a')
+    bus.register(a)
+    bus.post('LOAD')
+    bus.post('CLEAR')
+    bus.post('LOAD')
+    bus.post('LOAD')
+    bus.post('SELECT', idx=1)
+    bus.post('SELECT', idx=2)
+    assert a.events == []
+    assert len(scheduler.pending) == 1
+    scheduler.tick()
+    assert a.events == ['CLEAR', 'LOAD', ('SELECT', {'idx': 1}), ('SELECT', {'idx': 2})]
+    assert not scheduler.pending
+    bus.post('LOAD')
+    scheduler.tick()
+    assert a.events[-1] == 'LOAD'
+
+
+def test_hidden_listeners_are_deferred():
+    scheduler = Scheduler()
+    flushed = []
+    log = []
+    visible = Listener('visible', log)
+    hidden = Listener('hidden', log)
+    bus = EventBus(scheduler=scheduler, priority=lambda l: VISIBLE_PRIORITY if l is visible else DEFAULT_PRIORITY,
+                   on_flush=flushed.append)
+    bus.register(hidden)
+    bus.register(visible)
+    bus.post('LOAD')
+    scheduler.tick()
+    assert log == ['visible']
+    assert flushed == [VISIBLE_PRIORITY]
+    assert bus.pending == 1
+    # an event posted before the deferred delivery is merged into it
+    bus.post('LOAD')
+    scheduler.tick()
+    assert log == ['visible', 'visible']
+    scheduler.tick()
+    assert log == ['visible', 'visible', 'hidden']
+    assert hidden.events == ['LOAD']
+    assert flushed == [VISIBLE_PRIORITY, VISIBLE_PRIORITY, DEFAULT_PRIORITY]
+    assert bus.pending == 0
+
+
+def test_complete_flush():
+    scheduler = Scheduler()
+    log = []
+    a = Listener('a', log)
+    b = Listener('b', log)
+    bus = EventBus(scheduler=scheduler, priority=lambda l: 5 if l is a else 1)
+    bus.register(a)
+    bus.register(b)
+    bus.post('LOAD')
+    bus.flush(complete=True)
+    assert log == ['b', 'a']
+    assert bus.pending == 0
+
+
+def test_immediate_delivery_follows_priority():
+    log = []
+    a = Listener('a', log)
+    b = Listener('b', log)
+    bus = EventBus(priority=lambda l: 5 if l is a else 1)
+    bus.register(a)
+    bus.register(b)
+    bus.post('LOAD')
+    assert log == ['b', 'a']
+
+
+def test_latency_is_recorded_per_listener():
+    bus = EventBus()
+    a = Listener('a')
+    b = Listener('b')
+    bus.register(a)
+    bus.register(b)
+    bus.post('LOAD')
+    bus.send(a, 'LOAD')
+    assert [h.name for h in bus.latencies] == ['a', 'b']
+    assert [h.total for h in bus.latencies] == [2, 1]
+    table = bus.format_latencies().splitlines()
+    assert len(table) == 3
+    assert table[1].split()[:2] == ['a', '2']
+
+
+def test_latency_histogram():
+    h = LatencyHistogram('test', bounds=(1, 10), size=4)
+    assert h.mean is None
+    assert h.percentile(50) is None
+    for v in [0.5, 1, 5, 20, 50]:
+        h.add(v)
+    # the oldest sample has been dropped
+    assert len(h) == 4
+    assert h.total == 5
+    assert h.counts == [0, 2, 2]
+    assert h.max == 50
+    assert h.mean == pytest.approx(19)
+    assert h.percentile(50) == 5
+    assert h.percentile(100) == 50
+    assert h.percentile(0) == 1
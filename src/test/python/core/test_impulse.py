@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+from scipy.io import wavfile
+
+from core.impulse import ImpulseResponses, ImpulseLoader, angle_from_name, gate_window
+from core.measurement import VERTICAL
+
+FS = 48000
+
+
+def impulses(angles, delays, length=4800):
+    samples = np.zeros((len(angles), length))
+    for row, delay in enumerate(delays):
+        samples[row, delay] = 1.0 - row * 0.1
+        samples[row, delay + 48] = 0.25
+    return samples
+
+
+def test_impulses_are_aligned_before_the_earliest_peak():
+    irs = ImpulseResponses('test', [0, 10, 20], FS, impulses([0, 10, 20], [1000, 1010, 1020]))
+    assert irs.peak == 96
+    assert irs.samples.shape == (3, 4800 - 1000 + 96)
+    assert np.argmax(irs.samples[2]) == 96 + 20
+    assert not irs.samples.flags.writeable
+
+
+def test_gate_is_batched_and_mirrored():
+    irs = ImpulseResponses('test', [0, 10, 20], FS, impulses([0, 10, 20], [500, 500, 500]))
+    magnitude, phase = irs.gate('Rectangle', length_ms=0.5, left_ms=0.0, phase=True)
+    assert [m.h for m in magnitude] == [-20, -10, 0, 10, 20]
+    assert magnitude.freqs[0] > 0
+    assert magnitude.freqs.size == 512
+    assert phase.spl.shape == magnitude.spl.shape
+    # a rectangle shorter than the reflection leaves a single impulse, i.e. a flat response at its level
+    assert np.allclose(magnitude.spl[2], 0.0)
+    assert np.allclose(magnitude.spl[4], 20 * np.log10(0.8))
+    assert np.array_equal(magnitude.spl[0], magnitude.spl[4])
+
+
+def test_longer_gate_includes_the_reflection():
+    irs = ImpulseResponses('test', [0], FS, impulses([0], [500]))
+    short = irs.gate('Rectangle', length_ms=0.5, left_ms=0.0)
+    long = irs.gate('Rectangle', length_ms=5.0, left_ms=0.0)
+    assert np.ptp(short.spl[0]) < 1e-9
+    assert np.ptp(long.spl[0]) > 1.0
+
+
+def test_gating_is_cached():
+    irs = ImpulseResponses('test', [0, 10], FS, impulses([0, 10], [500, 510]))
+    first = irs.gate('Tukey', 10)
+    assert irs.gate('Tukey', 10.0) is first
+    assert irs.gate('Hann', 10) is not first
+    assert irs.gate('Tukey', 10) is first
+
+
+def test_unknown_window():
+    irs = ImpulseResponses('test', [0], FS, impulses([0], [500]))
+    with pytest.raises(ValueError):
+        irs.gate('Kaiser')
+
+
+def test_gate_window_is_asymmetric():
+    gate = gate_window('Hann', 10, 100)
+    assert gate.size == 110
+    assert gate[0] == 0.0
+    assert gate[10] == 1.0
+    assert np.all(np.diff(gate[10:]) <= 0)
+    assert gate_window('Hann', 0, 100).size == 100
+
+
+@pytest.mark.parametrize('name,angle', [
+    ('ir_0.wav', 0),
+    ('ir_-30deg.wav', -30),
+    ('speaker 2 +45.txt', 45),
+    ('On-Axis.wav', 0),
+    ('ir_7.5.txt', 7.5),
+])
+def test_angle_from_name(name, angle):
+    assert angle_from_name(name) == angle
+
+
+def test_angle_from_name_requires_a_number():
+    with pytest.raises(ValueError):
+        angle_from_name('impulse.wav')
+
+
+def test_load_wav_and_text(tmp_path):
+    samples = impulses([0, 10, 20], [300, 310, 320], length=2000)
+    wavfile.write(str(tmp_path / 'ir_0.wav'), FS, (samples[0] * 32767).astype(np.int16))
+    wavfile.write(str(tmp_path / 'ir_10.wav'), FS, samples[1].astype(np.float32))
+    times = np.arange(samples.shape[1]) / FS
+    np.savetxt(str(tmp_path / 'ir_20.txt'), np.column_stack((times, samples[2])), header='time sample')
+    files = [str(tmp_path / f) for f in ['ir_20.txt', 'ir_0.wav', 'ir_10.wav']]
+    progress = []
+    irs = ImpulseLoader(files, progress_listener=progress.append, plane=VERTICAL).load()
+    assert progress == [33, 66, 100]
+    assert irs.fs == FS
+    assert list(irs.angles) == [0, 10, 20]
+    assert np.argmax(irs.samples, axis=1).tolist() == [96, 106, 116]
+    assert irs.gate().plane == VERTICAL
+
+
+def test_text_without_time_needs_fs(tmp_path):
+    np.savetxt(str(tmp_path / 'ir_0.txt'), impulses([0], [100], length=500)[0])
+    with pytest.raises(ValueError):
+        ImpulseLoader([str(tmp_path / 'ir_0.txt')]).load()
+    assert ImpulseLoader([str(tmp_path / 'ir_0.txt')], fs=FS).load().fs == FS
+
+
+def test_mixed_sample_rates_are_rejected(tmp_path):
+    wavfile.write(str(tmp_path / 'ir_0.wav'), FS, np.zeros(100, dtype=np.float32))
+    wavfile.write(str(tmp_path / 'ir_10.wav'), 44100, np.zeros(100, dtype=np.float32))
+    with pytest.raises(ValueError):
+        ImpulseLoader([str(tmp_path / 'ir_0.wav'), str(tmp_path / 'ir_10.wav')]).load()
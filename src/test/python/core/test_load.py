@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+from core.load import NFSLoader, SphereLoader, guess_plane
+from core.measurement import SphericalMatrix, HORIZONTAL, VERTICAL
+
+FREQS = [20.0, 1000.0, 2500.5, 20000.0]
+
+
+def write_nfs(path, angles, quoted=False, newline='\n', thousands=False):
+    def q(v):
+        return f'"{v}"' if quoted else v
+
+    def fmt(v):
+        return f"{v:,}" if thousands else str(v)
+
+    header = [q('On-Axis' if a == 0 else f"{a} deg") + '\t' + q('') for a in angles]
+    units = [q('Frequency [Hz]') + '\t' + q('SPL [dB]')] * len(angles)
+    lines = ['Directivity', '\t'.join(header), '\t'.join(units)]
+    for f in FREQS:
+        lines.append('\t'.join(f"{q(fmt(f))}\t{q(fmt(spl_at(f, a)))}" for a in angles))
+    with open(path, 'w', newline='') as fp:
+        fp.write(newline.join(lines) + newline)
+    return str(path)
+
+
+def spl_at(freq, angle):
+    return round(90.0 - angle / 10.0 - freq / 10000.0, 4)
+
+
+@pytest.mark.parametrize('quoted,newline,thousands', [
+    (False, '\n', False),
+    (True, '\n', False),
+    (True, '\r\n', True),
+    (False, '\r\n', False),
+])
+def test_load_formats(tmp_path, quoted, newline, thousands):
+    file = write_nfs(tmp_path / 'nfs.txt', [0, 10, 20], quoted=quoted, newline=newline, thousands=thousands)
+    measurements = NFSLoader(file).load()
+    assert [m.h for m in measurements] == [-20, -10, 0, 10, 20]
+    for m in measurements:
+        assert np.array_equal(m.x, FREQS)
+        assert np.allclose(m.y, [spl_at(f, abs(m.h)) for f in FREQS])
+
+
+def test_load_without_mirror(tmp_path):
+    file = write_nfs(tmp_path / 'nfs.txt', [0, 10, -10], quoted=True)
+    measurements = NFSLoader(file).load()
+    assert [m.h for m in measurements] == [-10, 0, 10]
+
+
+def test_load_grows_buffer(tmp_path):
+    rows = 20000
+    freqs = np.linspace(1, 24000, rows)
+    with open(tmp_path / 'nfs.txt', 'w') as fp:
+        fp.write('Directivity\n"On-Axis"\t""\t"10 deg"\t""\nunits\n')
+        for f in freqs:
+            fp.write(f'"{f:,.4f}"\t"{f / 100:.4f}"\t"{f:,.4f}"\t"{f / 200:.4f}"\n')
+    measurements = NFSLoader(str(tmp_path / 'nfs.txt')).load()
+    assert len(measurements) == 3
+    assert measurements[1].x.size == rows
+    assert np.allclose(measurements[1].x, freqs, atol=1e-4)
+    assert np.allclose(measurements[1].y, freqs / 100, atol=1e-4)
+    assert np.allclose(measurements[2].y, freqs / 200, atol=1e-4)
+
+
+def test_not_an_nfs_file(tmp_path):
+    file = tmp_path / 'other.txt'
+    file.write_text('1\t2\n3\t4\n')
+    with pytest.raises(ValueError):
+        NFSLoader(str(file)).load()
+
+
+def test_ragged_rows_are_rejected(tmp_path):
+    file = write_nfs(tmp_path / 'nfs.txt', [0, 10])
+    with open(file, 'a') as fp:
+        fp.write('1\t2\t3\n')
+    with pytest.raises(ValueError):
+        NFSLoader(file).load()
+
+
+def test_load_vertical_plane(tmp_path):
+    file = write_nfs(tmp_path / 'nfs.txt', [0, 10])
+    measurements = NFSLoader(file, plane=VERTICAL).load()
+    assert measurements.plane == VERTICAL
+    assert [(m.h, m.v) for m in measurements] == [(0, -10), (0, 0), (0, 10)]
+
+
+def test_load_sphere(tmp_path):
+    horizontal = write_nfs(tmp_path / 'nfs_hor.txt', [0, 10, 20])
+    vertical = write_nfs(tmp_path / 'nfs_vert.txt', [0, 10, 20])
+    progress = []
+    sphere = SphereLoader([(VERTICAL, vertical), (HORIZONTAL, horizontal)], progress_listener=progress.append).load()
+    assert isinstance(sphere, SphericalMatrix)
+    assert sphere.planes.tolist() == [HORIZONTAL, VERTICAL]
+    assert sphere.shape == (2, 5, len(FREQS))
+    assert sphere.plane(VERTICAL)[0].display_name == 'NFS:H0V-20'
+    assert np.shares_memory(sphere.plane(VERTICAL).spl, sphere.spl)
+    assert progress[-1] == 100
+    assert progress == sorted(progress)
+
+
+def test_guess_plane():
+    assert guess_plane('/data/NS15_02a.txt') == HORIZONTAL
+    assert guess_plane('/data/NS15 horizontal.txt') == HORIZONTAL
+    assert guess_plane('/data/NS15_Vertical.txt') == VERTICAL
+    assert guess_plane('/data/NS15_phi30.txt') == 30
+    assert guess_plane('/data/NS15 plane=150.txt') == 150
@@ -0,0 +1,433 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from core.measurement import DirectivityMatrix, Measurement, MeasurementModel, LOAD_MEASUREMENTS, \
+    CLEAR_MEASUREMENTS, LISTENING_WINDOW, SOUND_POWER, listening_window, solid_angle_weights, sound_power, \
+    nearest_index, fractional_octave_smoothing, SphericalMatrix, spherical_weights, HORIZONTAL, VERTICAL, \
+    create_event_bus
+
+FREQS = np.array([100.0, 1000.0, 10000.0])
+
+
+class Listener:
+    def __init__(self):
+        self.events = []
+
+    def on_update(self, event_type, **kwargs):
+        self.events.append(event_type)
+
+
+def display_model(normalised=False, angle=0, smoothing=0):
+    return SimpleNamespace(normalised=normalised, normalisation_angle=angle, smoothing=smoothing)
+
+
+def make_matrix(angles=(-10, 0, 10)):
+    spl = np.array([[90.0 - abs(a) / 10 - i for i in range(FREQS.size)] for a in angles])
+    return DirectivityMatrix('NFS', list(angles), FREQS, spl)
+
+
+def test_matrix_sorts_angles():
+    matrix = DirectivityMatrix('NFS', [10, -10, 0], FREQS, np.array([[1.0] * 3, [2.0] * 3, [3.0] * 3]))
+    assert matrix.angles.tolist() == [-10, 0, 10]
+    assert matrix.spl[:, 0].tolist() == [2.0, 3.0, 1.0]
+    assert matrix.spl.flags['C_CONTIGUOUS']
+
+
+def test_matrix_is_read_only():
+    matrix = make_matrix()
+    for arr in (matrix.angles, matrix.freqs, matrix.spl, matrix[0].y):
+        with pytest.raises(ValueError):
+            arr[0] = 1
+
+
+def test_rows_view_the_matrix():
+    matrix = make_matrix()
+    assert len(matrix) == 3
+    assert [m.h for m in matrix] == [-10, 0, 10]
+    assert matrix[1].display_name == 'NFS:H0V0'
+    assert np.shares_memory(matrix[1].y, matrix.spl)
+    assert all(m.x is matrix.freqs for m in matrix)
+
+
+def test_shape_mismatch():
+    with pytest.raises(ValueError):
+        DirectivityMatrix('NFS', [0, 10], FREQS, np.zeros((3, 3)))
+
+
+def test_from_measurements_interpolates_onto_shared_freqs():
+    m1 = Measurement('NFS', h=0, freq=FREQS, spl=np.array([1.0, 2.0, 3.0]))
+    m2 = Measurement('NFS', h=10, freq=FREQS * 2, spl=np.array([1.0, 2.0, 3.0]))
+    matrix = DirectivityMatrix.from_measurements([m2, m1])
+    assert matrix.angles.tolist() == [0, 10]
+    assert np.array_equal(matrix.freqs, FREQS * 2)
+    assert np.allclose(matrix.spl[1], [1.0, 2.0, 3.0])
+
+
+def test_load_and_clear_propagate_events():
+    model = MeasurementModel(display_model())
+    listener = Listener()
+    model.register_listener(listener)
+    model.load(make_matrix())
+    assert len(model) == 3
+    assert model[0].h == -10
+    model.clear()
+    assert len(model) == 0
+    assert model.matrix is None
+    assert listener.events == [LOAD_MEASUREMENTS, CLEAR_MEASUREMENTS]
+
+
+def test_late_listener_is_sent_one_load():
+    model = MeasurementModel(display_model())
+    early = Listener()
+    model.register_listener(early)
+    late = Listener()
+    model.load(make_matrix())
+    model.load(make_matrix(angles=(-20, 0, 20)))
+    model.register_listener(late)
+    assert early.events == [LOAD_MEASUREMENTS, CLEAR_MEASUREMENTS, LOAD_MEASUREMENTS]
+    assert late.events == [LOAD_MEASUREMENTS]
+    model.clear()
+    cleared = Listener()
+    model.register_listener(cleared)
+    assert cleared.events == []
+
+
+def test_scheduled_events_are_merged():
+    callbacks = []
+    model = MeasurementModel(display_model(), event_bus=create_event_bus(scheduler=callbacks.append))
+    listener = Listener()
+    model.register_listener(listener)
+    model.load(make_matrix())
+    model.load(make_matrix(angles=(-20, 0, 20)))
+    model.normalisation_changed()
+    model.smoothing_changed()
+    assert listener.events == []
+    assert len(callbacks) == 1
+    callbacks.pop()()
+    # the clear made by the second load replaces the first load
+    assert listener.events == [CLEAR_MEASUREMENTS, LOAD_MEASUREMENTS]
+    assert model.event_bus.latencies[0].total == 2
+
+
+def test_load_list_of_measurements():
+    model = MeasurementModel(display_model())
+    model.load(list(make_matrix()))
+    assert isinstance(model.matrix, DirectivityMatrix)
+    assert model.matrix.shape == (3, 3)
+
+
+def test_contour_data():
+    model = MeasurementModel(display_model())
+    model.load(make_matrix())
+    data = model.get_contour_data()
+    assert data['x'].tolist() == FREQS.tolist() * 3
+    assert data['y'].tolist() == [-10] * 3 + [0] * 3 + [10] * 3
+    assert np.array_equal(data['z'], model.matrix.spl.ravel())
+
+
+def test_normalised_magnitude_data():
+    model = MeasurementModel(display_model(normalised=True, angle='0'))
+    model.load(make_matrix())
+    data = model.get_magnitude_data()
+    assert [m.h for m in data] == [-10, 0, 10]
+    assert np.allclose(data[1].y, 0.0)
+    assert np.allclose(data[0].y, -1.0)
+
+
+def test_derived_data_is_memoised_per_version():
+    model = MeasurementModel(display_model())
+    model.load(make_matrix())
+    v1 = model.version
+    assert model.get_contour_data() is model.get_contour_data()
+    assert model.get_magnitude_data() is model.get_magnitude_data()
+    assert model.get_directivity_data() is model.matrix
+    contour = model.get_contour_data()
+    model.load(make_matrix((0, 10, 20)))
+    assert model.version > v1
+    assert model.get_contour_data() is not contour
+    assert model.get_contour_data()['y'].tolist() == [0] * 3 + [10] * 3 + [20] * 3
+
+
+def test_normalisation_invalidates_derived_data():
+    dm = display_model()
+    model = MeasurementModel(dm)
+    model.load(make_matrix())
+    raw = model.get_magnitude_data()
+    dm.normalised = True
+    dm.normalisation_angle = '10'
+    model.normalisation_changed()
+    normalised = model.get_magnitude_data()
+    assert normalised is not raw
+    assert np.allclose(normalised[2].y, 0.0)
+    assert normalised is model.get_magnitude_data()
+
+
+def test_index_of():
+    matrix = make_matrix((-20, -10, 0, 10, 20))
+    assert matrix.index_of(-20) == 0
+    assert matrix.index_of(10.0) == 3
+    assert matrix.index_of(20) == 4
+    assert matrix.index_of(5) is None
+    assert matrix.index_of(30) is None
+
+
+def test_nearest_index_of():
+    matrix = make_matrix((-20, -10, 0, 10, 20))
+    assert matrix.nearest_index_of(-90) == 0
+    assert matrix.nearest_index_of(-14) == 1
+    assert matrix.nearest_index_of(-15) == 0
+    assert matrix.nearest_index_of(5) == 2
+    assert matrix.nearest_index_of(10) == 3
+    assert matrix.nearest_index_of(90) == 4
+    assert matrix.freq_index_of(1) == 0
+    assert matrix.freq_index_of(100) == 0
+    assert matrix.freq_index_of(101) == 1
+    assert matrix.freq_index_of(20000) == 2
+    assert nearest_index(FREQS, 5000) == 1
+    assert nearest_index(FREQS, 6000) == 2
+
+
+def test_normalised_data_is_cached_per_reference():
+    dm = display_model(normalised=True, angle='10')
+    model = MeasurementModel(dm)
+    model.load(make_matrix())
+    at_10 = model.get_directivity_data()
+    assert np.allclose(at_10.spl[2], 0.0)
+    dm.normalisation_angle = '0'
+    model.normalisation_changed()
+    at_0 = model.get_directivity_data()
+    assert np.allclose(at_0.spl[1], 0.0)
+    # switching back reuses the previously normalised data
+    dm.normalisation_angle = '10'
+    model.normalisation_changed()
+    assert model.get_directivity_data() is at_10
+    assert model.get_normalised_data(10) is at_10
+    # a reload discards it
+    model.load(make_matrix())
+    assert model.get_normalised_data(10) is not at_10
+
+
+def test_normalise_to_unknown_angle():
+    model = MeasurementModel(display_model(normalised=True, angle='45'))
+    model.load(make_matrix())
+    assert model.get_directivity_data() is model.matrix
+
+
+def test_listening_window():
+    freqs = np.array([100.0, 1000.0])
+    spl = np.array([[80.0, 80.0], [90.0, 90.0], [90.0, 90.0], [90.0, 90.0], [80.0, 80.0]])
+    matrix = DirectivityMatrix('NFS', [-60, -30, 0, 30, 60], freqs, spl)
+    assert np.allclose(listening_window(matrix), 90.0)
+    # power average, not dB average
+    spl = np.array([[90.0, 90.0], [80.0, 80.0]])
+    matrix = DirectivityMatrix('NFS', [0, 10], freqs, spl)
+    assert np.allclose(listening_window(matrix), 10 * np.log10((10 ** 9 + 10 ** 8) / 2))
+    model = MeasurementModel(display_model(normalised=True, angle=LISTENING_WINDOW))
+    model.load(matrix)
+    assert np.allclose(model.get_directivity_data().spl, spl - listening_window(matrix))
+
+
+def test_solid_angle_weights():
+    # a full circle of measurements every 10 degrees covers the sphere twice over, once per half
+    angles = np.arange(-180, 190, 10)
+    weights = solid_angle_weights(angles)
+    assert np.isclose(weights.sum(), 1.0)
+    assert np.allclose(weights, weights[::-1])
+    # the zone around the axis is far smaller than a zone around 90 degrees
+    assert weights[angles == 90][0] > 10 * weights[angles == 0][0]
+    # the weight is the solid angle of the zone
+    expected = 2 * np.pi * (np.cos(np.radians(85)) - np.cos(np.radians(95))) / (4 * np.pi) / 2
+    assert np.isclose(weights[angles == 90][0], expected)
+    # a single half is weighted as a whole sphere
+    assert np.isclose(solid_angle_weights(np.arange(0, 190, 10)).sum(), 1.0)
+
+
+def test_sound_power_of_omni_source_is_the_spl():
+    matrix = DirectivityMatrix('NFS', np.arange(-180, 190, 15), FREQS, np.full((25, FREQS.size), 85.0))
+    assert np.allclose(sound_power(matrix), 85.0)
+
+
+def test_power_and_di():
+    angles = np.arange(-180, 190, 10)
+    spl = np.array([[90.0 - abs(a) / 10 - i for i in range(FREQS.size)] for a in angles])
+    dm = display_model()
+    model = MeasurementModel(dm)
+    assert model.power_response is None
+    assert model.di is None
+    model.load(DirectivityMatrix('NFS', angles, FREQS, spl))
+    power = model.power_response
+    assert power.display_name == SOUND_POWER
+    assert np.allclose(power.y, sound_power(model.matrix))
+    di = model.get_di_data()
+    assert np.allclose(di.spl, spl - power.y)
+    assert np.allclose(model.di.y, di.spl[angles == 0][0])
+    assert model.di.y[0] > 0
+    assert model.power_response is power
+    assert model.get_di_data() is di
+    # normalisation shifts the power but not the DI
+    dm.normalised = True
+    dm.normalisation_angle = '0'
+    model.normalisation_changed()
+    assert np.allclose(model.power_response.y, -model.di.y)
+    assert model.get_di_data() is di
+    model.load(DirectivityMatrix('NFS', angles, FREQS, spl + 1))
+    assert model.get_di_data() is not di
+    model.clear()
+    assert model.power_response is None
+    assert model.get_di_data() is None
+
+
+def test_fractional_octave_smoothing():
+    freqs = np.geomspace(20, 20000, 500)
+    flat = np.full((2, freqs.size), 80.0)
+    assert np.allclose(fractional_octave_smoothing(freqs, flat, 6), 80.0)
+    # a narrow peak is spread across its neighbours and reduced in level
+    spl = flat.copy()
+    spl[0, 250] = 100.0
+    smoothed = fractional_octave_smoothing(freqs, spl, 3)
+    assert smoothed[0, 250] < 100.0
+    assert smoothed[0, 249] > 80.0
+    assert np.allclose(smoothed[1], 80.0)
+    # the average is taken in the power domain and matches a direct calculation
+    lo, hi = freqs[250] / 2 ** (1 / 6), freqs[250] * 2 ** (1 / 6)
+    window = spl[0, (freqs >= lo) & (freqs <= hi)]
+    assert np.isclose(smoothed[0, 250], 10 * np.log10(np.mean(10 ** (window / 10))))
+    # a narrower window retains more of the peak
+    assert fractional_octave_smoothing(freqs, spl, 48)[0, 250] > smoothed[0, 250]
+
+
+def test_smoothing_ignores_nan():
+    freqs = np.geomspace(20, 20000, 100)
+    spl = np.full((2, freqs.size), 80.0)
+    spl[0, 50] = np.nan
+    spl[1] = np.nan
+    smoothed = fractional_octave_smoothing(freqs, spl, 3)
+    assert np.allclose(smoothed[0], 80.0)
+    assert np.all(np.isnan(smoothed[1]))
+
+
+def test_smoothed_data_is_cached_per_width():
+    dm = display_model()
+    model = MeasurementModel(dm)
+    model.load(make_matrix())
+    raw = model.get_directivity_data()
+    dm.smoothing = 3
+    model.smoothing_changed()
+    third = model.get_directivity_data()
+    assert third is not raw
+    assert third is model.get_smoothed_data(3)
+    assert model.get_di_data() is not None
+    dm.smoothing = 12
+    model.smoothing_changed()
+    assert model.get_directivity_data() is not third
+    # switching back reuses the previously smoothed data
+    dm.smoothing = 3
+    model.smoothing_changed()
+    assert model.get_directivity_data() is third
+    dm.smoothing = 0
+    model.smoothing_changed()
+    assert model.get_directivity_data() is raw
+    # normalisation is applied to the smoothed data
+    dm.smoothing = 3
+    dm.normalised = True
+    dm.normalisation_angle = '0'
+    model.normalisation_changed()
+    assert np.allclose(model.get_directivity_data().spl, third.spl - third.spl[1])
+
+
+def make_sphere(planes=(HORIZONTAL, VERTICAL), angles=(-10, 0, 10)):
+    spl = np.array([[[90.0 - abs(a) / 10 - p / 10 - i for i in range(FREQS.size)] for a in angles] for p in planes])
+    return SphericalMatrix('NFS', list(planes), list(angles), FREQS, spl)
+
+
+def test_sphere_planes_view_the_data():
+    sphere = make_sphere((VERTICAL, HORIZONTAL))
+    assert sphere.planes.tolist() == [HORIZONTAL, VERTICAL]
+    assert sphere.spl.flags['C_CONTIGUOUS']
+    vertical = sphere.plane(VERTICAL)
+    assert vertical is sphere.plane(90.0)
+    assert np.shares_memory(vertical.spl, sphere.spl)
+    assert np.allclose(vertical.spl[1], [81.0, 80.0, 79.0])
+    assert [m.display_name for m in vertical] == ['NFS:H0V-10', 'NFS:H0V0', 'NFS:H0V10']
+    assert sphere.plane_index_of(45) is None
+    with pytest.raises(ValueError):
+        sphere.plane(45)
+    with pytest.raises(ValueError):
+        SphericalMatrix('NFS', [0, 0], [0], FREQS, np.zeros((2, 1, FREQS.size)))
+
+
+def test_sphere_from_planes():
+    horizontal = make_matrix((-10, 0, 10))
+    assert SphericalMatrix.from_planes([horizontal]).plane(HORIZONTAL) is horizontal
+    assert np.shares_memory(SphericalMatrix.from_planes([horizontal]).spl, horizontal.spl)
+    # planes measured at other angles are interpolated onto the angles of the first plane
+    vertical = DirectivityMatrix('NFS', [-20, 0, 20], FREQS, np.array([[70.0] * 3, [90.0] * 3, [70.0] * 3]),
+                                 plane=VERTICAL)
+    sphere = SphericalMatrix.from_planes([horizontal, vertical])
+    assert sphere.angles.tolist() == [-10, 0, 10]
+    assert np.allclose(sphere.plane(VERTICAL).spl[:, 0], [80.0, 90.0, 80.0])
+
+
+def test_spherical_weights():
+    angles = np.arange(-180, 190, 10)
+    single = spherical_weights([HORIZONTAL], angles)
+    assert np.allclose(single[0], solid_angle_weights(angles))
+    # orthogonal planes each cover half of the sphere
+    pair = spherical_weights([HORIZONTAL, VERTICAL], angles)
+    assert np.isclose(pair.sum(), 1.0)
+    assert np.allclose(pair[0], pair[1])
+    assert np.allclose(pair[0], single[0] / 2)
+    # unevenly spaced planes cover different sectors
+    uneven = spherical_weights([0, 30, 90], angles)
+    assert np.isclose(uneven.sum(), 1.0)
+    assert uneven[2].sum() > uneven[1].sum()
+
+
+def test_sound_power_uses_every_plane():
+    angles = np.arange(-180, 190, 10)
+    # an omni source has the same power from any number of planes
+    omni = SphericalMatrix('NFS', [0, 45, 90, 135], angles, FREQS, np.full((4, angles.size, FREQS.size), 85.0))
+    assert np.allclose(sound_power(omni), 85.0)
+    # a source which is quieter in the vertical plane radiates less power than the horizontal plane suggests
+    spl = np.full((2, angles.size, FREQS.size), 85.0)
+    spl[1, np.abs(angles) > 0] = 75.0
+    sphere = SphericalMatrix('NFS', [HORIZONTAL, VERTICAL], angles, FREQS, spl)
+    assert np.all(sound_power(sphere) < sound_power(sphere.plane(HORIZONTAL)))
+    model = MeasurementModel(display_model())
+    model.load(sphere)
+    assert np.allclose(model.power_response.y, sound_power(sphere))
+    assert np.allclose(model.di.y, 85.0 - sound_power(sphere))
+
+
+def test_select_plane():
+    dm = display_model()
+    model = MeasurementModel(dm)
+    listener = Listener()
+    model.register_listener(listener)
+    sphere = make_sphere()
+    model.load(sphere)
+    assert model.planes == [HORIZONTAL, VERTICAL]
+    assert model.plane == HORIZONTAL
+    assert model.matrix is sphere.plane(HORIZONTAL)
+    horizontal = model.get_directivity_data()
+    power = model.power_response
+    data_version = model.data_version
+    model.select_plane(VERTICAL)
+    assert listener.events[-1] == LOAD_MEASUREMENTS
+    assert model.data_version == data_version
+    assert model.get_directivity_data() is sphere.plane(VERTICAL)
+    assert model[1].display_name == 'NFS:H0V0'
+    # the power is calculated from the whole sphere so it does not depend on the selected plane
+    assert np.allclose(model.power_response.y, power.y)
+    model.select_plane(HORIZONTAL)
+    assert model.get_directivity_data() is horizontal
+    # the selected plane is retained across loads where possible
+    model.select_plane(VERTICAL)
+    model.load(make_sphere())
+    assert model.plane == VERTICAL
+    model.load(make_matrix())
+    assert model.plane == HORIZONTAL
+    with pytest.raises(ValueError):
+        model.select_plane(VERTICAL)
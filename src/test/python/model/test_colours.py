@@ -0,0 +1,41 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+from matplotlib import cm
+
+from model.colours import ColourMapRegistry, get_colour_map, get_colour_map_names, to_colours, LUT_SIZE, \
+    DEFAULT_COLOUR_MAP, CUSTOM_COLOUR_MAP
+
+
+def test_colorcet_is_imported_on_demand():
+    script = 'import sys, model.colours; print("colorcet" in sys.modules)'
+    out = subprocess.run([sys.executable, '-c', script], check=True, capture_output=True, text=True,
+                         env={**os.environ, 'PYTHONPATH': os.pathsep.join(sys.path)}).stdout.strip()
+    assert out == 'False'
+
+
+def test_colour_maps_are_cached():
+    registry = ColourMapRegistry()
+    assert DEFAULT_COLOUR_MAP in registry.names
+    assert registry.names[-1] == CUSTOM_COLOUR_MAP
+    custom = registry.get(CUSTOM_COLOUR_MAP)
+    assert custom.name == CUSTOM_COLOUR_MAP
+    assert registry.get(CUSTOM_COLOUR_MAP) is custom
+    assert registry.get('no such map') is registry.get(DEFAULT_COLOUR_MAP)
+
+
+def test_module_functions_share_a_registry():
+    assert get_colour_map(CUSTOM_COLOUR_MAP) is get_colour_map(CUSTOM_COLOUR_MAP)
+    assert get_colour_map_names() == get_colour_map_names()
+
+
+def test_lut_matches_the_colour_map():
+    cmap = cm.get_cmap('viridis')
+    values = np.array([-0.5, 0.0, 0.1, 0.33, 0.5, 0.999, 1.0, 2.0])
+    assert np.array_equal(to_colours(cmap, values), cmap(values, bytes=True))
+    lut = ColourMapRegistry().get_lut(cmap)
+    assert lut.shape == (LUT_SIZE, 4)
+    assert lut.dtype == np.uint8
+    assert not lut.flags.writeable
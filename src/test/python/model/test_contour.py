@@ -0,0 +1,251 @@
+from types import SimpleNamespace
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+import numpy as np
+from matplotlib import cm
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from core.measurement import MeasurementModel, DirectivityMatrix, SphericalMatrix, HORIZONTAL, VERTICAL
+from core.scales import calculate_dBFS_Scales, calculate_fill_levels
+from model import Cursor
+from model.contour import to_grid, to_image_cells, SonagramImage, ContourModel
+from model.multi import MultiChartModel
+from model.scheduler import get_scheduler
+
+
+def flattened(xs, ys, z):
+    return np.tile(xs, ys.size), np.repeat(ys, xs.size), z.ravel()
+
+
+def test_to_grid():
+    xs = np.array([20.0, 100.0, 1000.0, 20000.0])
+    ys = np.array([-90.0, 0.0, 90.0])
+    z = np.arange(12, dtype=np.float64).reshape(3, 4)
+    gx, gy, gz = to_grid(*flattened(xs, ys, z))
+    assert np.array_equal(gx, xs)
+    assert np.array_equal(gy, ys)
+    assert np.array_equal(gz, z)
+
+
+def test_to_grid_single_row():
+    xs = np.array([20.0, 100.0])
+    gx, gy, gz = to_grid(*flattened(xs, np.array([0.0]), np.array([[1.0, 2.0]])))
+    assert gy.tolist() == [0.0]
+    assert gz.shape == (1, 2)
+
+
+def test_irregular_data_is_not_gridded():
+    xs = np.array([20.0, 100.0, 1000.0])
+    ys = np.array([-90.0, 0.0, 90.0])
+    x, y, z = flattened(xs, ys, np.zeros((3, 3)))
+    # one row sampled at different frequencies
+    x2 = x.copy()
+    x2[4] = 200.0
+    assert to_grid(x2, y, z) is None
+    # shuffled points
+    order = np.random.default_rng(1).permutation(x.size)
+    assert to_grid(x[order], y[order], z[order]) is None
+    # ragged rows
+    assert to_grid(x[:-1], y[:-1], z[:-1]) is None
+    # descending angles
+    assert to_grid(*flattened(xs, ys[::-1], np.zeros((3, 3)))) is None
+
+
+def test_image_cells():
+    extent, idx = to_image_cells(np.array([-10.0, 0.0, 10.0]))
+    assert extent == (-15.0, 15.0)
+    assert idx.tolist() == [0, 1, 2]
+    # uneven spacing is resolved at the narrowest step
+    extent, idx = to_image_cells(np.array([0.0, 10.0, 15.0]))
+    assert extent == (-5.0, 17.5)
+    assert idx.tolist() == [0, 0, 1, 1, 2]
+    extent, idx = to_image_cells(np.array([10.0, 100.0, 1000.0]), log=True)
+    assert np.allclose(extent, (0.5, 3.5))
+    assert idx.tolist() == [0, 1, 2]
+
+
+def test_fill_levels_are_bounded_by_pixels_and_colours():
+    assert calculate_fill_levels(480.0, 256) == 256
+    assert calculate_fill_levels(100.4, 256) == 100
+    assert calculate_fill_levels(0, 256) == 2
+
+
+def test_fill_steps():
+    data = np.array([10.2, 80.0, 88.6])
+    vmax, vmin, steps, fill_steps = calculate_dBFS_Scales(data, max_range=60, vmax_to_round=False)
+    assert (vmax, vmin) == (89, 29)
+    assert fill_steps.size == 1200
+    _, _, _, fill_steps = calculate_dBFS_Scales(data, max_range=60, vmax_to_round=False, fill_levels=120)
+    assert fill_steps.size == 120
+    assert np.isclose(fill_steps[-1], 89)
+    assert np.allclose(np.diff(fill_steps), 0.5)
+
+
+def test_image_is_coloured_by_fill_level():
+    freqs = np.array([100.0, 1000.0, 10000.0])
+    image = SonagramImage(freqs, np.array([0.0, 10.0]), np.array([[89.0, 75.0, 10.0], [np.nan, 60.0, 29.5]]))
+    fill_steps = np.array([30.0, 50.0, 70.0, 89.0])
+    cmap = cm.get_cmap('viridis')
+    rgba = image.to_rgba(cmap, fill_steps, 29, 89)
+    assert rgba.shape == (2, 3, 4)
+    assert rgba.dtype == np.uint8
+    expected = cmap(((np.array([40.0, 60.0, 79.5]) - 29) / 60), bytes=True)
+    assert rgba[0, 0].tolist() == expected[2].tolist()
+    assert rgba[0, 1].tolist() == expected[2].tolist()
+    assert rgba[1, 1].tolist() == expected[1].tolist()
+    # below the range or missing is transparent
+    for transparent in (rgba[0, 2], rgba[1, 0], rgba[1, 2]):
+        assert transparent[3] == 0
+
+
+class HeadlessChart:
+    def __init__(self):
+        self.canvas = FigureCanvasAgg(Figure(figsize=(8, 6), dpi=100))
+
+    def get_colour_map(self, name):
+        return cm.get_cmap(name)
+
+
+def test_colourings_are_cached(monkeypatch):
+    calls = []
+    to_rgba = SonagramImage.to_rgba
+
+    def counting_to_rgba(self, cmap, *args):
+        calls.append(cmap.name)
+        return to_rgba(self, cmap, *args)
+
+    monkeypatch.setattr(SonagramImage, 'to_rgba', counting_to_rgba)
+    display_model = SimpleNamespace(db_range=60, normalised=False, normalisation_angle=0, smoothing=0)
+    model = MeasurementModel(display_model)
+    chart = HeadlessChart()
+    contour = ContourModel(chart, model, display_model, SimpleNamespace(get=lambda k: 'viridis'))
+    freqs = np.geomspace(20, 20000, 200)
+    angles = np.arange(-180, 190, 10)
+    model.load(DirectivityMatrix('NFS', angles, freqs, 90 - np.abs(angles)[:, None] / 4 - np.log10(freqs)[None, :]))
+    contour.display()
+    chart.canvas.draw()
+    assert chart.canvas.figure.axes[0].images
+    for name in ('magma', 'viridis', 'magma', 'viridis'):
+        contour.update_colour_map(name)
+    display_model.db_range = 30
+    contour.update_decibel_range()
+    display_model.db_range = 60
+    contour.update_decibel_range()
+    assert calls == ['viridis', 'magma', 'viridis']
+    # the image and both colourings are retained
+    assert contour.memory_usage > 2 * chart.canvas.figure.axes[0].images[0].get_array().nbytes
+    # new data is coloured afresh
+    model.load(DirectivityMatrix('NFS', angles, freqs, 80 - np.abs(angles)[:, None] / 4 - np.log10(freqs)[None, :]))
+    contour.display()
+    assert calls == ['viridis', 'magma', 'viridis', 'viridis']
+
+
+def rippled_matrix(plane='NFS', angles=np.arange(-180, 190, 10), freqs=np.geomspace(20, 20000, 400), scale=1.0):
+    ripple = 6 * np.sin(np.arange(freqs.size) * scale)[None, :]
+    return DirectivityMatrix(plane, angles, freqs, 90 - np.abs(angles)[:, None] / 4 + ripple)
+
+
+def render_image(contour, chart):
+    contour.display()
+    chart.canvas.draw()
+    return chart.canvas.figure.axes[0].images[0].get_array().copy()
+
+
+def test_smoothing_recolours_the_image():
+    display_model = SimpleNamespace(db_range=60, normalised=False, normalisation_angle=0, smoothing=0)
+    model = MeasurementModel(display_model)
+    chart = HeadlessChart()
+    contour = ContourModel(chart, model, display_model, SimpleNamespace(get=lambda k: 'viridis'))
+    model.load(rippled_matrix())
+    unsmoothed = render_image(contour, chart)
+    display_model.smoothing = 3
+    model.smoothing_changed()
+    smoothed = render_image(contour, chart)
+    assert not np.array_equal(unsmoothed, smoothed)
+    display_model.smoothing = 0
+    model.smoothing_changed()
+    assert np.array_equal(render_image(contour, chart), unsmoothed)
+
+
+def test_normalisation_recolours_the_image():
+    display_model = SimpleNamespace(db_range=60, normalised=False, normalisation_angle=0, smoothing=0)
+    model = MeasurementModel(display_model)
+    chart = HeadlessChart()
+    contour = ContourModel(chart, model, display_model, SimpleNamespace(get=lambda k: 'viridis'))
+    model.load(rippled_matrix())
+    data_version = model.data_version
+    absolute = render_image(contour, chart)
+    display_model.normalised = True
+    model.normalisation_changed()
+    assert model.data_version == data_version
+    assert not np.array_equal(absolute, render_image(contour, chart))
+
+
+def test_selecting_a_plane_recolours_the_image():
+    display_model = SimpleNamespace(db_range=60, normalised=False, normalisation_angle=0, smoothing=0)
+    model = MeasurementModel(display_model)
+    chart = HeadlessChart()
+    contour = ContourModel(chart, model, display_model, SimpleNamespace(get=lambda k: 'viridis'))
+    horizontal = rippled_matrix()
+    vertical = rippled_matrix(scale=0.5)
+    vertical = DirectivityMatrix('NFS', vertical.angles, vertical.freqs, vertical.spl, plane=VERTICAL)
+    model.load(SphericalMatrix.from_planes([horizontal, vertical]))
+    first = render_image(contour, chart)
+    model.select_plane(VERTICAL)
+    second = render_image(contour, chart)
+    assert not np.array_equal(first, second)
+    model.select_plane(HORIZONTAL)
+    assert np.array_equal(render_image(contour, chart), first)
+
+
+def test_sonagrams_are_named_after_their_chart():
+    display_model = SimpleNamespace(db_range=60, normalised=False, normalisation_angle=0, smoothing=0)
+    model = MeasurementModel(display_model)
+    preferences = SimpleNamespace(get=lambda k: 'viridis')
+    ContourModel(HeadlessChart(), model, display_model, preferences)
+    MultiChartModel(HeadlessChart(), model, display_model, preferences)
+    names = [h.name for h in model.event_bus.latencies]
+    assert 'contour' in names
+    assert 'multi/contour' in names
+    assert len(set(names)) == len(names)
+
+
+def test_cursor_is_published_as_a_snapshot():
+    display_model = SimpleNamespace(db_range=60, normalised=False, normalisation_angle=0, smoothing=0)
+    model = MeasurementModel(display_model)
+    chart = HeadlessChart()
+    cursors = []
+    contour = ContourModel(chart, model, display_model, SimpleNamespace(get=lambda k: 'viridis'),
+                           show_crosshairs=True, cursor_listener=cursors.append)
+    freqs = np.geomspace(20, 20000, 50)
+    angles = np.arange(-180, 190, 10)
+    model.load(DirectivityMatrix('NFS', angles, freqs, 90 - np.abs(angles)[:, None] / 4 - np.log10(freqs)[None, :]))
+    contour.display()
+    chart.canvas.draw()
+    scheduler = get_scheduler(chart.canvas)
+    scheduler.tick()
+    axes = chart.canvas.figure.axes[0]
+
+    def event(x, y, button=None):
+        return SimpleNamespace(xdata=x, ydata=y, inaxes=axes, dblclick=False, button=button)
+
+    # moving without dragging is ignored
+    contour.enterAxes(event(1000, 0))
+    contour.recordDataCoords(event(1000, 0))
+    assert contour.cursor is None and not scheduler.is_ticking
+    contour.depress(event(1000, 0, button=1))
+    contour.recordDataCoords(event(1000, 0))
+    contour.recordDataCoords(event(None, None))
+    contour.recordDataCoords(event(2000, 30))
+    assert cursors == [Cursor(1000, 0), Cursor(2000, 30)]
+    assert contour.cursor == Cursor(2000, 30)
+    # both moves are drawn in a single frame
+    assert scheduler.is_ticking
+    blits = scheduler.blits
+    scheduler.tick()
+    assert scheduler.blits == blits + 1
+    assert not scheduler.is_ticking
@@ -0,0 +1,87 @@
+import matplotlib
+
+matplotlib.use('Agg')
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from model.decimate import decimate, Decimator
+
+
+def test_small_data_is_untouched():
+    freqs = np.geomspace(20, 20000, 100)
+    spl = np.random.default_rng(0).normal(size=(3, 100))
+    x, y = decimate(freqs, spl, 500, 20, 20000)
+    assert x.shape == (3, 100)
+    assert np.array_equal(x[1], freqs)
+    assert np.array_equal(y, spl)
+
+
+def test_output_is_bounded_by_pixels():
+    freqs = np.linspace(1, 24000, 32768)
+    spl = np.random.default_rng(0).normal(size=(5, freqs.size))
+    x, y = decimate(freqs, spl, 1000, 20, 20000)
+    assert x.shape == y.shape
+    assert x.shape[0] == 5
+    # 2 points per pixel plus the points outside the visible range
+    assert x.shape[1] <= 2 * 1000 + 2 * 100
+    assert np.all(np.diff(x, axis=1) >= 0)
+
+
+def test_peaks_and_notches_are_preserved():
+    freqs = np.linspace(1, 24000, 65536)
+    spl = np.zeros((2, freqs.size))
+    spl[0, 40000] = 12.0
+    spl[0, 50000] = -30.0
+    spl[1, 123] = 6.0
+    x, y = decimate(freqs, spl, 800, 20, 20000)
+    assert y[0].max() == 12.0
+    assert x[0][np.argmax(y[0])] == freqs[40000]
+    assert y[0].min() == -30.0
+    assert x[0][np.argmin(y[0])] == freqs[50000]
+    assert y[1].max() == 6.0
+    assert x[1][np.argmax(y[1])] == freqs[123]
+
+
+def test_single_curve():
+    freqs = np.linspace(1, 24000, 16384)
+    spl = np.sin(freqs / 100)
+    x, y = decimate(freqs, spl, 400, 20, 20000)
+    assert x.ndim == 1
+    assert x.shape == y.shape
+    assert y.max() == spl.max()
+    assert y.min() == spl.min()
+
+
+def test_nan_is_ignored():
+    freqs = np.linspace(1, 24000, 16384)
+    spl = np.full(freqs.size, np.nan)
+    spl[::2] = 1.0
+    spl[100] = 5.0
+    _, y = decimate(freqs, spl, 400, 20, 20000)
+    assert np.nanmax(y) == 5.0
+
+
+def test_decimator_tracks_resolution():
+    changes = []
+    fig = Figure(figsize=(10, 4), dpi=100)
+    FigureCanvasAgg(fig)
+    axes = fig.add_subplot(1, 1, 1)
+    axes.set_xscale('log')
+    axes.set_xlim(left=20, right=20000)
+    decimator = Decimator(axes, 'test', lambda: changes.append(decimator.resolution))
+    freqs = np.linspace(1, 24000, 32768)
+    spl = np.random.default_rng(0).normal(size=(2, freqs.size))
+    first = decimator.get(1, 'spl', freqs, spl)
+    assert decimator.get(1, 'spl', freqs, spl) is first
+    axes.set_xlim(left=100, right=1000)
+    assert len(changes) == 1
+    zoomed = decimator.get(1, 'spl', freqs, spl)
+    assert zoomed is not first
+    axes.set_xlim(left=100, right=1000)
+    assert len(changes) == 1
+    axes.cla()
+    decimator.connect()
+    axes.set_xlim(left=20, right=20000)
+    assert len(changes) == 2
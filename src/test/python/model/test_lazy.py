@@ -0,0 +1,46 @@
+from types import SimpleNamespace
+
+from model.lazy import LazyChartModel
+
+
+class Chart:
+    def __init__(self):
+        self.calls = []
+
+    def display(self):
+        self.calls.append('display')
+
+    def suspend(self):
+        self.calls.append('suspend')
+
+    def update_decibel_range(self, draw=True):
+        self.calls.append(('db', draw))
+
+    def update_colour_map(self, cmap_name, draw=True):
+        self.calls.append(('cmap', cmap_name, draw))
+
+
+def test_model_is_created_on_first_display():
+    created = []
+
+    def factory():
+        created.append(Chart())
+        return created[-1]
+
+    widget = SimpleNamespace()
+    lazy = LazyChartModel(widget, 'test', factory)
+    assert lazy._chart is widget
+    assert str(lazy) == 'test'
+    lazy.update_decibel_range(draw=False)
+    lazy.update_colour_map('bgyw', draw=False)
+    lazy.suspend()
+    assert created == []
+    assert lazy.model is None
+    lazy.display()
+    lazy.display()
+    assert len(created) == 1
+    assert lazy.model is created[0]
+    lazy.update_colour_map('fire', draw=False)
+    lazy.update_decibel_range(draw=False)
+    lazy.suspend()
+    assert created[0].calls == ['display', 'display', ('cmap', 'fire', False), ('db', False), 'suspend']
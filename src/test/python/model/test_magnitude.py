@@ -0,0 +1,123 @@
+import os
+import sys
+from types import SimpleNamespace
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+import numpy as np
+import pytest
+from matplotlib import cm
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from qtpy.QtWidgets import QApplication, QListWidget
+
+from core.measurement import MeasurementModel, DirectivityMatrix
+from model.magnitude import MagnitudeModel, MAX_LEGEND_ENTRIES
+
+FREQS = np.geomspace(20, 20000, 200)
+
+
+@pytest.fixture(scope='module')
+def qapp():
+    return QApplication.instance() or QApplication(sys.argv)
+
+
+class HeadlessChart:
+    def __init__(self):
+        self.canvas = FigureCanvasAgg(Figure(figsize=(8, 6), dpi=100))
+
+    def get_colour_map(self, name):
+        return cm.get_cmap(name)
+
+    def get_colour(self, idx, count):
+        return self.get_colour_map('rainbow')(idx / count)
+
+
+def make_matrix(angles):
+    angles = np.asarray(angles)
+    return DirectivityMatrix('NFS', angles, FREQS, 90 - np.abs(angles)[:, None] / 4 - np.log10(FREQS)[None, :])
+
+
+def create_model(**kwargs):
+    display_model = SimpleNamespace(db_range=60, normalised=False, normalisation_angle=0, smoothing=0)
+    model = MeasurementModel(display_model)
+    chart = HeadlessChart()
+    return model, chart, MagnitudeModel(chart, model, display_model, **kwargs)
+
+
+def test_di_is_drawn_on_a_secondary_axis():
+    model, chart, magnitude = create_model()
+    model.load(make_matrix(np.arange(-180, 190, 10)))
+    magnitude.display()
+    chart.canvas.draw()
+    primary, secondary = chart.canvas.figure.axes
+    assert [l.get_label() for l in primary.lines] == ['Sound Power']
+    assert [l.get_label() for l in secondary.lines] == ['DI']
+    assert secondary.lines[0].get_linestyle() != primary.lines[0].get_linestyle()
+    # the SPL axis is scaled to the measurements, not the DI
+    assert primary.get_ylim()[0] > np.nanmax(model.di.y)
+    assert 'DI' in [t.get_text() for t in primary.get_legend().get_texts()]
+    model.clear()
+    assert not secondary.lines
+    assert secondary.get_ylim() == (0.0, 30.0)
+
+
+def selector_names(selector):
+    return [selector.item(row).text() for row in range(selector.count())]
+
+
+def test_selection_filters_the_collection(qapp):
+    selector = QListWidget()
+    selector.setSelectionMode(QListWidget.MultiSelection)
+    model, chart, magnitude = create_model(selector=selector)
+    model.load(make_matrix([-20, -10, 0, 10, 20]))
+    magnitude.display()
+    collection = chart.canvas.figure.axes[0].collections[0]
+    assert len(collection.get_segments()) == 5
+    all_colours = collection.get_colors().copy()
+    selector.clearSelection()
+    for row in (1, 3):
+        selector.item(row).setSelected(True)
+    segments = collection.get_segments()
+    assert len(segments) == 2
+    assert np.allclose(segments[0][:, 1], model.get_directivity_data().spl[1])
+    assert np.allclose(segments[1][:, 1], model.get_directivity_data().spl[3])
+    assert np.allclose(collection.get_colors(), all_colours[[1, 3]])
+    selector.selectAll()
+    assert len(collection.get_segments()) == 5
+    assert np.allclose(collection.get_colors(), all_colours)
+
+
+def test_legend_summarises_many_curves():
+    model, chart, magnitude = create_model()
+    few = make_matrix(np.arange(MAX_LEGEND_ENTRIES) * 5)
+    model.load(few)
+    magnitude.display()
+    labels = [t.get_text() for t in chart.canvas.figure.axes[0].get_legend().get_texts()]
+    assert labels[:MAX_LEGEND_ENTRIES] == [m.display_name for m in model.get_directivity_data()]
+    model.load(make_matrix(np.arange(-180, 190, 10)))
+    magnitude.display()
+    labels = [t.get_text() for t in chart.canvas.figure.axes[0].get_legend().get_texts()]
+    assert labels == ['NFS x37 (-180\N{DEGREE SIGN} to 180\N{DEGREE SIGN})', 'Sound Power', 'DI']
+
+
+def test_selector_follows_the_curves(qapp):
+    selector = QListWidget()
+    model, chart, magnitude = create_model(selector=selector)
+    expected = [m.display_name for m in make_matrix([-30, -10, 0, 10, 30])] + ['Sound Power']
+    # a stale entry plus survivors in the wrong order
+    for name in (expected[3], 'stale', expected[0], expected[3]):
+        selector.addItem(name)
+    survivor = selector.item(2)
+    model.load(make_matrix([-30, -10, 0, 10, 30]))
+    magnitude.display()
+    names = selector_names(selector)
+    assert names[:5] == expected[:5]
+    assert 'stale' not in names
+    assert len(names) == len(set(names))
+    # survivors are moved rather than recreated
+    assert selector.item(0) is survivor
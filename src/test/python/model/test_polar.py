@@ -0,0 +1,83 @@
+import math
+from types import SimpleNamespace
+
+import matplotlib
+
+matplotlib.use('Agg')
+
+import numpy as np
+from matplotlib import cm
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from core.measurement import MeasurementModel, DirectivityMatrix
+from model import Cursor
+from model.multi import MarkerData
+from model.polar import PolarModel
+
+FREQS = np.geomspace(20, 20000, 50)
+ANGLES = np.arange(-90, 100, 15)
+
+
+class HeadlessChart:
+    def __init__(self):
+        self.canvas = FigureCanvasAgg(Figure(figsize=(6, 6), dpi=100))
+
+    def get_colour(self, idx, count):
+        return cm.get_cmap('rainbow')(idx / count)
+
+
+def create_model():
+    display_model = SimpleNamespace(db_range=60, normalised=False, normalisation_angle=0, smoothing=0)
+    model = MeasurementModel(display_model)
+    chart = HeadlessChart()
+    marker_data = MarkerData()
+    polar = PolarModel(chart, model, display_model, marker_data)
+    spl = 90 - np.abs(ANGLES)[:, None] / 10 - np.log10(FREQS)[None, :]
+    model.load(DirectivityMatrix('NFS', ANGLES, FREQS, spl))
+    polar.display()
+    return model, polar, marker_data
+
+
+def test_curve_is_a_row_of_the_freq_major_data():
+    model, polar, _ = create_model()
+    assert polar.findNearestData(Cursor(1000, 0)) == np.argmin(np.abs(FREQS - 1000))
+    assert polar._r.flags['C_CONTIGUOUS']
+    assert polar._r.shape == (FREQS.size, ANGLES.size)
+    polar.cursor = Cursor(1000, 0)
+    assert polar.redraw()
+    col = polar.findNearestData(polar.cursor)
+    assert polar._r[col].base is polar._r
+    assert polar._r[col].flags['C_CONTIGUOUS']
+    assert np.array_equal(polar._r[col], model.get_directivity_data().spl[:, col])
+    assert np.array_equal(polar._curve.get_ydata(), model.get_directivity_data().spl[:, col])
+    assert np.array_equal(polar._curve.get_xdata(), np.radians(ANGLES))
+    # the same position does not redraw
+    assert not polar.redraw()
+
+
+def test_marker_angle_is_found_by_binary_search():
+    _, polar, marker_data = create_model()
+    # between -15 and 0 so the first angle at or above the cursor is 0
+    polar.cursor = Cursor(1000, -7)
+    polar.redraw()
+    idx = int(np.searchsorted(np.radians(ANGLES), math.radians(-7)))
+    assert ANGLES[idx] == 0
+    assert polar._vline.get_xdata()[0] == np.radians(ANGLES[idx])
+    assert polar._vmarker.get_xdata() == np.radians(ANGLES[idx])
+    assert marker_data.angle == '0\N{DEGREE SIGN}'
+
+
+def test_cursor_past_the_last_angle_is_clamped():
+    _, polar, marker_data = create_model()
+    polar.cursor = Cursor(1000, 170)
+    polar.redraw()
+    assert polar._drawnIndices[1] == ANGLES.size - 1
+    assert polar._vmarker.get_xdata() == np.radians(ANGLES[-1])
+    assert marker_data.angle == '90\N{DEGREE SIGN}'
+
+
+def test_no_data_draws_nothing():
+    model, polar, _ = create_model()
+    model.clear()
+    assert polar.findNearestData(Cursor(1000, 0)) == -1
@@ -0,0 +1,86 @@
+import matplotlib
+
+matplotlib.use('Agg')
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from model.scheduler import get_scheduler
+
+
+class Source:
+    def __init__(self, axes):
+        self.line = axes.plot([0, 1], [0, 1])[0]
+        self.x = 0
+        self.drawn_x = None
+        self.updates = 0
+
+    def update(self):
+        self.updates += 1
+        if self.x == self.drawn_x:
+            return False
+        self.line.set_xdata([self.x, self.x + 1])
+        self.drawn_x = self.x
+        return True
+
+
+def test_one_scheduler_per_canvas():
+    canvas = FigureCanvasAgg(Figure())
+    assert get_scheduler(canvas) is get_scheduler(canvas)
+    assert get_scheduler(canvas) is not get_scheduler(FigureCanvasAgg(Figure()))
+
+
+def test_only_ticks_while_a_draw_is_pending():
+    canvas = FigureCanvasAgg(Figure())
+    axes = canvas.figure.add_subplot(1, 2, 1)
+    twin = axes.twinx()
+    other = canvas.figure.add_subplot(1, 2, 2)
+    canvas.draw()
+    scheduler = get_scheduler(canvas)
+    s1, s2, s3 = Source(axes), Source(twin), Source(other)
+    for s in (s1, s2, s3):
+        scheduler.add(s, (s.line,), s.update)
+        assert s.line.get_animated()
+    assert scheduler.is_ticking
+    canvas.draw()
+    scheduler.tick()
+    assert not scheduler.is_ticking
+    assert [s.updates for s in (s1, s2, s3)] == [1, 1, 1]
+    assert scheduler.blits == 1
+    # an idle tick does nothing
+    scheduler.tick()
+    assert [s.updates for s in (s1, s2, s3)] == [1, 1, 1]
+    # only the requested sources are updated and unchanged sources are not blitted
+    s1.x = 1
+    scheduler.request_draw(s1, s2)
+    assert scheduler.is_ticking
+    scheduler.tick()
+    assert [s.updates for s in (s1, s2, s3)] == [2, 2, 1]
+    assert scheduler.blits == 2
+    scheduler.request_draw(s2)
+    scheduler.tick()
+    assert scheduler.blits == 2
+    # removed sources are never updated
+    scheduler.remove(s1)
+    scheduler.request_draw()
+    scheduler.tick()
+    assert [s.updates for s in (s1, s2, s3)] == [2, 4, 2]
+    assert s1 not in scheduler
+
+
+def test_suspended_scheduler_holds_draws_until_resumed():
+    canvas = FigureCanvasAgg(Figure())
+    axes = canvas.figure.add_subplot(1, 1, 1)
+    canvas.draw()
+    scheduler = get_scheduler(canvas)
+    source = Source(axes)
+    scheduler.add(source, (source.line,), source.update)
+    scheduler.tick()
+    scheduler.suspend()
+    source.x = 1
+    scheduler.request_draw(source)
+    assert not scheduler.is_ticking
+    scheduler.resume()
+    assert scheduler.is_ticking
+    scheduler.tick()
+    assert source.drawn_x == 1
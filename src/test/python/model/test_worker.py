@@ -0,0 +1,85 @@
+import os
+import sys
+import threading
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import numpy as np
+import pytest
+from qtpy.QtCore import QEventLoop, QThreadPool, QTimer, QThread
+from qtpy.QtWidgets import QApplication
+
+from core.load import NFSLoader
+from model.worker import LoadWorker
+
+
+@pytest.fixture(scope='module')
+def qapp():
+    return QApplication.instance() or QApplication(sys.argv)
+
+
+def write_nfs(path, rows):
+    with open(path, 'w') as fp:
+        fp.write('Directivity\n"On-Axis"\t""\t"10 deg"\t""\nunits\n')
+        for f in np.linspace(20, 20000, rows):
+            fp.write(f'"{f:,.2f}"\t"90.0"\t"{f:,.2f}"\t"80.0"\n')
+    return str(path)
+
+
+def run_worker(worker, timeout_ms=10000):
+    ''' starts the worker and waits for it to signal completion, returns the signals received. '''
+    received = {'progress': [], 'threads': []}
+    loop = QEventLoop()
+
+    def on_done(key, *args):
+        received[key] = args
+        received['threads'].append(QThread.currentThread())
+        loop.quit()
+
+    worker.signals.progress.connect(lambda pct: received['progress'].append(pct))
+    worker.signals.loaded.connect(lambda m: on_done('loaded', m))
+    worker.signals.failed.connect(lambda e: on_done('failed', e))
+    worker.signals.cancelled.connect(lambda: on_done('cancelled'))
+    QTimer.singleShot(timeout_ms, loop.quit)
+    QThreadPool.globalInstance().start(worker)
+    loop.exec_()
+    QThreadPool.globalInstance().waitForDone(timeout_ms)
+    return received
+
+
+def test_load_in_background(qapp, tmp_path):
+    file = write_nfs(tmp_path / 'nfs.txt', 20000)
+    received = run_worker(LoadWorker(lambda progress: NFSLoader(file, progress_listener=progress)))
+    assert 'loaded' in received
+    measurements = received['loaded'][0]
+    assert [m.h for m in measurements] == [-10, 0, 10]
+    assert measurements[1].x.size == 20000
+    # results are delivered on the UI thread
+    assert received['threads'] == [qapp.thread()]
+    assert received['progress'][-1] == 100
+    assert received['progress'] == sorted(received['progress'])
+
+
+def test_cancel(qapp, tmp_path):
+    file = write_nfs(tmp_path / 'nfs.txt', 20000)
+    started = threading.Event()
+    release = threading.Event()
+
+    def on_progress(pct):
+        # block the worker until the cancel request has been made
+        started.set()
+        release.wait(5)
+
+    worker = LoadWorker(lambda progress: NFSLoader(file, progress_listener=on_progress))
+    QTimer.singleShot(0, lambda: (started.wait(5), worker.cancel(), release.set()))
+    received = run_worker(worker)
+    assert 'cancelled' in received
+    assert 'loaded' not in received
+
+
+def test_failure(qapp, tmp_path):
+    file = tmp_path / 'bad.txt'
+    file.write_text('not an nfs file\n')
+    received = run_worker(LoadWorker(lambda progress: NFSLoader(str(file), progress_listener=progress)))
+    assert 'failed' in received
+    assert isinstance(received['failed'][0], ValueError)
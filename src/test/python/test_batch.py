@@ -0,0 +1,72 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from batch import render_file, find_files, format_summary, main
+
+FREQS = np.geomspace(20, 20000, 50)
+
+
+def write_nfs(path, angles):
+    header = '\t'.join(('On-Axis' if a == 0 else f"{a} deg") + '\t' for a in angles)
+    units = '\t'.join(['Frequency [Hz]\tSPL [dB]'] * len(angles))
+    lines = ['Directivity', header, units]
+    for f in FREQS:
+        lines.append('\t'.join(f"{f}\t{90.0 - a / 10.0 - f / 10000.0}" for a in angles))
+    with open(path, 'w') as fp:
+        fp.write('\n'.join(lines) + '\n')
+    return str(path)
+
+
+def test_batch_does_not_import_qt(tmp_path):
+    file = write_nfs(tmp_path / 'driver.txt', range(0, 190, 10))
+    script = (f"import sys, batch; batch.render_file({file!r}, {str(tmp_path)!r}, width=400, height=300); "
+              f"print(','.join(sorted({{m.split('.')[0] for m in sys.modules}})))")
+    out = subprocess.run([sys.executable, '-c', script], check=True, capture_output=True, text=True,
+                         env={**os.environ, 'PYTHONPATH': os.pathsep.join(sys.path)}).stdout.strip().split(',')
+    assert not {'PyQt5', 'qtpy', 'ui'} & set(out)
+
+
+def test_render_file(tmp_path):
+    file = write_nfs(tmp_path / 'driver.txt', range(0, 190, 10))
+    result = render_file(file, str(tmp_path), formats=['png', 'svg'], width=400, height=300)
+    assert result['error'] is None
+    assert set(result['timings'].keys()) == {'load', 'sonagram', 'magnitude', 'polar', 'total'}
+    assert sorted(os.path.basename(o) for o in result['outputs']) == [
+        f"driver_{c}.{f}" for c in ('magnitude', 'polar', 'sonagram') for f in ('png', 'svg')
+    ]
+    assert all(os.path.getsize(o) > 0 for o in result['outputs'])
+
+
+def test_render_failure_is_reported(tmp_path):
+    file = tmp_path / 'broken.txt'
+    file.write_text('not an export\n')
+    result = render_file(str(file), str(tmp_path))
+    assert result['error'].startswith('ValueError')
+    assert result['outputs'] == []
+    assert 'total' in result['timings']
+    assert 'broken.txt' in format_summary([result], ['sonagram'])
+
+
+def test_find_files(tmp_path):
+    a = write_nfs(tmp_path / 'a.txt', [0, 10])
+    b = write_nfs(tmp_path / 'b.txt', [0, 10])
+    (tmp_path / 'c.csv').write_text('')
+    assert find_files([str(tmp_path)]) == [a, b]
+    assert find_files([str(tmp_path / 'b*'), str(tmp_path)]) == [b, a]
+    assert find_files([str(tmp_path / 'missing.txt')]) == [str(tmp_path / 'missing.txt')]
+
+
+def test_main_renders_every_file(tmp_path, capsys):
+    inputs = tmp_path / 'in'
+    inputs.mkdir()
+    for name in ('a', 'b'):
+        write_nfs(inputs / f"{name}.txt", [0, 10, 20])
+    out = tmp_path / 'out'
+    assert main([str(inputs), '-o', str(out), '-c', 'polar', '-w', '2', '--width', '300', '--height', '300']) == 0
+    assert sorted(os.listdir(out)) == ['a_polar.png', 'b_polar.png']
+    summary = capsys.readouterr().out
+    assert 'a.txt' in summary and 'b.txt' in summary
+    assert 'Rendered 2/2 files' in summary